@@ -1,39 +1,107 @@
 # File: backend/app/api/v1/dependencies.py
 
-from fastapi import Depends, HTTPException, status
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.config import SECRET_KEY, ALGORITHM
-from app.db import session, base as models
+from app.core import principal_cache
+from app.core.config import EXPENSE_PAGE_SIZE_DEFAULT, EXPENSE_PAGE_SIZE_MAX
+from app.core.principal_cache import Principal
+from app.db import replicas, session, base as models
 from app.crud import crud_user
+from app.crud.pagination import decode_cursor
+from app.api.v1.schemas import schemas
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login/token", auto_error=False)
+
+async def get_current_user(db: AsyncSession = Depends(session.get_db), token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Resolves the bearer token to a cached user snapshot. Known tokens skip
+    the JWT decode and known users skip the database lookup.
+    """
+    principal = await _resolve_principal(db, token)
+    replicas.note_user(principal.id)
+    return principal
+
+async def get_read_db(request: Request, current_user: Principal = Depends(get_current_user)):
+    """
+    Session for endpoints that only read: on a read replica when one is
+    healthy, on the primary while the user is inside their read-your-writes
+    window (see app/db/replicas.py). Never commit on it.
+    """
+    use_primary = replicas.needs_primary(current_user.id, request.cookies)
+    async with session.read_session(use_primary=use_primary) as db:
+        yield db
 
-def get_current_user(db: Session = Depends(session.get_db), token: str = Depends(oauth2_scheme)):
+async def get_stream_user(
+    access_token: Optional[str] = Query(None, description="Bearer token, for clients that cannot set headers (EventSource)"),
+    header_token: Optional[str] = Depends(optional_oauth2_scheme),
+) -> Principal:
+    """
+    get_current_user for long-lived streams. The token may also come as a
+    query parameter, and a cache miss is looked up in a short session of
+    its own, so no connection stays checked out while the stream is open.
+    """
+    async with session.AsyncSessionLocal() as db:
+        return await _resolve_principal(db, header_token or access_token or "")
+
+async def _resolve_principal(db: AsyncSession, token: str) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = crud_user.get_user_by_email(db, email=email)
-    if user is None:
+    claims = principal_cache.verify_token(token) if token else None
+    if claims is None:
         raise credentials_exception
-    return user
+    email, expires_at = claims
 
-def get_current_admin_user(current_user: models.User = Depends(get_current_user)):
+    principal = principal_cache.get_principal(email)
+    if principal is None:
+        user = await crud_user.get_user_by_email(db, email=email)
+        if user is None:
+            raise credentials_exception
+        principal = principal_cache.put_principal(user, expires_at)
+    return principal
+
+async def get_current_admin_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.role != models.UserRole.admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user doesn't have enough privileges"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_expense_filters(
+    status: Optional[models.ExpenseStatus] = None,
+    category: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    min_amount: Optional[Decimal] = None,
+    max_amount: Optional[Decimal] = None,
+) -> schemas.ExpenseFilters:
+    return schemas.ExpenseFilters(
+        status=status,
+        category=category,
+        date_from=date_from,
+        date_to=date_to,
+        min_amount=min_amount,
+        max_amount=max_amount,
+    )
+
+async def get_page_params(
+    limit: int = Query(EXPENSE_PAGE_SIZE_DEFAULT, ge=1, le=EXPENSE_PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+) -> schemas.PageParams:
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return schemas.PageParams(limit=limit, after=after)
\ No newline at end of file
@@ -1,20 +1,28 @@
 # File: backend/app/api/v1/endpoints/admin.py
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+import httpx
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Dict, List, Optional
+import uuid
 
 from app.db import session, base as models
+from app.db import engine as db_engine, replicas
 from app.api.v1 import dependencies
+from app.core.principal_cache import Principal
 from app.crud import crud_user # We will need more CRUD modules here
 from app.api.v1.schemas import schemas
+from app.core.config import EXCHANGE_RATE_ADMIN_UPLOADS, USER_IMPORT_MAX_ROWS
+from app.services import exchange_rates, export, rate_history, rollups, user_import
 
 router = APIRouter()
 
 @router.get("/users", response_model=List[schemas.User])
-def get_all_users(
-    db: Session = Depends(session.get_db),
-    admin_user: models.User = Depends(dependencies.get_current_admin_user)
+async def get_all_users(
+    db: AsyncSession = Depends(session.get_db),
+    admin_user: Principal = Depends(dependencies.get_current_admin_user)
 ):
     """
     Get all users in the admin's company.
@@ -25,10 +33,10 @@ def get_all_users(
     return [] # Placeholder
 
 @router.post("/users", response_model=schemas.User)
-def create_new_user(
+async def create_new_user(
     user_in: schemas.UserCreate,
-    db: Session = Depends(session.get_db),
-    admin_user: models.User = Depends(dependencies.get_current_admin_user)
+    db: AsyncSession = Depends(session.get_db),
+    admin_user: Principal = Depends(dependencies.get_current_admin_user)
 ):
     """
     Create a new user. The "send password" logic would be triggered here
@@ -36,12 +44,192 @@ def create_new_user(
     """
     # Ensure the new user belongs to the admin's company
     user_in.company_id = admin_user.company_id
-    return crud_user.create_user(db=db, user=user_in)
+    try:
+        return await crud_user.create_user(db=db, user=user_in)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post(
+    "/users/bulk",
+    response_model=schemas.UserImportReport,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": schemas.UserImportRow.schema()}},
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def bulk_create_users(
+    request: Request,
+    db: AsyncSession = Depends(session.get_db),
+    admin_user: Principal = Depends(dependencies.get_current_admin_user)
+):
+    """
+    Create many users at once in the admin's company, from a JSON array or
+    a CSV with columns email, password and optionally manager_id or
+    manager_email. A manager may be an existing user or another row of the
+    same import. Valid rows are created in one transaction; the others are
+    listed in the report with the reason.
+    """
+    fmt = user_import.detect_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Send application/json, text/csv or application/x-ndjson")
+    # Generous per-row allowance; rows beyond the limit are rejected while parsing.
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > USER_IMPORT_MAX_ROWS * 1024:
+        raise HTTPException(status_code=413, detail=f"At most {USER_IMPORT_MAX_ROWS} users per import")
+    body = await request.body()
+    try:
+        return await user_import.import_users(db, body, fmt, company_id=admin_user.company_id)
+    except user_import.UserImportError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.patch("/users/{user_id}", response_model=schemas.User)
+async def update_user(
+    user_id: uuid.UUID,
+    user_in: schemas.UserUpdate,
+    db: AsyncSession = Depends(session.get_db),
+    admin_user: Principal = Depends(dependencies.get_current_admin_user)
+):
+    """
+    Update a user's email or manager.
+    """
+    db_user = await crud_user.get_user(db, user_id=user_id)
+    if not db_user or db_user.company_id != admin_user.company_id:
+        raise HTTPException(status_code=404, detail="User not found")
+    try:
+        return await crud_user.update_user(db, db_user=db_user, user_in=user_in)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/db/pool", response_model=Dict[str, schemas.PoolStatus])
+async def get_pool_status(
+    admin_user: Principal = Depends(dependencies.get_current_admin_user)
+):
+    """
+    Connection pool statistics for this worker process: live checked-out and
+    overflow counts plus cumulative checkouts, wait times and timeouts.
+    """
+    return db_engine.pool_status()
+
+@router.get("/db/replicas", response_model=List[schemas.ReplicaStatus])
+async def get_replica_status(
+    admin_user: Principal = Depends(dependencies.get_current_admin_user)
+):
+    """
+    Health of the read replicas as last probed by this worker process;
+    empty when DATABASE_REPLICA_URLS is not set.
+    """
+    return replicas.replica_set.status()
+
+@router.get("/expenses/export")
+async def export_expenses(
+    format: str = Query("csv", description="csv or xlsx"),
+    filters: schemas.ExpenseFilters = Depends(dependencies.get_expense_filters),
+    db: AsyncSession = Depends(session.get_db),
+    admin_user: Principal = Depends(dependencies.get_current_admin_user)
+):
+    """
+    Streams all of the company's expenses (optionally filtered) as CSV or
+    XLSX, with amounts converted to the company's base currency. Rows are
+    read from a server-side cursor and written out batch by batch, so memory
+    stays flat regardless of the number of expenses.
+    """
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'. Use one of: {', '.join(export.FORMATS)}")
+    company = await db.get(models.Company, admin_user.company_id)
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
+    # Fetch rates before the response starts so upstream errors still map to a status code.
+    try:
+        rates = await exchange_rates.get_rates(company.base_currency)
+    except httpx.HTTPError:
+        raise HTTPException(status_code=503, detail="Service unavailable: Could not load exchange rates.")
+
+    media_type, extension = export.FORMATS[format]
+    batches = export.iter_rows(company.id, company.base_currency, rates, filters)
+    return StreamingResponse(
+        export.stream_export(format, batches),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="expenses.{extension}"'},
+    )
+
+@router.post("/exchange-rates", response_model=schemas.RateImportReport)
+async def import_exchange_rates(
+    file: UploadFile = File(..., description="CSV (date, base, quote, rate) or JSON rate tables"),
+    format: Optional[str] = Query(None, description="csv or json; detected from the file name if omitted"),
+    db: AsyncSession = Depends(session.get_db),
+    admin_user: Principal = Depends(dependencies.get_current_admin_user)
+):
+    """
+    Import historical exchange rates used to convert amounts at the rate of
+    their date. Rates already stored for the same date are replaced. The
+    rate history is shared by all companies, so uploads must be enabled
+    with EXCHANGE_RATE_ADMIN_UPLOADS.
+    """
+    if not EXCHANGE_RATE_ADMIN_UPLOADS:
+        raise HTTPException(status_code=403, detail="Exchange rate uploads are disabled on this server")
+    fmt = format or rate_history.detect_format(file.filename, file.content_type)
+    if fmt not in rate_history.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}'")
+    try:
+        return await rate_history.import_rates(db, file.file, fmt)
+    except rate_history.RateImportError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.get("/analytics", response_model=schemas.AnalyticsReport)
+async def get_spending_analytics(
+    group_by: List[str] = Query(["category"], description="Any of: employee, category, month"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(session.get_db),
+    admin_user: Principal = Depends(dependencies.get_current_admin_user)
+):
+    """
+    Spending totals in the company's base currency, split by status and
+    grouped by employee, category and/or month. Reads only the
+    incrementally maintained rollups (see services/rollups), never the
+    expenses table; date_from/date_to are applied by whole month.
+    """
+    unknown = set(group_by) - set(rollups.GROUP_BY)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot group by: {', '.join(sorted(unknown))}")
+    company = await db.get(models.Company, admin_user.company_id)
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
+
+    rows = await rollups.get_analytics(db, company.id, group_by, date_from=date_from, date_to=date_to)
+    try:
+        rates = await exchange_rates.get_rates(company.base_currency)
+    except httpx.HTTPError:
+        raise HTTPException(status_code=503, detail="Service unavailable: Could not load exchange rates.")
+    merged, missing = rollups.merge_in_base(rows, company.base_currency, rates)
+
+    return schemas.AnalyticsReport(
+        base_currency=company.base_currency,
+        group_by=[name for name in rollups.GROUP_BY if name in group_by],
+        rows=[
+            schemas.AnalyticsRow(
+                employee_id=group.get("employee"),
+                category=group.get("category"),
+                month=group.get("month"),
+                status=status,
+                expense_count=count,
+                total=total,
+            )
+            for group, status, total, count in merged
+        ],
+        missing_rates=missing,
+    )
 
 # Placeholder for approval rule endpoints
 @router.post("/workflows")
-def create_approval_workflow(
-    admin_user: models.User = Depends(dependencies.get_current_admin_user)
+async def create_approval_workflow(
+    admin_user: Principal = Depends(dependencies.get_current_admin_user)
 ):
     # This would take a schema for workflow creation and call a CRUD function.
     return {"message": "Approval workflow creation endpoint not implemented yet."}
\ No newline at end of file
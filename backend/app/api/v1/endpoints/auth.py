@@ -1,7 +1,7 @@
 # File: backend/app/api/v1/endpoints/auth.py
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from app.db import session
@@ -13,13 +13,13 @@ from app.api.v1.schemas import schemas
 router = APIRouter()
 
 @router.post("/login/token", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
     # FIX: Reordered the arguments
     request_data: schemas.TokenRequest,
-    db: Session = Depends(session.get_db)
+    db: AsyncSession = Depends(session.get_db)
 ):
-    user = crud_user.get_user_by_email(db, email=request_data.username)
-    if not user or not security.verify_password(request_data.password, user.password_hash):
+    user = await crud_user.get_user_by_email(db, email=request_data.username)
+    if not user or not await security.verify_password_async(request_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
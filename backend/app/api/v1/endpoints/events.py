@@ -0,0 +1,61 @@
+# File: backend/app/api/v1/endpoints/events.py
+
+import asyncio
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.api.v1 import dependencies
+from app.core.config import EVENT_STREAM_HEARTBEAT_SECONDS, EVENT_STREAM_MAX_CONNECTIONS
+from app.core.principal_cache import Principal
+from app.services import notifications
+
+router = APIRouter()
+
+async def _event_stream(user_id: uuid.UUID):
+    """
+    Subscribes to the user's events and yields them as SSE messages until
+    the client goes away. Idle streams get a comment every heartbeat so
+    proxies keep them open and dead connections are noticed on the next
+    write.
+    """
+    subscription = notifications.hub.subscribe(user_id)
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
+            if subscription.overflowed:
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.overflowed = False
+                yield notifications.frame(notifications.RESYNC)
+                continue
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), EVENT_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            yield message
+    finally:
+        notifications.hub.unsubscribe(subscription)
+
+@router.get("")
+async def stream_events(current_user: Principal = Depends(dependencies.get_stream_user)):
+    """
+    Server-Sent Events for the current user, replacing polling of the
+    expense lists:
+
+    - `approval_queue`: an expense entered or left your approval queue
+    - `expense_status`: one of your expenses changed status or step
+    - `resync`: events were missed; refetch whatever you show
+
+    Browsers' EventSource cannot send headers, so the token may be passed
+    as `access_token`. The stream holds no database connection.
+    """
+    if notifications.hub.connections >= EVENT_STREAM_MAX_CONNECTIONS:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many open event streams")
+    return StreamingResponse(
+        _event_stream(current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,33 +1,190 @@
 # File: backend/app/api/v1/endpoints/expenses.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import os
+import uuid
 
 from app.db import session, base as models
-from app.api.v1 import dependencies
+from app.api.v1 import dependencies, responses
+from app.core.principal_cache import Principal
 from app.crud import crud_expense
+from app.services import blob_store, collection_versions, expense_import, receipt_jobs, receipts
 from app.api.v1.schemas import schemas
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Expense])
-def read_employee_expenses(
-    db: Session = Depends(session.get_db),
-    current_user: models.User = Depends(dependencies.get_current_user)
+async def read_employee_expenses(
+    request: Request,
+    expand: bool = Query(False, description="Include employee, workflow, receipts and approval history"),
+    filters: schemas.ExpenseFilters = Depends(dependencies.get_expense_filters),
+    page: schemas.PageParams = Depends(dependencies.get_page_params),
+    db: AsyncSession = Depends(dependencies.get_read_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
 ):
     """
-    Get all expenses submitted by the currently logged-in user.
+    Get the expenses submitted by the currently logged-in user, newest first.
+    Pass the X-Next-Cursor response header back as `cursor` for the next page.
+    With `expand`, each item is an ExpenseDetail. Send the ETag back as
+    If-None-Match to get a 304 while the list is unchanged.
     """
-    return crud_expense.get_expenses_by_employee(db, employee_id=current_user.id)
+    etag = await collection_versions.etag(db, collection_versions.EXPENSES, current_user.id, request.url.query)
+    cached = responses.cached_page(request, etag)
+    if cached:
+        return cached
+    expenses, next_cursor = await crud_expense.get_expenses_by_employee(
+        db, employee_id=current_user.id, filters=filters, page=page, expand=expand
+    )
+    if expand:
+        return responses.expense_detail_page(expenses, next_cursor, etag)
+    return responses.expense_page(expenses, next_cursor, etag)
+
+@router.get("/{expense_id}", response_model=schemas.ExpenseDetail)
+async def read_expense(
+    expense_id: uuid.UUID,
+    db: AsyncSession = Depends(dependencies.get_read_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
+):
+    """
+    Get one expense with its employee, workflow, receipts and approval
+    history.
+    """
+    expense = await crud_expense.get_expense_detail(db, expense_id)
+    if not expense or not await receipts.can_view(db, current_user, expense):
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return expense
 
 @router.post("/", response_model=schemas.Expense, status_code=201)
-def create_new_expense(
+async def create_new_expense(
     expense: schemas.ExpenseCreate,
-    db: Session = Depends(session.get_db),
-    current_user: models.User = Depends(dependencies.get_current_user)
+    draft: bool = Query(False, description="Save as a draft (e.g. to fill it in from a receipt) instead of submitting"),
+    db: AsyncSession = Depends(session.get_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
+):
+    """
+    Submit a new expense, or save it as a draft.
+    """
+    try:
+        return await crud_expense.create_expense(db=db, expense=expense, employee_id=current_user.id, draft=draft)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/{expense_id}/submit", response_model=schemas.Expense)
+async def submit_draft_expense(
+    expense_id: uuid.UUID,
+    db: AsyncSession = Depends(session.get_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
+):
+    """
+    Send one of your draft expenses into its approval workflow.
+    """
+    expense = await crud_expense.submit_draft(db, expense_id=expense_id, employee_id=current_user.id)
+    if not expense:
+        raise HTTPException(status_code=404, detail="Draft expense not found")
+    return expense
+
+@router.post("/import", response_model=schemas.ExpenseImportReport)
+async def import_expenses(
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON (one object per line)"),
+    format: Optional[str] = Query(None, description="csv or ndjson; detected from the file name if omitted"),
+    workflow_id: Optional[uuid.UUID] = Query(None, description="Workflow for rows that do not set workflow_id"),
+    db: AsyncSession = Depends(session.get_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
+):
+    """
+    Bulk-import expenses (e.g. a corporate card feed) for the current user.
+    Rows are parsed as a stream and inserted in batches; invalid rows are
+    skipped and listed in the report.
+    """
+    fmt = format or expense_import.detect_format(file.filename, file.content_type)
+    if fmt not in expense_import.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}'")
+    return await expense_import.import_expenses(
+        db, file.file, fmt, employee=current_user, default_workflow_id=workflow_id
+    )
+
+@router.post(
+    "/{expense_id}/receipts",
+    response_model=schemas.Receipt,
+    status_code=201,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"multipart/form-data": {"schema": {
+                "type": "object",
+                "properties": {"file": {"type": "string", "format": "binary"}},
+                "required": ["file"],
+            }}},
+        }
+    },
+)
+async def upload_receipt(
+    expense_id: uuid.UUID,
+    request: Request,
+    db: AsyncSession = Depends(session.get_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
+):
+    """
+    Attach a receipt (photo or PDF) to one of your expenses, sent as the
+    `file` field of a multipart form. The body is streamed to the blob
+    store as it arrives, so memory use does not depend on the file size.
+    """
+    expense = await db.get(models.Expense, expense_id)
+    if not expense or expense.employee_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    try:
+        return await receipts.store_receipt(db, expense_id, request)
+    except receipts.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.get("/{expense_id}/receipts/{receipt_id}")
+async def download_receipt(
+    expense_id: uuid.UUID,
+    receipt_id: uuid.UUID,
+    db: AsyncSession = Depends(session.get_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
+):
+    """
+    Download a receipt. Served straight from the blob store with Range
+    support; blobs never change, so clients may cache them indefinitely.
+    """
+    expense = await db.get(models.Expense, expense_id)
+    receipt = await receipts.get_receipt(db, expense_id, receipt_id) if expense else None
+    if not receipt or not await receipts.can_view(db, current_user, expense):
+        raise HTTPException(status_code=404, detail="Receipt not found")
+    if not receipt.sha256:
+        # Receipts recorded before the blob store only have an external URL
+        return RedirectResponse(receipt.file_url)
+    path = blob_store.blob_path(receipt.sha256)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Receipt file is missing from the store")
+    return FileResponse(
+        path,
+        media_type=receipt.content_type,
+        filename=receipt.filename or receipt.sha256,
+        headers={"Cache-Control": "private, max-age=31536000, immutable"},
+    )
+
+@router.get("/{expense_id}/receipts/{receipt_id}/job", response_model=schemas.ReceiptJob)
+async def get_receipt_job(
+    expense_id: uuid.UUID,
+    receipt_id: uuid.UUID,
+    db: AsyncSession = Depends(session.get_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
 ):
     """
-    Submit a new expense.
+    Processing status of a receipt (queued, running, succeeded or failed),
+    with the extracted fields once it has succeeded. Poll this after an
+    upload; fields are copied onto the expense only while it is a draft.
     """
-    return crud_expense.create_expense(db=db, expense=expense, employee_id=current_user.id)
\ No newline at end of file
+    expense = await db.get(models.Expense, expense_id)
+    receipt = await receipts.get_receipt(db, expense_id, receipt_id) if expense else None
+    if not receipt or not await receipts.can_view(db, current_user, expense):
+        raise HTTPException(status_code=404, detail="Receipt not found")
+    job = await receipt_jobs.get_latest_job(db, receipt_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Receipt has no processing job")
+    return job
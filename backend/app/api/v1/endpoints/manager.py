@@ -1,58 +1,122 @@
 # File: backend/app/api/v1/endpoints/manager.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 import uuid
 
 from app.db import session, base as models
-from app.api.v1 import dependencies
-from app.crud import crud_expense
+from app.api.v1 import dependencies, responses
+from app.core.config import BULK_APPROVAL_MAX_ITEMS
+from app.core.principal_cache import Principal
+from app.crud import crud_expense, crud_user
+from app.services import collection_versions, workflow
 from app.api.v1.schemas import schemas
 
 router = APIRouter()
 
 @router.get("/approvals", response_model=List[schemas.Expense])
-def get_pending_approvals(
-    db: Session = Depends(session.get_db),
-    current_user: models.User = Depends(dependencies.get_current_user)
+async def get_pending_approvals(
+    request: Request,
+    expand: bool = Query(False, description="Include employee, workflow, receipts and approval history"),
+    filters: schemas.ExpenseFilters = Depends(dependencies.get_expense_filters),
+    page: schemas.PageParams = Depends(dependencies.get_page_params),
+    db: AsyncSession = Depends(dependencies.get_read_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
 ):
     """
-    Get all expenses waiting for the current manager's approval.
+    Get a page of expenses waiting for the current user's approval at their
+    current workflow step. With `expand`, each item is an ExpenseDetail.
+    Unchanged queues answer If-None-Match with 304.
     """
-    return crud_expense.get_expenses_for_manager_approval(db, manager_id=current_user.id)
+    etag = await collection_versions.etag(db, collection_versions.APPROVALS, current_user.id, request.url.query)
+    cached = responses.cached_page(request, etag)
+    if cached:
+        return cached
+    expenses, next_cursor = await crud_expense.get_expenses_for_manager_approval(
+        db, manager_id=current_user.id, filters=filters, page=page, expand=expand
+    )
+    if expand:
+        return responses.expense_detail_page(expenses, next_cursor, etag)
+    return responses.expense_page(expenses, next_cursor, etag)
 
-# Note: The logic for multi-step approvals would be more complex.
-# This is a simplified version for the direct manager.
 @router.post("/approvals/{expense_id}/status")
-def update_approval_status(
+async def update_approval_status(
     expense_id: uuid.UUID,
-    # Here you would have a schema for status updates, e.g., with comments
-    # For now, we'll use a simple query parameter.
     approved: bool,
-    db: Session = Depends(session.get_db),
-    current_user: models.User = Depends(dependencies.get_current_user)
+    comments: Optional[str] = None,
+    db: AsyncSession = Depends(session.get_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
 ):
     """
-    Approve or reject an expense.
+    Approve or reject an expense waiting in the current user's queue. The
+    workflow engine decides whether this finishes the expense or moves it
+    on to the next step.
     """
-    # A more robust check would ensure this manager is in the correct step
-    # of the approval workflow for this specific expense.
-    new_status = models.ExpenseStatus.approved if approved else models.ExpenseStatus.rejected
-    updated_expense = crud_expense.update_expense_status(db, expense_id=expense_id, status=new_status)
-    if not updated_expense:
-        raise HTTPException(status_code=404, detail="Expense not found")
-    
-    return {"message": f"Expense status updated to {new_status.value}"}
+    decision = schemas.ApprovalDecision(expense_id=expense_id, approved=approved, comments=comments)
+    [result] = await workflow.apply_decisions(db, approver_id=current_user.id, decisions=[decision])
+    if result.status == "skipped":
+        raise HTTPException(status_code=404, detail="Expense not found in your approval queue")
+
+    return {"message": f"Expense status is now {result.status}"}
+
+@router.post("/approvals/bulk", response_model=List[schemas.BulkApprovalResult])
+async def bulk_update_approval_status(
+    request_data: schemas.BulkApprovalRequest,
+    db: AsyncSession = Depends(session.get_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
+):
+    """
+    Approve or reject many expenses from the current manager's queue in one
+    transaction. Returns a result for every submitted decision.
+    """
+    if len(request_data.decisions) > BULK_APPROVAL_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_APPROVAL_MAX_ITEMS} decisions per request",
+        )
+    return await workflow.apply_decisions(
+        db, approver_id=current_user.id, decisions=request_data.decisions
+    )
 
 
 @router.get("/team-expenses", response_model=List[schemas.Expense])
-def get_all_team_expenses(
-    db: Session = Depends(session.get_db),
-    current_user: models.User = Depends(dependencies.get_current_user)
+async def get_all_team_expenses(
+    request: Request,
+    max_depth: Optional[int] = Query(None, ge=1, description="Levels below you to include (1 = direct reports only)"),
+    expand: bool = Query(False, description="Include employee, workflow, receipts and approval history"),
+    filters: schemas.ExpenseFilters = Depends(dependencies.get_expense_filters),
+    page: schemas.PageParams = Depends(dependencies.get_page_params),
+    db: AsyncSession = Depends(dependencies.get_read_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
+):
+    """
+    Get a page of the expenses submitted by everyone in the current
+    manager's organisation (direct and indirect reports). With `expand`,
+    each item is an ExpenseDetail. Unchanged lists answer If-None-Match
+    with 304.
+    """
+    etag = await collection_versions.etag(
+        db, collection_versions.TEAM, current_user.id, request.url.query, max_depth=max_depth
+    )
+    cached = responses.cached_page(request, etag)
+    if cached:
+        return cached
+    expenses, next_cursor = await crud_expense.get_expenses_by_subordinates(
+        db, manager_id=current_user.id, filters=filters, page=page, max_depth=max_depth, expand=expand
+    )
+    if expand:
+        return responses.expense_detail_page(expenses, next_cursor, etag)
+    return responses.expense_page(expenses, next_cursor, etag)
+
+@router.get("/team/headcount", response_model=schemas.TeamHeadcount)
+async def get_team_headcount(
+    max_depth: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(dependencies.get_read_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
 ):
     """
-    Get a list of all expenses submitted by the employees
-    who report to the current manager.
+    Count the people in the current manager's organisation, per level.
     """
-    return crud_expense.get_expenses_by_subordinates(db, manager_id=current_user.id)
\ No newline at end of file
+    by_depth = await crud_user.get_team_headcount(db, manager_id=current_user.id, max_depth=max_depth)
+    return {"total": sum(by_depth.values()), "by_depth": by_depth}
\ No newline at end of file
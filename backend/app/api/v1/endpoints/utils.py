@@ -1,7 +1,15 @@
 import httpx
-from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Header, Response
 from pydantic import BaseModel
-from typing import List, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Optional
+
+from app.api.v1 import dependencies
+from app.api.v1.schemas import schemas
+from app.core.config import COUNTRY_CATALOGUE_MAX_AGE_SECONDS, EXCHANGE_RATE_BATCH_MAX_ITEMS
+from app.core.principal_cache import Principal
+from app.db import session
+from app.services import exchange_rates, countries, rate_history
 
 # Pydantic Schemas (Data Validation Models)
 class CountryInfo(BaseModel):
@@ -15,43 +23,23 @@ class CountryInfo(BaseModel):
 # All endpoints in this file will be prefixed with /api/v1/utils
 router = APIRouter(prefix="/api/v1/utils")
 
-# API Constants from the problem statement
-COUNTRIES_API_URL = "https://restcountries.com/v3.1/all?fields=name,currencies"
-EXCHANGE_RATE_API_URL = "https://api.exchangerate-api.com/v4/latest/"
-
 
 # API Endpoints
 @router.get("/countries", response_model=List[CountryInfo])
-async def get_countries_and_currencies():
+async def get_countries_and_currencies(if_none_match: Optional[str] = Header(None)):
     """
     Returns a sorted list of all countries with their primary currency code.
-    This is the most efficient way to populate the signup dropdown menu.
+    The list is prebuilt and kept in memory (see services/countries), so
+    this only sends bytes; a matching If-None-Match gets a bare 304.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(COUNTRIES_API_URL)
-            response.raise_for_status()  # Raises an exception for 4xx/5xx responses
-            data = response.json()
-            
-            countries_info = []
-            for country in data:
-                # Ensure the currencies field exists and is not empty before processing
-                if "currencies" in country and country["currencies"]:
-                    # Get the first currency code from the currencies object (e.g., "USD")
-                    currency_code = next(iter(country["currencies"]))
-                    countries_info.append({
-                        "name": country["name"]["common"],
-                        "currency_code": currency_code
-                    })
-            
-            # Sort the final list alphabetically by country name
-            countries_info.sort(key=lambda x: x['name'])
-            return countries_info
-            
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(status_code=e.response.status_code, detail="Error fetching data from RestCountries API.")
-        except httpx.RequestError:
-            raise HTTPException(status_code=503, detail="Service unavailable: Could not connect to RestCountries API.")
+    catalogue = countries.get_catalogue()
+    headers = {
+        "ETag": catalogue.etag,
+        "Cache-Control": f"public, max-age={COUNTRY_CATALOGUE_MAX_AGE_SECONDS}",
+    }
+    if if_none_match and (if_none_match.strip() == "*" or catalogue.etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=catalogue.body, media_type="application/json", headers=headers)
 
 @router.get("/convert-currency", response_model=Dict)
 async def convert_currency(
@@ -60,31 +48,58 @@ async def convert_currency(
     target_currency: str = Query(..., description="The currency to convert to (e.g., INR)")
 ):
     """
-    Converts an amount from a base currency to a target currency using real-time exchange rates.
+    Converts an amount from a base currency to a target currency.
+    Rates come from the exchange-rate service, which caches them in memory
+    and falls back to the last snapshot if the upstream is unavailable.
+    """
+    try:
+        conversion_rate = await exchange_rates.get_rate(base_currency, target_currency)
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=e.response.status_code, detail="Error fetching data from ExchangeRate API.")
+    except httpx.RequestError:
+        raise HTTPException(status_code=503, detail="Service unavailable: Could not connect to ExchangeRate API.")
+
+    if conversion_rate is None:
+        raise HTTPException(status_code=404, detail=f"Target currency '{target_currency}' not found for base '{base_currency}'.")
+
+    converted_amount = amount * conversion_rate
+
+    return {
+        "original_amount": amount,
+        "base_currency": base_currency.upper(),
+        "target_currency": target_currency.upper(),
+        "conversion_rate": conversion_rate,
+        "converted_amount": round(converted_amount, 2)
+    }
+
+@router.post("/convert-currency/batch", response_model=schemas.BatchConversionResponse)
+async def convert_currency_batch(
+    batch: schemas.BatchConversionRequest,
+    db: AsyncSession = Depends(session.get_db),
+    current_user: Principal = Depends(dependencies.get_current_user)
+):
+    """
+    Converts many amounts into one target currency, each at the rate of its
+    own date (e.g. expense dates for reimbursement), from the local rate
+    history. Items without a known rate come back with `converted` null
+    and are counted in `missing`.
     """
-    url = f"{EXCHANGE_RATE_API_URL}{base_currency.upper()}"
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url)
-            response.raise_for_status()
-            
-            data = response.json()
-            rates = data.get("rates")
-            
-            if not rates or target_currency.upper() not in rates:
-                raise HTTPException(status_code=404, detail=f"Target currency '{target_currency}' not found for base '{base_currency}'.")
-            
-            conversion_rate = rates[target_currency.upper()]
-            converted_amount = amount * conversion_rate
-            
-            return {
-                "original_amount": amount,
-                "base_currency": base_currency.upper(),
-                "target_currency": target_currency.upper(),
-                "conversion_rate": conversion_rate,
-                "converted_amount": round(converted_amount, 2)
-            }
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(status_code=e.response.status_code, detail="Error fetching data from ExchangeRate API.")
-        except httpx.RequestError:
-            raise HTTPException(status_code=503, detail="Service unavailable: Could not connect to ExchangeRate API.")
+    if len(batch.items) > EXCHANGE_RATE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {EXCHANGE_RATE_BATCH_MAX_ITEMS} items per request")
+    conversions = await rate_history.convert_many(
+        db, [(item.amount, item.currency, item.expense_date) for item in batch.items], batch.target_currency
+    )
+    items = [
+        schemas.ConvertedItem(
+            **item.dict(),
+            converted=conversion.amount if conversion else None,
+            rate=conversion.rate if conversion else None,
+            rate_date=conversion.rate_date if conversion else None,
+        )
+        for item, conversion in zip(batch.items, conversions)
+    ]
+    return schemas.BatchConversionResponse(
+        target_currency=batch.target_currency.upper(),
+        items=items,
+        missing=sum(1 for conversion in conversions if conversion is None),
+    )
@@ -0,0 +1,72 @@
+# File: backend/app/api/v1/responses.py
+
+import time
+from typing import List, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.api.v1.schemas import schemas
+from app.core.config import COLLECTION_BODY_CACHE_SIZE, COLLECTION_BODY_CACHE_TTL_SECONDS
+from app.core.encoding import LeanJSONResponse
+from app.core.principal_cache import ExpiringLRUCache
+from app.crud.crud_expense import EXPENSE_LIST_FIELDS
+from app.db import base as models
+
+# Serialized list pages by ETag; the ETag changes whenever the page could.
+_bodies = ExpiringLRUCache(COLLECTION_BODY_CACHE_SIZE)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _validator_headers(etag: str) -> dict:
+    # Browsers keep the page but revalidate it on every use.
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def cached_page(request: Request, etag: str) -> Optional[Response]:
+    """
+    304 when the client already has this page, or the page from the body
+    cache; None when the list has to be queried.
+    """
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=_validator_headers(etag))
+    cached = _bodies.get(etag)
+    if cached is None:
+        return None
+    body, next_cursor = cached
+    response = Response(body, media_type="application/json", headers=_validator_headers(etag))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+def _page(content: list, next_cursor: Optional[str], etag: Optional[str]) -> LeanJSONResponse:
+    response = LeanJSONResponse(content)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if etag:
+        response.headers.update(_validator_headers(etag))
+        _bodies.put(etag, (response.body, next_cursor), time.time() + COLLECTION_BODY_CACHE_TTL_SECONDS)
+    return response
+
+
+def expense_page(rows: List[tuple], next_cursor: Optional[str], etag: Optional[str] = None) -> LeanJSONResponse:
+    """
+    Renders a page of crud_expense list rows (EXPENSE_LIST_COLUMNS tuples)
+    as a list of schemas.Expense objects, without per-row validation.
+    """
+    return _page([dict(zip(EXPENSE_LIST_FIELDS, row)) for row in rows], next_cursor, etag)
+
+
+def expense_detail_page(expenses: List[models.Expense], next_cursor: Optional[str], etag: Optional[str] = None) -> LeanJSONResponse:
+    """
+    Renders a page of expanded expenses (loaded with
+    crud_expense.EXPENSE_DETAIL_OPTIONS) as schemas.ExpenseDetail objects.
+    """
+    return _page([schemas.ExpenseDetail.from_orm(expense).dict() for expense in expenses], next_cursor, etag)
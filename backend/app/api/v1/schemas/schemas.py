@@ -1,10 +1,12 @@
 # File: backend/app/api/v1/schemas/schemas.py
 
 import uuid
-from pydantic import BaseModel, EmailStr
-from datetime import date
+from pydantic import BaseModel, EmailStr, condecimal, constr, validator
+from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+from app.db.base import ExpenseStatus
 
 # --- Company Schemas ---
 class CompanyBase(BaseModel):
@@ -29,6 +31,20 @@ class UserCreate(UserBase):
     company_id: uuid.UUID
     manager_id: Optional[uuid.UUID] = None
 
+class UserUpdate(BaseModel):
+    email: Optional[EmailStr] = None  # may be left out, but not cleared
+    manager_id: Optional[uuid.UUID] = None
+
+    @validator("email")
+    def email_not_null(cls, value):
+        if value is None:
+            raise ValueError("email cannot be null")
+        return value
+
+class TeamHeadcount(BaseModel):
+    total: int
+    by_depth: Dict[int, int]  # 1 = direct reports
+
 class User(UserBase):
     id: uuid.UUID
     company_id: uuid.UUID
@@ -37,15 +53,49 @@ class User(UserBase):
     class Config:
         orm_mode = True
 
+class UserImportRow(BaseModel):
+    """
+    One row of a bulk user import. The manager is an existing user
+    (manager_id or manager_email) or another row of the same import
+    (manager_email).
+    """
+    email: EmailStr
+    password: str
+    manager_id: Optional[uuid.UUID] = None
+    manager_email: Optional[EmailStr] = None
+
+class UserImportResult(BaseModel):
+    row: int
+    id: uuid.UUID
+    email: str
+
+class UserImportError(BaseModel):
+    row: int  # 1-based data row (CSV header and blank lines excluded)
+    error: str
+
+class UserImportReport(BaseModel):
+    created: int
+    failed: int
+    users: List[UserImportResult]
+    errors: List[UserImportError]
+    errors_truncated: bool = False
+
 # --- Expense Schemas ---
 class ExpenseBase(BaseModel):
     description: str
     amount: Decimal
     currency: str
     category: Optional[str] = None
+    merchant: Optional[str] = None
     expense_date: date
 
 class ExpenseCreate(ExpenseBase):
+    # Limits of the expenses columns, so a bad row fails validation (and is
+    # reported on its own by the importer) instead of the whole INSERT
+    amount: condecimal(ge=Decimal("-99999999.99"), le=Decimal("99999999.99"))
+    currency: constr(min_length=3, max_length=3)
+    category: Optional[constr(max_length=100)] = None
+    merchant: Optional[constr(max_length=255)] = None
     workflow_id: uuid.UUID # Must be assigned on creation
 
 class Expense(ExpenseBase):
@@ -56,6 +106,178 @@ class Expense(ExpenseBase):
     class Config:
         orm_mode = True
 
+class Receipt(BaseModel):
+    id: uuid.UUID
+    expense_id: uuid.UUID
+    file_url: str
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    size_bytes: Optional[int] = None
+    sha256: Optional[str] = None
+    uploaded_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class ReceiptJob(BaseModel):
+    id: uuid.UUID
+    receipt_id: uuid.UUID
+    status: str
+    attempts: int
+    max_attempts: int
+    run_after: Optional[datetime] = None
+    last_error: Optional[str] = None
+    result: Optional[Dict] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class UserSummary(BaseModel):
+    id: uuid.UUID
+    email: str
+
+    class Config:
+        orm_mode = True
+
+class WorkflowSummary(BaseModel):
+    id: uuid.UUID
+    name: str
+
+    class Config:
+        orm_mode = True
+
+class ExpenseApproval(BaseModel):
+    approver: UserSummary
+    status: str
+    comments: Optional[str] = None
+    step: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class ExpenseDetail(Expense):
+    """
+    An expense with its related objects, as loaded by
+    crud_expense.EXPENSE_DETAIL_OPTIONS.
+    """
+    approval_step: Optional[int] = None
+    created_at: Optional[datetime] = None
+    employee: UserSummary
+    workflow: WorkflowSummary
+    receipts: List[Receipt]
+    approvals: List[ExpenseApproval]
+
+class ExpenseFilters(BaseModel):
+    status: Optional[ExpenseStatus] = None
+    category: Optional[str] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    min_amount: Optional[Decimal] = None
+    max_amount: Optional[Decimal] = None
+
+class PageParams(BaseModel):
+    limit: int
+    # Decoded keyset position (created_at, id) of the last row already seen
+    after: Optional[Tuple[datetime, uuid.UUID]] = None
+
+class ExpenseImportError(BaseModel):
+    row: int  # 1-based data row (CSV header and blank lines excluded)
+    error: str
+
+class ExpenseImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ExpenseImportError]
+    errors_truncated: bool = False
+
+
+# --- Approval Schemas ---
+class ApprovalDecision(BaseModel):
+    expense_id: uuid.UUID
+    approved: bool
+    comments: Optional[str] = None
+
+class BulkApprovalRequest(BaseModel):
+    decisions: List[ApprovalDecision]
+
+class BulkApprovalResult(BaseModel):
+    expense_id: uuid.UUID
+    # New expense status, or "skipped" when the item was not applied
+    status: str
+    detail: Optional[str] = None
+
+
+# --- Analytics Schemas ---
+class AnalyticsRow(BaseModel):
+    employee_id: Optional[uuid.UUID] = None
+    category: Optional[str] = None
+    month: Optional[date] = None
+    status: ExpenseStatus
+    expense_count: int
+    total: Decimal
+
+class AnalyticsReport(BaseModel):
+    base_currency: str
+    group_by: List[str]
+    rows: List[AnalyticsRow]
+    # Currencies without an exchange rate; their amounts are not in the totals
+    missing_rates: List[str] = []
+
+
+# --- Exchange Rate Schemas ---
+class RateImportError(BaseModel):
+    row: int  # CSV data row, or index of the rate table in a JSON file
+    error: str
+
+class RateImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: List[RateImportError]
+    errors_truncated: bool = False
+
+class ConversionItem(BaseModel):
+    amount: Decimal
+    currency: str
+    expense_date: date
+
+class BatchConversionRequest(BaseModel):
+    target_currency: str
+    items: List[ConversionItem]
+
+class ConvertedItem(ConversionItem):
+    # None when there is no rate within EXCHANGE_RATE_MAX_AGE_DAYS of the date
+    converted: Optional[Decimal] = None
+    rate: Optional[Decimal] = None
+    rate_date: Optional[date] = None
+
+class BatchConversionResponse(BaseModel):
+    target_currency: str
+    items: List[ConvertedItem]
+    missing: int
+
+
+# --- Database Schemas ---
+class PoolStatus(BaseModel):
+    size: int
+    max_overflow: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_avg_ms: float
+    wait_max_ms: float
+
+class ReplicaStatus(BaseModel):
+    name: str
+    healthy: bool
+    lag_seconds: Optional[float] = None
+    error: Optional[str] = None
+    checked_at: Optional[datetime] = None
+
 
 # --- Token / Auth Schemas ---
 class TokenRequest(BaseModel):
@@ -1,6 +1,7 @@
 # File: backend/app/core/config.py
 
 import os
+import re
 from dotenv import load_dotenv
 
 # Load environment variables from the .env file in the project root
@@ -8,9 +9,160 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# --- Connection pool (per engine, per worker process) ---
+# Size these so workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below Postgres max_connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds to wait for a free connection before raising
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle connections older than this many seconds (-1 disables)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Server-side statement_timeout in milliseconds (0 disables)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+# --- Read replicas ---
+# Comma-separated replica URLs (same form as DATABASE_URL). Read-only
+# endpoints spread their queries over the healthy ones; empty = primary only.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# How often each replica is probed, and how long a probe may take
+REPLICA_HEALTH_CHECK_SECONDS = float(os.getenv("REPLICA_HEALTH_CHECK_SECONDS", "5"))
+REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS", "2"))
+# Replicas replaying further behind than this get no reads until they catch up
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+# After a user's request commits, their reads go to the primary this long
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+READ_YOUR_WRITES_COOKIE = os.getenv("READ_YOUR_WRITES_COOKIE", "read_primary_until")
+
 SECRET_KEY = "your-super-secret-key"  # CHANGE THIS
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# --- Password hashing ---
+# "thread" (bcrypt releases the GIL) or "process" for a dedicated process pool
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+# Max concurrent hash/verify operations per worker process
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+# Separate process pool for bulk user imports, so logins are not queued behind them
+BULK_HASH_WORKERS = int(os.getenv("BULK_HASH_WORKERS", str(os.cpu_count() or 2)))
+
+# --- Authentication caches ---
+# Max number of users whose snapshot is kept in memory per process
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+# Upper bound on how long a snapshot is trusted (it also never outlives the token)
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300"))
+# Max number of already-verified tokens remembered per process
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "20000"))
+
+# --- Request metrics ---
+# Log requests slower than this (ms) with the SQL they ran; 0 disables
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "0"))
+# Statements kept per request for the slow-request log
+SLOW_REQUEST_MAX_STATEMENTS = int(os.getenv("SLOW_REQUEST_MAX_STATEMENTS", "50"))
+
+# --- Pagination ---
+EXPENSE_PAGE_SIZE_DEFAULT = int(os.getenv("EXPENSE_PAGE_SIZE_DEFAULT", "50"))
+EXPENSE_PAGE_SIZE_MAX = int(os.getenv("EXPENSE_PAGE_SIZE_MAX", "200"))
+
+# --- Bulk operations ---
+BULK_APPROVAL_MAX_ITEMS = int(os.getenv("BULK_APPROVAL_MAX_ITEMS", "500"))
+# Rows validated and inserted per transaction by the expense importer
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+# Row errors reported back in full; further errors are only counted
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+# Rows per bulk user import (all inserted in one transaction)
+USER_IMPORT_MAX_ROWS = int(os.getenv("USER_IMPORT_MAX_ROWS", "10000"))
+
+# --- Approval workflows ---
+# Compiled workflow plans kept per process, and how long one is trusted
+# before it is re-read (workflows are edited outside the API)
+WORKFLOW_PLAN_CACHE_SIZE = int(os.getenv("WORKFLOW_PLAN_CACHE_SIZE", "1000"))
+WORKFLOW_PLAN_CACHE_TTL_SECONDS = int(os.getenv("WORKFLOW_PLAN_CACHE_TTL_SECONDS", "60"))
+
+# --- Conditional GET on expense lists ---
+# Serialized list pages kept per process, keyed by ETag (0 disables)
+COLLECTION_BODY_CACHE_SIZE = int(os.getenv("COLLECTION_BODY_CACHE_SIZE", "512"))
+COLLECTION_BODY_CACHE_TTL_SECONDS = int(os.getenv("COLLECTION_BODY_CACHE_TTL_SECONDS", "300"))
+
+# --- Exports ---
+# Rows fetched per round trip from the server-side cursor while streaming
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+# --- Receipts ---
+# Root of the content-addressed receipt store (files named by their SHA-256)
+RECEIPT_STORE_PATH = os.getenv("RECEIPT_STORE_PATH", "data/receipts")
+RECEIPT_MAX_BYTES = int(os.getenv("RECEIPT_MAX_BYTES", str(25 * 1024 * 1024)))
+RECEIPT_CONTENT_TYPES = [
+    content_type.strip()
+    for content_type in os.getenv(
+        "RECEIPT_CONTENT_TYPES", "image/jpeg,image/png,image/heic,image/heif,image/webp,application/pdf"
+    ).split(",")
+    if content_type.strip()
+]
+
+# --- Receipt processing jobs ---
+# Worker processes started by `python -m app.services.receipt_jobs`
+RECEIPT_JOB_WORKERS = int(os.getenv("RECEIPT_JOB_WORKERS", str(os.cpu_count() or 2)))
+# Idle workers poll the queue this often
+RECEIPT_JOB_POLL_SECONDS = float(os.getenv("RECEIPT_JOB_POLL_SECONDS", "1"))
+RECEIPT_JOB_MAX_ATTEMPTS = int(os.getenv("RECEIPT_JOB_MAX_ATTEMPTS", "5"))
+# Retry n waits RECEIPT_JOB_BACKOFF_SECONDS * 2^(n-1), capped, with jitter
+RECEIPT_JOB_BACKOFF_SECONDS = float(os.getenv("RECEIPT_JOB_BACKOFF_SECONDS", "5"))
+RECEIPT_JOB_BACKOFF_MAX_SECONDS = float(os.getenv("RECEIPT_JOB_BACKOFF_MAX_SECONDS", "600"))
+# A running job whose worker has been silent this long is picked up again
+RECEIPT_JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv("RECEIPT_JOB_LOCK_TIMEOUT_SECONDS", "300"))
+# A PDF content stream that inflates past this is skipped (compression bombs)
+RECEIPT_PDF_MAX_STREAM_BYTES = int(os.getenv("RECEIPT_PDF_MAX_STREAM_BYTES", str(16 * 1024 * 1024)))
+
+# --- Push notifications (Server-Sent Events) ---
+# memory: one worker process; postgres: LISTEN/NOTIFY, any number of workers
+NOTIFICATION_BROKER = os.getenv("NOTIFICATION_BROKER", "memory")
+NOTIFICATION_CHANNEL = os.getenv("NOTIFICATION_CHANNEL", "expense_events")
+# Keep-alive comment interval on idle streams (also how fast dead clients are noticed)
+EVENT_STREAM_HEARTBEAT_SECONDS = float(os.getenv("EVENT_STREAM_HEARTBEAT_SECONDS", "15"))
+# Open streams per worker process
+EVENT_STREAM_MAX_CONNECTIONS = int(os.getenv("EVENT_STREAM_MAX_CONNECTIONS", "10000"))
+# Events buffered for a slow client before it is told to resync instead
+EVENT_STREAM_MAX_QUEUED = int(os.getenv("EVENT_STREAM_MAX_QUEUED", "100"))
+
+# --- Exchange rates ---
+EXCHANGE_RATE_API_URL = os.getenv("EXCHANGE_RATE_API_URL", "https://api.exchangerate-api.com/v4/latest/")
+# How long a fetched rate table is served from memory before it is refreshed
+EXCHANGE_RATE_TTL_SECONDS = int(os.getenv("EXCHANGE_RATE_TTL_SECONDS", "3600"))
+# Upstream timeout; on timeout/failure we fall back to the last known snapshot
+EXCHANGE_RATE_TIMEOUT_SECONDS = float(os.getenv("EXCHANGE_RATE_TIMEOUT_SECONDS", "5"))
+# Local file holding the latest rate table per base currency
+EXCHANGE_RATE_SNAPSHOT_PATH = os.getenv("EXCHANGE_RATE_SNAPSHOT_PATH", "data/exchange_rates.json")
+# Rate files (CSV or JSON) imported into the exchange_rates table, after
+# the bundled sample rates, when the importer is run without arguments
+EXCHANGE_RATE_HISTORY_DIR = os.getenv("EXCHANGE_RATE_HISTORY_DIR", "data/exchange_rates")
+# Bases whose rate tables may bridge two other currencies (EUR -> GBP via
+# USD -> EUR and USD -> GBP) when no direct rate is stored
+EXCHANGE_RATE_CROSS_BASES = [
+    base.strip().upper() for base in os.getenv("EXCHANGE_RATE_CROSS_BASES", "USD,EUR").split(",") if base.strip()
+]
+# Historical conversions use the latest rate at most this many days before
+# the expense date (covers weekends and holidays without published rates)
+EXCHANGE_RATE_MAX_AGE_DAYS = int(os.getenv("EXCHANGE_RATE_MAX_AGE_DAYS", "7"))
+# Items per batch conversion request
+EXCHANGE_RATE_BATCH_MAX_ITEMS = int(os.getenv("EXCHANGE_RATE_BATCH_MAX_ITEMS", "10000"))
+# Whether company admins may upload rate files; the table is shared by all
+# companies, so this is off unless one operator administers the deployment
+EXCHANGE_RATE_ADMIN_UPLOADS = os.getenv("EXCHANGE_RATE_ADMIN_UPLOADS", "false").lower() in ("1", "true", "yes")
+
+# --- Country / currency catalogue ---
+COUNTRIES_API_URL = os.getenv("COUNTRIES_API_URL", "https://restcountries.com/v3.1/all?fields=name,currencies")
+# Local copy of the catalogue; seeded from the bundled snapshot on first start
+COUNTRY_CATALOGUE_PATH = os.getenv("COUNTRY_CATALOGUE_PATH", "data/countries.json")
+COUNTRY_CATALOGUE_MAX_AGE_SECONDS = int(os.getenv("COUNTRY_CATALOGUE_MAX_AGE_SECONDS", "86400"))
+
 if not DATABASE_URL:
-    raise ValueError("No DATABASE_URL set for the connection")
\ No newline at end of file
+    raise ValueError("No DATABASE_URL set for the connection")
+
+# The API talks to Postgres through asyncpg; scripts keep using DATABASE_URL.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or re.sub(
+    r"^postgres(ql)?(\+\w+)?://", "postgresql+asyncpg://", DATABASE_URL
+)
+ASYNC_DATABASE_REPLICA_URLS = [
+    re.sub(r"^postgres(ql)?(\+\w+)?://", "postgresql+asyncpg://", url) for url in DATABASE_REPLICA_URLS
+]
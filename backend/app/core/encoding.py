@@ -0,0 +1,32 @@
+# File: backend/app/core/encoding.py
+
+from decimal import Decimal
+
+import orjson
+from starlette.responses import JSONResponse
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        # Same representation as the pydantic schemas: a string, exact.
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """
+    orjson encoding; UUID, date/datetime and enums are handled natively,
+    Decimal through _default.
+    """
+    return orjson.dumps(content, default=_default)
+
+
+class LeanJSONResponse(JSONResponse):
+    """
+    JSON response for content that is already plain dicts/lists. Returning
+    it from an endpoint skips FastAPI's response_model validation, so it is
+    only for data whose shape the query already guarantees.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,217 @@
+# File: backend/app/core/metrics.py
+#
+# Per-route request metrics in the Prometheus text format.
+#
+# MetricsMiddleware opens a RequestStats for every HTTP request and keeps it
+# in a context variable; the SQLAlchemy cursor hooks installed by
+# app/db/engine.py add each statement's count and duration to it. When the
+# response is finished the request is folded into per-route histograms of
+# latency and statements per request, plus DB time totals. Metrics are per
+# worker process; Prometheus scrapes and sums them by instance.
+#
+# With SLOW_REQUEST_MS set, requests slower than that are logged together
+# with the statements they ran, which makes N+1 patterns obvious.
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import SLOW_REQUEST_MAX_STATEMENTS, SLOW_REQUEST_MS
+
+logger = logging.getLogger("app.slow_requests")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+    # (seconds, SQL) of the first SLOW_REQUEST_MAX_STATEMENTS statements
+    log: List[Tuple[float, str]] = field(default_factory=list)
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def record_statement(statement: str, seconds: float):
+    """
+    Called from the engine hooks for every executed statement.
+    """
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.db_seconds += seconds
+    if SLOW_REQUEST_MS and len(stats.log) < SLOW_REQUEST_MAX_STATEMENTS:
+        stats.log.append((seconds, statement))
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.total = 0.0
+
+    def observe(self, value: float):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.db_seconds = 0.0
+        self.by_status: Dict[int, int] = {}
+
+
+_routes: Dict[Tuple[str, str], RouteMetrics] = {}
+_lock = threading.Lock()
+
+
+def observe(method: str, route: str, status: int, seconds: float, stats: RequestStats):
+    with _lock:
+        metrics = _routes.get((method, route))
+        if metrics is None:
+            metrics = _routes[(method, route)] = RouteMetrics()
+        metrics.latency.observe(seconds)
+        metrics.statements.observe(stats.statements)
+        metrics.db_seconds += stats.db_seconds
+        metrics.by_status[status] = metrics.by_status.get(status, 0) + 1
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render(pools: Optional[Dict[str, dict]] = None) -> str:
+    """
+    All metrics of this process in the Prometheus text exposition format.
+    `pools` is app.db.engine.pool_status(), exported as gauges/counters.
+    """
+    with _lock:
+        routes = [(key, metrics) for key, metrics in sorted(_routes.items())]
+        lines = [
+            "# HELP http_requests_total Requests handled, by route and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route), metrics in routes:
+            for status, count in sorted(metrics.by_status.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+        lines += [
+            "# HELP http_request_duration_seconds Request latency, by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), metrics in routes:
+            lines += metrics.latency.render("http_request_duration_seconds", f'method="{method}",route="{_escape(route)}"')
+        lines += [
+            "# HELP http_request_db_statements SQL statements executed per request, by route.",
+            "# TYPE http_request_db_statements histogram",
+        ]
+        for (method, route), metrics in routes:
+            lines += metrics.statements.render("http_request_db_statements", f'method="{method}",route="{_escape(route)}"')
+        lines += [
+            "# HELP http_request_db_seconds_total Time spent executing SQL, by route.",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for (method, route), metrics in routes:
+            lines.append(f'http_request_db_seconds_total{{method="{method}",route="{_escape(route)}"}} {metrics.db_seconds}')
+
+    if pools:
+        pool_metrics = [
+            ("db_pool_checked_out", "checked_out", "gauge", "Connections currently checked out."),
+            ("db_pool_overflow", "overflow", "gauge", "Overflow connections currently open."),
+            ("db_pool_checkouts_total", "checkouts", "counter", "Connection checkouts."),
+            ("db_pool_timeouts_total", "timeouts", "counter", "Checkouts that timed out waiting for a connection."),
+        ]
+        for name, key, kind, help_text in pool_metrics:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [f'{name}{{pool="{_escape(pool)}"}} {status[key]}' for pool, status in sorted(pools.items())]
+    return "\n".join(lines) + "\n"
+
+
+def _route_label(scope) -> str:
+    """
+    The route's path template (e.g. /api/v1/expenses/{expense_id}/submit)
+    so metrics do not get one series per id. Unmatched paths share a label.
+    """
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is not None and app is not None:
+        for candidate in getattr(app, "routes", ()):
+            if getattr(candidate, "endpoint", None) is endpoint:
+                return candidate.path
+    return "(unmatched)"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no extra task per request) that times every HTTP
+    request until its last body chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            seconds = time.perf_counter() - started
+            _current.reset(token)
+            route = _route_label(scope)
+            observe(scope["method"], route, status_code, seconds, stats)
+            if SLOW_REQUEST_MS and seconds * 1000 >= SLOW_REQUEST_MS:
+                _log_slow(scope, route, status_code, seconds, stats)
+
+
+def _log_slow(scope, route: str, status_code: int, seconds: float, stats: RequestStats):
+    lines = [
+        f"Slow request: {scope['method']} {scope['path']} (route {route}) -> {status_code} "
+        f"in {seconds * 1000:.1f}ms, {stats.statements} statement(s), {stats.db_seconds * 1000:.1f}ms in the database"
+    ]
+    for statement_seconds, statement in stats.log:
+        lines.append(f"  [{statement_seconds * 1000:7.1f}ms] {' '.join(statement.split())}")
+    if stats.statements > len(stats.log):
+        lines.append(f"  ... {stats.statements - len(stats.log)} more statement(s)")
+    logger.warning("\n".join(lines))
@@ -0,0 +1,129 @@
+# File: backend/app/core/principal_cache.py
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional, Tuple
+
+from jose import JWTError, jwt
+
+from app.core.config import (
+    SECRET_KEY,
+    ALGORITHM,
+    PRINCIPAL_CACHE_MAX_SIZE,
+    PRINCIPAL_CACHE_TTL_SECONDS,
+    TOKEN_CACHE_MAX_SIZE,
+)
+from app.db import base as models
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Detached snapshot of the authenticated user. Holds only what the
+    endpoints need for authorization, so it can be cached across requests
+    without keeping an ORM instance (and its session) alive.
+    """
+    id: uuid.UUID
+    email: str
+    company_id: uuid.UUID
+    role: models.UserRole
+    manager_id: Optional[uuid.UUID]
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            company_id=user.company_id,
+            role=user.role,
+            manager_id=user.manager_id,
+        )
+
+
+class ExpiringLRUCache:
+    """
+    Thread-safe LRU map whose entries also carry an absolute expiry time.
+    Sync endpoints run on a threadpool, hence the lock.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value, expires_at: float):
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# token -> (subject, exp) for tokens whose signature was already verified
+_verified_tokens = ExpiringLRUCache(TOKEN_CACHE_MAX_SIZE)
+# subject (email) -> Principal
+_principals = ExpiringLRUCache(PRINCIPAL_CACHE_MAX_SIZE)
+
+
+def verify_token(token: str) -> Optional[Tuple[str, float]]:
+    """
+    Returns (subject, exp) for a valid token, or None. Tokens seen before
+    are answered from memory until they expire.
+    """
+    claims = _verified_tokens.get(token)
+    if claims is not None:
+        return claims
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    subject = payload.get("sub")
+    if subject is None:
+        return None
+    expires_at = float(payload.get("exp") or time.time() + PRINCIPAL_CACHE_TTL_SECONDS)
+    claims = (subject, expires_at)
+    _verified_tokens.put(token, claims, expires_at)
+    return claims
+
+
+def get_principal(subject: str) -> Optional[Principal]:
+    return _principals.get(subject)
+
+
+def put_principal(user: models.User, token_expires_at: float) -> Principal:
+    """
+    Caches a snapshot of the user until the token expires, capped at
+    PRINCIPAL_CACHE_TTL_SECONDS so changes made by other workers are
+    picked up eventually.
+    """
+    principal = Principal.from_user(user)
+    expires_at = min(token_expires_at, time.time() + PRINCIPAL_CACHE_TTL_SECONDS)
+    _principals.put(principal.email, principal, expires_at)
+    return principal
+
+
+def invalidate_principal(subject: str):
+    _principals.pop(subject)
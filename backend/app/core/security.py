@@ -1,10 +1,13 @@
 # File: backend/app/core/security.py
 
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from app.core.config import SECRET_KEY, ALGORITHM
+from app.core.config import SECRET_KEY, ALGORITHM, BULK_HASH_WORKERS, PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -15,6 +18,64 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+# --- Async variants ---
+# bcrypt is deliberately slow (~250ms), so async endpoints hand it to a
+# dedicated, bounded executor instead of the shared request threadpool.
+_hash_executor: Optional[Executor] = None
+
+def get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        if PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        else:
+            _hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    return _hash_executor
+
+def shutdown_hash_executor():
+    global _hash_executor, _bulk_hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False)
+        _hash_executor = None
+    if _bulk_hash_executor is not None:
+        _bulk_hash_executor.shutdown(wait=False)
+        _bulk_hash_executor = None
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hash_executor(), get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hash_executor(), verify_password, plain_password, hashed_password)
+
+# Bulk imports hash thousands of passwords at once on a process pool of
+# their own (spawned, so no event loop state is forked into it).
+_bulk_hash_executor: Optional[Executor] = None
+
+def _hash_many(passwords: List[str]) -> List[str]:
+    return [get_password_hash(password) for password in passwords]
+
+async def get_password_hashes_async(passwords: List[str]) -> List[str]:
+    """
+    Hashes many passwords in parallel, in order. Chunks keep the
+    inter-process traffic to a few messages per worker.
+    """
+    global _bulk_hash_executor
+    if not passwords:
+        return []
+    if _bulk_hash_executor is None:
+        _bulk_hash_executor = ProcessPoolExecutor(
+            max_workers=BULK_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    size = max(1, -(-len(passwords) // (BULK_HASH_WORKERS * 4)))
+    loop = asyncio.get_running_loop()
+    chunks = await asyncio.gather(*[
+        loop.run_in_executor(_bulk_hash_executor, _hash_many, passwords[start:start + size])
+        for start in range(0, len(passwords), size)
+    ])
+    return [password_hash for chunk in chunks for password_hash in chunk]
+
 # --- NEW JWT FUNCTIONS ---
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
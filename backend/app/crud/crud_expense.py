@@ -1,77 +1,313 @@
 # File: backend/app/crud/crud_expense.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+from sqlalchemy.sql import Select
+from typing import List, Optional, Tuple
 import uuid
 from app.db import base as models
 from app.api.v1.schemas import schemas
+from app.crud import crud_user
+from app.crud.pagination import encode_cursor
+from app.services import collection_versions, notifications, rollups, workflow
 
-def create_expense(db: Session, expense: schemas.ExpenseCreate, employee_id: uuid.UUID):
+# Columns of schemas.Expense. List queries select exactly these, so pages
+# come back as plain tuples in this order without building ORM objects.
+EXPENSE_LIST_COLUMNS = (
+    models.Expense.id,
+    models.Expense.employee_id,
+    models.Expense.description,
+    models.Expense.amount,
+    models.Expense.currency,
+    models.Expense.category,
+    models.Expense.merchant,
+    models.Expense.expense_date,
+    models.Expense.status,
+)
+EXPENSE_LIST_FIELDS = tuple(column.key for column in EXPENSE_LIST_COLUMNS)
+
+# Related objects of schemas.ExpenseDetail. Many-to-one relationships are
+# joined into the main query; each collection is fetched once for the
+# whole page with SELECT ... WHERE expense_id IN (...), so a page costs
+# three statements whatever its size. Any other relationship raises
+# instead of lazy loading one row at a time.
+EXPENSE_DETAIL_OPTIONS = (
+    joinedload(models.Expense.employee).load_only(models.User.id, models.User.email),
+    joinedload(models.Expense.workflow).load_only(models.ApprovalWorkflow.id, models.ApprovalWorkflow.name),
+    selectinload(models.Expense.receipts),
+    selectinload(models.Expense.approvals)
+    .joinedload(models.ExpenseApproval.approver)
+    .load_only(models.User.id, models.User.email),
+    raiseload("*"),
+)
+
+def _list_select(expand: bool) -> Select:
+    """
+    Plain list pages select EXPENSE_LIST_COLUMNS; expanded pages load
+    Expense objects with EXPENSE_DETAIL_OPTIONS.
+    """
+    if expand:
+        return select(models.Expense).options(*EXPENSE_DETAIL_OPTIONS)
+    return select(*EXPENSE_LIST_COLUMNS)
+
+async def create_expense(db: AsyncSession, expense: schemas.ExpenseCreate, employee_id: uuid.UUID, draft: bool = False):
     """
     Creates a new expense record for a given employee.
-    The initial status is 'pending_approval' as it immediately enters the workflow.
+    The initial status is 'pending_approval' as it immediately enters the
+    workflow, unless it is saved as a draft (e.g. to be filled in from a
+    receipt) and submitted later with submit_draft. Raises ValueError if
+    the workflow is not one of the employee's company.
     """
-    employee = db.query(models.User).filter(models.User.id == employee_id).first()
+    employee = await db.get(models.User, employee_id)
     if not employee:
         return None
+    if not await get_existing_workflow_ids(db, employee.company_id, {expense.workflow_id}):
+        raise ValueError(f"Unknown workflow {expense.workflow_id}")
 
     db_expense = models.Expense(
         **expense.dict(),
         employee_id=employee_id,
         company_id=employee.company_id,
-        status=models.ExpenseStatus.pending_approval
+        status=models.ExpenseStatus.draft if draft else models.ExpenseStatus.pending_approval
     )
     db.add(db_expense)
-    db.commit()
-    db.refresh(db_expense)
+    await db.flush()
+    await db.refresh(db_expense, ["created_at"])
+    await rollups.add_expenses(db, [db_expense.id])
+    if draft:
+        await collection_versions.bump_expenses(db, [employee_id])
+    else:
+        # Bumps the list versions along with the status
+        await workflow.submit(db, [workflow.SubmittedExpense(
+            db_expense.id, db_expense.employee_id, db_expense.workflow_id, db_expense.created_at, db_expense.company_id
+        )])
+    await db.commit()
+    await db.refresh(db_expense)
     return db_expense
 
-def get_expenses_by_employee(db: Session, employee_id: uuid.UUID):
+async def submit_draft(db: AsyncSession, expense_id: uuid.UUID, employee_id: uuid.UUID):
     """
-    Retrieves all expenses submitted by a specific employee.
+    Sends a draft expense into its approval workflow. Returns None if the
+    employee has no such draft.
     """
-    return db.query(models.Expense).filter(models.Expense.employee_id == employee_id).all()
+    db_expense = await db.get(models.Expense, expense_id, with_for_update=True)
+    if not db_expense or db_expense.employee_id != employee_id or db_expense.status != models.ExpenseStatus.draft:
+        await db.rollback()
+        return None
+    await rollups.change_status(db, [expense_id], models.ExpenseStatus.pending_approval)
+    db_expense.status = models.ExpenseStatus.pending_approval
+    await db.flush()
+    await workflow.submit(db, [workflow.SubmittedExpense(
+        db_expense.id, db_expense.employee_id, db_expense.workflow_id, db_expense.created_at, db_expense.company_id
+    )])
+    await db.commit()
+    await db.refresh(db_expense)
+    return db_expense
 
-def get_expenses_for_manager_approval(db: Session, manager_id: uuid.UUID):
+async def create_expenses_bulk(db: AsyncSession, expenses: List[schemas.ExpenseCreate], employee_id: uuid.UUID, company_id: uuid.UUID):
     """
-    This is a key function. It finds all expenses that are:
-    1. In 'pending_approval' status.
-    2. Submitted by employees who report directly to this manager.
+    Inserts many expenses for one employee with a single executemany INSERT,
+    submits them to their workflows and commits once. Used by the importer,
+    one call per batch.
     """
-    # Subquery to find all employees managed by this manager
-    subordinate_ids = db.query(models.User.id).filter(models.User.manager_id == manager_id)
+    if not expenses:
+        return
+    result = await db.execute(
+        insert(models.Expense).returning(
+            models.Expense.id, models.Expense.employee_id, models.Expense.workflow_id, models.Expense.created_at,
+            models.Expense.company_id,
+        ),
+        [
+            {
+                **expense.dict(),
+                "employee_id": employee_id,
+                "company_id": company_id,
+                "status": models.ExpenseStatus.pending_approval,
+            }
+            for expense in expenses
+        ],
+    )
+    submitted = [workflow.SubmittedExpense(*row) for row in result.all()]
+    await rollups.add_expenses(db, [expense.id for expense in submitted])
+    await workflow.submit(db, submitted)
+    await db.commit()
 
-    return (
-        db.query(models.Expense)
-        .filter(
-            models.Expense.employee_id.in_(subordinate_ids),
-            models.Expense.status == models.ExpenseStatus.pending_approval,
+async def get_expense_detail(db: AsyncSession, expense_id: uuid.UUID) -> Optional[models.Expense]:
+    """
+    Loads one expense with everything schemas.ExpenseDetail shows.
+    """
+    result = await db.execute(
+        select(models.Expense).options(*EXPENSE_DETAIL_OPTIONS).where(models.Expense.id == expense_id)
+    )
+    return result.scalars().first()
+
+async def get_existing_workflow_ids(db: AsyncSession, company_id: uuid.UUID, workflow_ids) -> set:
+    """
+    Returns the subset of workflow_ids that exist in the given company.
+    """
+    if not workflow_ids:
+        return set()
+    result = await db.execute(
+        select(models.ApprovalWorkflow.id).where(
+            models.ApprovalWorkflow.id.in_(list(workflow_ids)),
+            models.ApprovalWorkflow.company_id == company_id,
         )
-        .all()
     )
+    return set(result.scalars())
+
+def apply_filters(stmt: Select, filters: schemas.ExpenseFilters) -> Select:
+    """
+    Pushes the optional list filters into the WHERE clause.
+    """
+    if filters.status is not None:
+        stmt = stmt.where(models.Expense.status == filters.status)
+    if filters.category is not None:
+        stmt = stmt.where(models.Expense.category == filters.category)
+    if filters.date_from is not None:
+        stmt = stmt.where(models.Expense.expense_date >= filters.date_from)
+    if filters.date_to is not None:
+        stmt = stmt.where(models.Expense.expense_date <= filters.date_to)
+    if filters.min_amount is not None:
+        stmt = stmt.where(models.Expense.amount >= filters.min_amount)
+    if filters.max_amount is not None:
+        stmt = stmt.where(models.Expense.amount <= filters.max_amount)
+    return stmt
+
+EXPENSE_KEY = (models.Expense.created_at, models.Expense.id)
+# The approval queue orders by the inbox's copy of the key, which its index carries
+APPROVAL_QUEUE_KEY = (models.ApprovalInbox.expense_created_at, models.ApprovalInbox.expense_id)
 
-def update_expense_status(db: Session, expense_id: uuid.UUID, status: models.ExpenseStatus):
+def _page_select(stmt: Select, page: schemas.PageParams, key=EXPENSE_KEY) -> Select:
     """
-    Updates the status of an expense (e.g., to 'approved' or 'rejected').
+    The statement for one page of `stmt`: keyset condition, order, limit
+    and the key columns for the cursor.
     """
-    db_expense = db.query(models.Expense).filter(models.Expense.id == expense_id).first()
+    created_at, row_id = key
+    if page.after is not None:
+        stmt = stmt.where(tuple_(created_at, row_id) < tuple_(*page.after))
+    return (
+        stmt.add_columns(created_at.label("cursor_created_at"), row_id.label("cursor_id"))
+        .order_by(created_at.desc(), row_id.desc())
+        .limit(page.limit + 1)
+    )
+
+async def _paginate(
+    db: AsyncSession,
+    stmt: Select,
+    page: schemas.PageParams,
+    key=EXPENSE_KEY,
+) -> Tuple[List[tuple], Optional[str]]:
+    """
+    Returns one page of rows, newest first, plus the cursor for the next
+    page (None on the last page). Uses keyset pagination on (created_at, id)
+    so deep pages cost the same as the first one; `key` lets a query order
+    by equivalent columns of a joined table that carry the index. Rows are
+    the tuples selected by `stmt`; the key columns are fetched alongside
+    for the cursor and stripped again.
+    """
+    rows = (await db.execute(_page_select(stmt, page, key))).all()
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_cursor = encode_cursor(rows[-1][-2], rows[-1][-1])
+    return [tuple(row[:-2]) for row in rows], next_cursor
+
+async def _list_page(db: AsyncSession, stmt: Select, page: schemas.PageParams, expand: bool, **kwargs):
+    """
+    _paginate for the expense lists: rows are EXPENSE_LIST_COLUMNS tuples,
+    or Expense objects when `expand` is set.
+    """
+    rows, next_cursor = await _paginate(db, stmt, page, **kwargs)
+    if expand:
+        rows = [row[0] for row in rows]
+    return rows, next_cursor
+
+async def get_expenses_by_employee(
+    db: AsyncSession,
+    employee_id: uuid.UUID,
+    filters: schemas.ExpenseFilters,
+    page: schemas.PageParams,
+    expand: bool = False,
+):
+    """
+    Retrieves one page of the expenses submitted by a specific employee.
+    """
+    return await _list_page(db, _employee_select(employee_id, filters, expand), page, expand)
+
+def _employee_select(employee_id: uuid.UUID, filters: schemas.ExpenseFilters, expand: bool = False) -> Select:
+    stmt = _list_select(expand).where(models.Expense.employee_id == employee_id)
+    return apply_filters(stmt, filters)
+
+async def get_expenses_for_manager_approval(
+    db: AsyncSession,
+    manager_id: uuid.UUID,
+    filters: schemas.ExpenseFilters,
+    page: schemas.PageParams,
+    expand: bool = False,
+):
+    """
+    This is a key function. It finds all expenses currently waiting for this
+    approver at their workflow step, straight from the materialized
+    approval inbox (maintained by services/workflow.py).
+    """
+    return await _list_page(db, _approval_select(manager_id, filters, expand), page, expand, key=APPROVAL_QUEUE_KEY)
+
+def _approval_select(approver_id: uuid.UUID, filters: schemas.ExpenseFilters, expand: bool = False) -> Select:
+    stmt = (
+        _list_select(expand)
+        .join(models.ApprovalInbox, models.ApprovalInbox.expense_id == models.Expense.id)
+        .where(models.ApprovalInbox.approver_id == approver_id)
+    )
+    return apply_filters(stmt, filters)
+
+async def update_expense_status(db: AsyncSession, expense_id: uuid.UUID, status: models.ExpenseStatus):
+    """
+    Updates the status of an expense directly, outside the approval
+    workflow (e.g. an admin override). The row is locked so the rollup
+    delta is computed from the status being replaced. Final statuses take
+    the expense out of every approver's inbox.
+    """
+    db_expense = await db.get(models.Expense, expense_id, with_for_update=True)
     if db_expense:
+        await rollups.change_status(db, [expense_id], status)
         db_expense.status = status
-        db.commit()
-        db.refresh(db_expense)
+        events = []
+        if status != models.ExpenseStatus.pending_approval:
+            db_expense.approval_step = None
+            removed = await db.execute(
+                delete(models.ApprovalInbox)
+                .where(models.ApprovalInbox.expense_id == expense_id)
+                .returning(models.ApprovalInbox.approver_id)
+            )
+            approver_ids = removed.scalars().all()
+            await collection_versions.bump_approvals(db, approver_ids)
+            events += [([approver_id], notifications.queue_event(expense_id, "removed")) for approver_id in approver_ids]
+        await collection_versions.bump_expenses(db, [db_expense.employee_id])
+        events.append(([db_expense.employee_id], notifications.status_event(expense_id, status, db_expense.approval_step)))
+        await notifications.publish(db, events)
+        await db.commit()
+        await db.refresh(db_expense)
     return db_expense
 
-
-def get_expenses_by_subordinates(db: Session, manager_id: uuid.UUID):
+async def get_expenses_by_subordinates(
+    db: AsyncSession,
+    manager_id: uuid.UUID,
+    filters: schemas.ExpenseFilters,
+    page: schemas.PageParams,
+    max_depth: Optional[int] = None,
+    expand: bool = False,
+):
     """
-    Retrieves all expenses submitted by employees who report to a specific manager,
-    regardless of the expense status.
+    Retrieves all expenses submitted by employees anywhere below a specific
+    manager (or up to max_depth levels down), regardless of the expense status.
     """
-    # Find all employees managed by this manager
-    subordinate_ids = db.query(models.User.id).filter(models.User.manager_id == manager_id)
+    return await _list_page(db, _subordinate_select(manager_id, filters, max_depth, expand), page, expand)
 
-    return (
-        db.query(models.Expense)
-        .filter(models.Expense.employee_id.in_(subordinate_ids))
-        .order_by(models.Expense.created_at.desc())
-        .all()
-    )
\ No newline at end of file
+def _subordinate_select(
+    manager_id: uuid.UUID, filters: schemas.ExpenseFilters, max_depth: Optional[int] = None, expand: bool = False
+) -> Select:
+    # Everyone in the manager's subtree, from the hierarchy closure table
+    subordinate_ids = crud_user.subordinate_ids_query(manager_id, max_depth=max_depth)
+    stmt = _list_select(expand).where(models.Expense.employee_id.in_(subordinate_ids))
+    return apply_filters(stmt, filters)
\ No newline at end of file
@@ -1,18 +1,37 @@
 # File: backend/app/crud/crud_user.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from app.db import base as models
 from app.api.v1.schemas import schemas
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
+from app.core import principal_cache
+from app.services import collection_versions, workflow
 
-def get_user(db: Session, user_id: str):
-    return db.query(models.User).filter(models.User.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: str):
+    return await db.get(models.User, user_id)
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(models.User).filter(models.User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+async def _check_manager(db: AsyncSession, company_id, manager_id):
+    manager = await db.get(models.User, manager_id)
+    if manager is None or manager.company_id != company_id:
+        raise ValueError("The manager must be a user of the same company")
+
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate, password_hash: Optional[str] = None):
+    """
+    Creates a user. The password is hashed on the dedicated hashing
+    executor unless the caller already passes password_hash. Raises
+    ValueError if the manager is not a user of the same company.
+    """
+    if user.manager_id is not None:
+        await _check_manager(db, user.company_id, user.manager_id)
+    hashed_password = password_hash or await get_password_hash_async(user.password)
     db_user = models.User(
         email=user.email,
         password_hash=hashed_password,
@@ -20,6 +39,117 @@ def create_user(db: Session, user: schemas.UserCreate):
         manager_id=user.manager_id
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    await db.flush()
+    await _add_to_hierarchy(db, db_user.id, db_user.manager_id)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+async def update_user(db: AsyncSession, db_user: models.User, user_in: schemas.UserUpdate):
+    """
+    Applies the fields set on user_in and drops the user's cached
+    principal so the next request sees the change. Raises ValueError if
+    the new email belongs to another user or the manager is invalid.
+    """
+    old_email = db_user.email
+    changes = user_in.dict(exclude_unset=True)
+    if "manager_id" in changes and changes["manager_id"] != db_user.manager_id:
+        if changes["manager_id"] is not None:
+            await _check_manager(db, db_user.company_id, changes["manager_id"])
+            if await is_in_subtree(db, root_id=db_user.id, user_id=changes["manager_id"]):
+                raise ValueError("A user cannot report to themselves or to someone in their own team")
+        await _move_in_hierarchy(db, db_user.id, changes["manager_id"])
+        # Expenses waiting on the old manager move to the new one's inbox
+        await workflow.reassign_manager(db, db_user.id, db_user.manager_id, changes["manager_id"])
+    if changes:
+        # Team versions notice moves through the moved user's version, and
+        # expanded pages show the email.
+        await collection_versions.bump_expenses(db, [db_user.id])
+    for field, value in changes.items():
+        setattr(db_user, field, value)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise ValueError("A user with this email already exists")
+    await db.refresh(db_user)
+    principal_cache.invalidate_principal(old_email)
+    principal_cache.invalidate_principal(db_user.email)
+    return db_user
+
+
+# --- Manager hierarchy (closure table) ---
+
+async def _add_to_hierarchy(db: AsyncSession, user_id, manager_id):
+    """
+    Links a new user to itself and to every ancestor of its manager.
+    """
+    await db.execute(
+        text(
+            "INSERT INTO user_hierarchy (ancestor_id, descendant_id, depth)"
+            " SELECT :user_id, :user_id, 0"
+            " UNION ALL"
+            " SELECT ancestor_id, :user_id, depth + 1 FROM user_hierarchy WHERE descendant_id = :manager_id"
+        ),
+        {"user_id": user_id, "manager_id": manager_id},
+    )
+
+async def _move_in_hierarchy(db: AsyncSession, user_id, new_manager_id):
+    """
+    Re-parents the subtree rooted at user_id: drops the links from its old
+    ancestors and links every node of the subtree to the new ancestors.
+    """
+    await db.execute(
+        text(
+            "DELETE FROM user_hierarchy"
+            " WHERE descendant_id IN (SELECT descendant_id FROM user_hierarchy WHERE ancestor_id = :user_id)"
+            " AND ancestor_id IN (SELECT ancestor_id FROM user_hierarchy WHERE descendant_id = :user_id AND ancestor_id <> :user_id)"
+        ),
+        {"user_id": user_id},
+    )
+    if new_manager_id is not None:
+        await db.execute(
+            text(
+                "INSERT INTO user_hierarchy (ancestor_id, descendant_id, depth)"
+                " SELECT a.ancestor_id, d.descendant_id, a.depth + d.depth + 1"
+                " FROM user_hierarchy a JOIN user_hierarchy d ON d.ancestor_id = :user_id"
+                " WHERE a.descendant_id = :manager_id"
+            ),
+            {"user_id": user_id, "manager_id": new_manager_id},
+        )
+
+async def is_in_subtree(db: AsyncSession, root_id, user_id) -> bool:
+    result = await db.execute(
+        select(models.UserHierarchy.depth).where(
+            models.UserHierarchy.ancestor_id == root_id,
+            models.UserHierarchy.descendant_id == user_id,
+        )
+    )
+    return result.first() is not None
+
+def subordinate_ids_query(manager_id, max_depth: Optional[int] = None):
+    """
+    Subquery of everyone below manager_id, optionally limited to max_depth
+    levels (1 = direct reports). A single range scan on the closure index.
+    """
+    stmt = select(models.UserHierarchy.descendant_id).where(
+        models.UserHierarchy.ancestor_id == manager_id,
+        models.UserHierarchy.depth >= 1,
+    )
+    if max_depth is not None:
+        stmt = stmt.where(models.UserHierarchy.depth <= max_depth)
+    return stmt
+
+async def get_team_headcount(db: AsyncSession, manager_id, max_depth: Optional[int] = None):
+    """
+    Returns {depth: headcount} for the manager's subtree in one query.
+    """
+    stmt = select(models.UserHierarchy.depth, func.count()).where(
+        models.UserHierarchy.ancestor_id == manager_id,
+        models.UserHierarchy.depth >= 1,
+    )
+    if max_depth is not None:
+        stmt = stmt.where(models.UserHierarchy.depth <= max_depth)
+    result = await db.execute(stmt.group_by(models.UserHierarchy.depth).order_by(models.UserHierarchy.depth))
+    return dict(result.all())
\ No newline at end of file
@@ -3,22 +3,24 @@
 import uuid
 import enum
 from sqlalchemy import (
-    create_engine,
     Column,
     String,
     Boolean,
     Integer,
+    BigInteger,
     Text,
     ForeignKey,
     DateTime,
     Date,
     Enum,
     Numeric,
+    Index,
+    Sequence,
+    text,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
-from app.core.config import DATABASE_URL
 
 # Base class for our models
 Base = declarative_base()
@@ -38,6 +40,12 @@ class ApprovalStatus(str, enum.Enum):
     approved = "approved"
     rejected = "rejected"
 
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
 # --- Model Definitions ---
 
 class Company(Base):
@@ -61,6 +69,26 @@ class User(Base):
     company = relationship("Company")
     manager = relationship("User", remote_side=[id]) # Self-referencing relationship
 
+    __table_args__ = (
+        Index("ix_users_manager_id", "manager_id"),
+    )
+
+class UserHierarchy(Base):
+    """
+    Closure table of the manager hierarchy: one row per (ancestor,
+    descendant) pair, including each user with itself at depth 0. Kept in
+    sync by crud_user whenever a user is created or changes manager.
+    """
+    __tablename__ = "user_hierarchy"
+    ancestor_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    descendant_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_user_hierarchy_ancestor_depth", ancestor_id, depth, descendant_id),
+        Index("ix_user_hierarchy_descendant", descendant_id),
+    )
+
 class ApprovalWorkflow(Base):
     __tablename__ = "approval_workflows"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -84,6 +112,10 @@ class WorkflowStep(Base):
     workflow = relationship("ApprovalWorkflow")
     approver = relationship("User")
 
+    __table_args__ = (
+        Index("ix_workflow_steps_workflow_id", "workflow_id"),
+    )
+
 class Expense(Base):
     __tablename__ = "expenses"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -94,24 +126,80 @@ class Expense(Base):
     amount = Column(Numeric(10, 2), nullable=False)
     currency = Column(String(3), nullable=False)
     category = Column(String(100), nullable=True)
+    merchant = Column(String(255), nullable=True)
     expense_date = Column(Date, nullable=False)
     status = Column(Enum(ExpenseStatus), nullable=False, default=ExpenseStatus.draft)
+    # Index of the workflow stage currently waiting for approval (see services/workflow.py)
+    approval_step = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     employee = relationship("User")
     company = relationship("Company")
     workflow = relationship("ApprovalWorkflow")
     receipts = relationship("Receipt", back_populates="expense")
+    approvals = relationship("ExpenseApproval", back_populates="expense", order_by="ExpenseApproval.created_at")
+
+    # Indexes matching the crud_expense access paths; see app/db/migrations.py
+    __table_args__ = (
+        Index("ix_expenses_employee_created", employee_id, created_at.desc(), id.desc()),
+        Index("ix_expenses_employee_status_created", employee_id, status, created_at.desc(), id.desc()),
+        Index(
+            "ix_expenses_pending_employee_created",
+            employee_id, created_at.desc(), id.desc(),
+            postgresql_where=text("status = 'pending_approval'"),
+        ),
+    )
 
 class Receipt(Base):
     __tablename__ = "receipts"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     expense_id = Column(UUID(as_uuid=True), ForeignKey("expenses.id"), nullable=False)
     file_url = Column(String(512), nullable=False)
+    # Set for files kept in the local blob store (see services/blob_store.py)
+    sha256 = Column(String(64), nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    content_type = Column(String(255), nullable=True)
+    filename = Column(String(255), nullable=True)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     
     expense = relationship("Expense", back_populates="receipts")
 
+    __table_args__ = (
+        Index("ix_receipts_expense_id", "expense_id"),
+    )
+
+class ReceiptJob(Base):
+    """
+    Background processing of an uploaded receipt (text extraction and
+    parsing), claimed by services/receipt_jobs.py workers with
+    SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+    __tablename__ = "receipt_jobs"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    receipt_id = Column(UUID(as_uuid=True), ForeignKey("receipts.id"), nullable=False)
+    expense_id = Column(UUID(as_uuid=True), ForeignKey("expenses.id"), nullable=False)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.queued)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    # Not picked up before this time (retry backoff)
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_by = Column(String(255), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    # Extracted fields: amount, expense_date, merchant
+    result = Column(JSONB, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Queue polling only looks at runnable jobs.
+        Index(
+            "ix_receipt_jobs_runnable", run_after,
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+        Index("ix_receipt_jobs_receipt_id", receipt_id),
+    )
+
 class ExpenseApproval(Base):
     __tablename__ = "expense_approvals"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -119,15 +207,91 @@ class ExpenseApproval(Base):
     approver_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     status = Column(Enum(ApprovalStatus), nullable=False)
     comments = Column(Text, nullable=True)
+    step = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    expense = relationship("Expense")
+    expense = relationship("Expense", back_populates="approvals")
     approver = relationship("User")
 
-# --- Database Engine Setup ---
-engine = create_engine(DATABASE_URL)
+    __table_args__ = (
+        Index("ix_expense_approvals_expense_id", "expense_id"),
+    )
+
+class ApprovalInbox(Base):
+    """
+    Materialized "waiting for me" list: one row per (approver, expense) the
+    approver can currently act on. Maintained by services/workflow.py on
+    every transition.
+    """
+    __tablename__ = "approval_inbox"
+    approver_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    expense_id = Column(UUID(as_uuid=True), ForeignKey("expenses.id"), primary_key=True)
+    step = Column(Integer, nullable=False)
+    # Copy of expenses.created_at so the inbox can be paged from its own index
+    expense_created_at = Column(DateTime(timezone=True), nullable=False)
+
+    expense = relationship("Expense")
+
+    __table_args__ = (
+        Index("ix_approval_inbox_approver_created", approver_id, expense_created_at.desc(), expense_id.desc()),
+        Index("ix_approval_inbox_expense_id", expense_id),
+    )
+
+class ExpenseRollup(Base):
+    """
+    Spending totals per (company, employee, category, month, status,
+    currency), kept in the expense's own currency so they stay exact and
+    are converted to the base currency when read. Maintained incrementally
+    by services/rollups.py; rebuilt from expenses by migrations.py.
+    """
+    __tablename__ = "expense_rollups"
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), primary_key=True)
+    employee_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    # '' for expenses without a category, since key columns cannot be NULL
+    category = Column(String(100), primary_key=True)
+    # First day of the expense_date month
+    month = Column(Date, primary_key=True)
+    status = Column(Enum(ExpenseStatus), primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    total_amount = Column(Numeric(14, 2), nullable=False)
+    expense_count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_expense_rollups_company_month", company_id, month),
+    )
+
+# Values of collection_versions; one sequence, so versions only ever grow.
+collection_version_seq = Sequence("collection_version_seq", metadata=Base.metadata)
+
+class CollectionVersion(Base):
+    """
+    Versions of the expense lists a user sees, used as ETags by the list
+    endpoints (see services/collection_versions.py). Bumped in the same
+    transaction as the change; no row means version 0.
+    """
+    __tablename__ = "collection_versions"
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    # The user's own expenses (and what expanded pages show with them)
+    expenses = Column(BigInteger, nullable=False, server_default=text("0"))
+    # The user's approval inbox
+    approvals = Column(BigInteger, nullable=False, server_default=text("0"))
+
+class ExchangeRate(Base):
+    """
+    Daily exchange rates: on `date`, 1 `base` = `rate` units of `quote`.
+    Filled by services/rate_history.py from rate files; used to convert
+    amounts at the rate of the expense date.
+    """
+    __tablename__ = "exchange_rates"
+    base = Column(String(3), primary_key=True)
+    quote = Column(String(3), primary_key=True)
+    date = Column(Date, primary_key=True)
+    rate = Column(Numeric(24, 12), nullable=False)
 
 def init_db():
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created.")
\ No newline at end of file
+    from app.db import migrations
+    from app.db.session import engine
+
+    print("Applying database migrations...")
+    applied = migrations.upgrade(engine)
+    print(f"Database is up to date ({len(applied)} migration(s) applied).")
\ No newline at end of file
@@ -0,0 +1,159 @@
+# File: backend/app/db/engine.py
+
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import (
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+)
+from app.core import metrics
+
+
+class PoolStats:
+    """
+    Cumulative checkout counters for one pool. The live numbers
+    (checked out, overflow, ...) are read from the pool itself.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+
+class _InstrumentedPoolMixin:
+    """
+    Times every checkout (queue wait plus connect, if a new connection is
+    needed) and counts checkout timeouts.
+    """
+    stats: PoolStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        finally:
+            self.stats.record_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep counting into the same stats.
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics.record_statement(statement, time.perf_counter() - context._metrics_started)
+
+
+def _instrument_statements(engine: Engine):
+    """
+    Reports every statement and its duration to the request metrics.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# Engine name -> engine, for the pool status endpoint
+_engines: Dict[str, object] = {}
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def create_db_engine(url: str, name: str) -> Engine:
+    """
+    Creates a sync (psycopg2) engine with the configured pool settings.
+    """
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    engine = create_engine(url, poolclass=InstrumentedQueuePool, connect_args=connect_args, **_pool_options())
+    engine.pool.stats = PoolStats(name)
+    _instrument_statements(engine)
+    _engines[name] = engine
+    return engine
+
+
+def create_async_db_engine(url: str, name: str) -> AsyncEngine:
+    """
+    Creates an async (asyncpg) engine with the configured pool settings.
+    """
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    engine = create_async_engine(
+        url, poolclass=InstrumentedAsyncAdaptedQueuePool, connect_args=connect_args, **_pool_options()
+    )
+    engine.pool.stats = PoolStats(name)
+    _instrument_statements(engine.sync_engine)
+    _engines[name] = engine
+    return engine
+
+
+def pool_status() -> Dict[str, dict]:
+    """
+    Live and cumulative statistics for every pool created in this process.
+    """
+    status = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        stats = pool.stats
+        status[name] = {
+            "size": pool.size(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "wait_avg_ms": round(stats.wait_total / stats.checkouts * 1000, 3) if stats.checkouts else 0.0,
+            "wait_max_ms": round(stats.wait_max * 1000, 3),
+        }
+    return status
@@ -0,0 +1,217 @@
+# File: backend/app/db/migrations.py
+#
+# Minimal versioned schema migrations.
+#
+# Each migration is (version, name, function(connection)) and runs in its own
+# transaction; applied versions are recorded in the schema_migrations table.
+# Migration 1 creates the original tables from the models, so on a fresh
+# database it already produces the latest columns and indexes. Every later
+# migration must therefore be idempotent (IF NOT EXISTS / checkfirst) so it
+# is a no-op there and only does work on databases created earlier.
+
+from typing import Callable, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.base import Base, collection_version_seq
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent deploys do not race.
+MIGRATION_LOCK_ID = 72_061_001
+
+
+def _initial_schema(conn: Connection):
+    tables = [
+        "companies",
+        "users",
+        "approval_workflows",
+        "workflow_steps",
+        "expenses",
+        "receipts",
+        "expense_approvals",
+    ]
+    Base.metadata.create_all(conn, tables=[Base.metadata.tables[name] for name in tables])
+
+
+def _expense_access_path_indexes(conn: Connection):
+    # Manager queries: direct reports of a manager.
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_manager_id ON users (manager_id)"))
+    # Employee list / team list: employee_id = ? ORDER BY created_at DESC, id DESC.
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_expenses_employee_created "
+        "ON expenses (employee_id, created_at DESC, id DESC)"
+    ))
+    # Same, with a status filter.
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_expenses_employee_status_created "
+        "ON expenses (employee_id, status, created_at DESC, id DESC)"
+    ))
+    # Approval queue: only pending rows, which stay a small fraction of the table.
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_expenses_pending_employee_created "
+        "ON expenses (employee_id, created_at DESC, id DESC) "
+        "WHERE status = 'pending_approval'"
+    ))
+    # Foreign keys that are looked up from the expense side.
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_receipts_expense_id ON receipts (expense_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_expense_approvals_expense_id ON expense_approvals (expense_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_workflow_steps_workflow_id ON workflow_steps (workflow_id)"))
+
+
+def backfill_direct_manager_inbox(conn: Connection):
+    """
+    Puts pending expenses that have no workflow step yet into their
+    employee's direct manager's inbox at step 0, which is how they were
+    approved before the workflow engine. Also used by seed.py.
+    """
+    conn.execute(text(
+        "WITH queued AS ("
+        " UPDATE expenses SET approval_step = 0"
+        " WHERE status = 'pending_approval' AND approval_step IS NULL"
+        " RETURNING id, employee_id, created_at)"
+        " INSERT INTO approval_inbox (approver_id, expense_id, step, expense_created_at)"
+        " SELECT u.manager_id, q.id, 0, q.created_at"
+        " FROM queued q JOIN users u ON u.id = q.employee_id"
+        " WHERE u.manager_id IS NOT NULL"
+        " ON CONFLICT DO NOTHING"
+    ))
+
+
+def _approval_inbox(conn: Connection):
+    conn.execute(text("ALTER TABLE expenses ADD COLUMN IF NOT EXISTS approval_step INTEGER"))
+    conn.execute(text("ALTER TABLE expense_approvals ADD COLUMN IF NOT EXISTS step INTEGER"))
+    Base.metadata.tables["approval_inbox"].create(conn, checkfirst=True)
+    backfill_direct_manager_inbox(conn)
+
+
+def rebuild_user_hierarchy(conn: Connection):
+    """
+    Recomputes the user_hierarchy closure table from users.manager_id.
+    Used by the migration below, seed.py and bulk loaders.
+    """
+    conn.execute(text("DELETE FROM user_hierarchy"))
+    conn.execute(text(
+        "INSERT INTO user_hierarchy (ancestor_id, descendant_id, depth)"
+        " WITH RECURSIVE tree AS ("
+        "  SELECT id AS ancestor_id, id AS descendant_id, 0 AS depth FROM users"
+        "  UNION ALL"
+        "  SELECT t.ancestor_id, u.id, t.depth + 1"
+        "  FROM tree t JOIN users u ON u.manager_id = t.descendant_id"
+        "  WHERE t.depth < 64"  # guards against manager cycles
+        " )"
+        " SELECT ancestor_id, descendant_id, min(depth) FROM tree GROUP BY ancestor_id, descendant_id"
+    ))
+
+
+def _user_hierarchy(conn: Connection):
+    Base.metadata.tables["user_hierarchy"].create(conn, checkfirst=True)
+    rebuild_user_hierarchy(conn)
+
+
+# Full recomputation of expense_rollups from expenses; services/rollups.py
+# applies the same grouping incrementally.
+EXPENSE_ROLLUPS_SELECT = (
+    "SELECT company_id, employee_id, coalesce(category, '') AS category,"
+    " date_trunc('month', expense_date)::date AS month, status, currency,"
+    " sum(amount) AS total_amount, count(*) AS expense_count"
+    " FROM expenses"
+    " GROUP BY company_id, employee_id, coalesce(category, ''), date_trunc('month', expense_date)::date, status, currency"
+)
+
+
+def rebuild_expense_rollups(conn: Connection):
+    """
+    Recomputes expense_rollups from scratch. Used by the migration below,
+    seed.py and `python -m app.services.rollups rebuild` after backfills.
+    """
+    conn.execute(text("DELETE FROM expense_rollups"))
+    conn.execute(text(
+        "INSERT INTO expense_rollups"
+        " (company_id, employee_id, category, month, status, currency, total_amount, expense_count) "
+        + EXPENSE_ROLLUPS_SELECT
+    ))
+
+
+def _expense_rollups(conn: Connection):
+    Base.metadata.tables["expense_rollups"].create(conn, checkfirst=True)
+    rebuild_expense_rollups(conn)
+
+
+def _receipt_blobs(conn: Connection):
+    conn.execute(text("ALTER TABLE receipts ADD COLUMN IF NOT EXISTS sha256 VARCHAR(64)"))
+    conn.execute(text("ALTER TABLE receipts ADD COLUMN IF NOT EXISTS size_bytes BIGINT"))
+    conn.execute(text("ALTER TABLE receipts ADD COLUMN IF NOT EXISTS content_type VARCHAR(255)"))
+    conn.execute(text("ALTER TABLE receipts ADD COLUMN IF NOT EXISTS filename VARCHAR(255)"))
+
+
+def _receipt_jobs(conn: Connection):
+    conn.execute(text("ALTER TABLE expenses ADD COLUMN IF NOT EXISTS merchant VARCHAR(255)"))
+    Base.metadata.tables["receipt_jobs"].create(conn, checkfirst=True)
+
+
+def bump_all_collection_versions(conn: Connection):
+    """
+    Gives every user's expense lists a new version, for scripts that change
+    expenses behind the API's back (seeding).
+    """
+    conn.execute(text(
+        "INSERT INTO collection_versions (user_id, expenses, approvals)"
+        " SELECT id, nextval('collection_version_seq'), nextval('collection_version_seq') FROM users"
+        " ON CONFLICT (user_id) DO UPDATE SET expenses = EXCLUDED.expenses, approvals = EXCLUDED.approvals"
+    ))
+
+
+def _collection_versions(conn: Connection):
+    collection_version_seq.create(conn, checkfirst=True)
+    Base.metadata.tables["collection_versions"].create(conn, checkfirst=True)
+
+
+def _exchange_rates(conn: Connection):
+    Base.metadata.tables["exchange_rates"].create(conn, checkfirst=True)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "initial schema", _initial_schema),
+    (2, "expense access-path indexes", _expense_access_path_indexes),
+    (3, "workflow steps and approval inbox", _approval_inbox),
+    (4, "manager hierarchy closure table", _user_hierarchy),
+    (5, "expense spending rollups", _expense_rollups),
+    (6, "receipt blob store columns", _receipt_blobs),
+    (7, "receipt processing jobs", _receipt_jobs),
+    (8, "expense collection versions", _collection_versions),
+    (9, "historical exchange rates", _exchange_rates),
+]
+
+
+def _ensure_version_table(conn: Connection):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INTEGER PRIMARY KEY,"
+        " name VARCHAR(255) NOT NULL,"
+        " applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now())"
+    ))
+
+
+def applied_versions(conn: Connection) -> set:
+    _ensure_version_table(conn)
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def upgrade(engine: Engine) -> List[int]:
+    """
+    Applies all pending migrations in order and returns their versions.
+    """
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+            if version in applied_versions(conn):
+                continue
+            print(f"-> Applying migration {version}: {name}")
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                {"version": version, "name": name},
+            )
+        applied.append(version)
+    return applied
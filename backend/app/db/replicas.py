@@ -0,0 +1,254 @@
+# File: backend/app/db/replicas.py
+#
+# Read replicas for the read-only endpoints.
+#
+# With DATABASE_REPLICA_URLS set, endpoints that only read take their
+# session from dependencies.get_read_db, which picks a healthy replica
+# round-robin (session.read_session). A background task probes every
+# replica each REPLICA_HEALTH_CHECK_SECONDS; one that cannot be reached,
+# or whose replay is more than REPLICA_MAX_LAG_SECONDS behind, gets no
+# reads until a later probe passes. A replica that fails to hand out a
+# connection is taken out at once and the read falls back to the primary,
+# as do all reads while no replica is healthy.
+#
+# Read-your-writes: when a request commits on the primary, that user's
+# reads go to the primary for READ_YOUR_WRITES_SECONDS, so they see their
+# own change even if the replicas have not replayed it yet. The window is
+# remembered per process by user id, and in a cookie so it also holds when
+# the next request lands on another worker. The cookie can only send its
+# holder's own reads to the primary, so it needs no signature.
+
+import asyncio
+import itertools
+import logging
+import math
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import List, Mapping, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    ASYNC_DATABASE_REPLICA_URLS,
+    PRINCIPAL_CACHE_MAX_SIZE,
+    READ_YOUR_WRITES_COOKIE,
+    READ_YOUR_WRITES_SECONDS,
+    REPLICA_HEALTH_CHECK_SECONDS,
+    REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS,
+    REPLICA_MAX_LAG_SECONDS,
+)
+from app.core.principal_cache import ExpiringLRUCache
+from app.db.engine import create_async_db_engine
+
+logger = logging.getLogger(__name__)
+
+# Marks sessions bound to a replica in Session.info
+REPLICA_SESSION = "replica"
+
+# Seconds of replay lag; 0 when the replica has replayed all it received
+# (an idle replica is not behind) or when the server is not in recovery.
+LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        # No reads until the first probe passes
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[datetime] = None
+
+    def set_health(self, healthy: bool, lag_seconds: Optional[float] = None, error: Optional[str] = None):
+        if healthy != self.healthy or self.checked_at is None:
+            if healthy:
+                logger.info("Replica %s is serving reads (lag %.1fs)", self.name, lag_seconds or 0)
+            else:
+                logger.warning("Replica %s taken out of rotation: %s", self.name, error)
+        self.healthy = healthy
+        self.lag_seconds = lag_seconds
+        self.error = error
+        self.checked_at = datetime.now(timezone.utc)
+
+
+class ReplicaSet:
+    """
+    The replicas of this worker process, each with its own pool (sized like
+    the primary's, see app/db/engine.py).
+    """
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [
+            Replica(f"replica-{number}", create_async_db_engine(url, name=f"replica-{number}"))
+            for number, url in enumerate(urls, start=1)
+        ]
+        self._turn = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[Replica]:
+        """
+        The next healthy replica, round-robin, or None to read from the primary.
+        """
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def mark_failed(self, replica: Replica, error: BaseException):
+        replica.set_health(False, error=f"{type(error).__name__}: {error}")
+
+    async def _probe(self, replica: Replica) -> float:
+        async with replica.engine.connect() as conn:
+            return float(await conn.scalar(LAG_QUERY) or 0)
+
+    async def check(self, replica: Replica):
+        try:
+            lag = await asyncio.wait_for(self._probe(replica), REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.mark_failed(replica, e)
+            return
+        if lag > REPLICA_MAX_LAG_SECONDS:
+            replica.set_health(False, lag, f"replay lag {lag:.1f}s exceeds {REPLICA_MAX_LAG_SECONDS}s")
+        else:
+            replica.set_health(True, lag)
+
+    async def check_all(self):
+        await asyncio.gather(*[self.check(replica) for replica in self.replicas])
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(REPLICA_HEALTH_CHECK_SECONDS)
+            await self.check_all()
+
+    async def start(self):
+        """
+        Probes every replica once, so healthy ones serve reads from the first
+        request, then keeps probing in the background.
+        """
+        if self.replicas and self._task is None:
+            await self.check_all()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag_seconds,
+                "error": replica.error,
+                "checked_at": replica.checked_at,
+            }
+            for replica in self.replicas
+        ]
+
+
+replica_set = ReplicaSet(ASYNC_DATABASE_REPLICA_URLS)
+
+
+# --- Read-your-writes ---
+
+class _RequestWrites:
+    __slots__ = ("user_id", "wrote")
+
+    def __init__(self):
+        self.user_id: Optional[uuid.UUID] = None
+        self.wrote = False
+
+
+_request: ContextVar[Optional[_RequestWrites]] = ContextVar("request_writes", default=None)
+
+# user id -> True while their reads stay on the primary
+_recent_writers = ExpiringLRUCache(PRINCIPAL_CACHE_MAX_SIZE)
+
+
+def note_user(user_id: uuid.UUID):
+    """
+    Called once the request's user is known, so its commits can be
+    attributed to them.
+    """
+    writes = _request.get()
+    if writes is not None:
+        writes.user_id = user_id
+
+
+def needs_primary(user_id: uuid.UUID, cookies: Mapping[str, str]) -> bool:
+    """
+    Whether this user's reads must go to the primary: they wrote within
+    READ_YOUR_WRITES_SECONDS, on this worker or (per the cookie) another one.
+    """
+    if _recent_writers.get(user_id):
+        return True
+    try:
+        return float(cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+@event.listens_for(Session, "after_commit")
+def _note_commit(session: Session):
+    if session.info.get(REPLICA_SESSION):
+        return
+    writes = _request.get()
+    if writes is None:
+        return
+    writes.wrote = True
+    if writes.user_id is not None:
+        _recent_writers.put(writes.user_id, True, time.time() + READ_YOUR_WRITES_SECONDS)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pure ASGI middleware that tracks commits per request and, after one,
+    sets the cookie that keeps the client's reads on the primary. Does
+    nothing without replicas.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replica_set.replicas or READ_YOUR_WRITES_SECONDS <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        writes = _RequestWrites()
+        token = _request.set(writes)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and writes.wrote:
+                until = math.ceil(time.time() + READ_YOUR_WRITES_SECONDS)
+                cookie = (
+                    f"{READ_YOUR_WRITES_COOKIE}={until}; Max-Age={math.ceil(READ_YOUR_WRITES_SECONDS)};"
+                    " Path=/; HttpOnly; SameSite=Lax"
+                )
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _request.reset(token)
@@ -1,16 +1,57 @@
 # File: backend/app/db/session.py
 
-from sqlalchemy import create_engine
+import asyncio
+from contextlib import asynccontextmanager
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from app.core.config import DATABASE_URL
+from app.core.config import DATABASE_URL, ASYNC_DATABASE_URL
+from app.db.engine import create_db_engine, create_async_db_engine
+from app.db import replicas
+
+# The only engines in the process; both are built from the pool settings in
+# app/core/config.py. Connections are opened lazily, so the API process only
+# fills the async pool and scripts only fill the sync one. Replica engines,
+# if any, live in app/db/replicas.py.
 
-engine = create_engine(DATABASE_URL)
+# Sync engine for scripts (seeding, migrations, benchmarks)
+engine = create_db_engine(DATABASE_URL, name="primary-sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API
+async_engine = create_async_db_engine(ASYNC_DATABASE_URL, name="primary")
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Sessions on a replica; bound per request to the replica picked for it
+ReplicaSessionLocal = async_sessionmaker(
+    class_=AsyncSession, autoflush=False, expire_on_commit=False, info={replicas.REPLICA_SESSION: True}
+)
+
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+@asynccontextmanager
+async def read_session(use_primary: bool = False):
+    """
+    A session for reads only: on a healthy replica when there is one,
+    otherwise on the primary. The replica connection is taken up front so
+    a replica that has gone away is marked down and the primary used
+    instead, rather than failing the request.
+    """
+    replica = None if use_primary else replicas.replica_set.choose()
+    if replica is not None:
+        db = ReplicaSessionLocal(bind=replica.engine)
+        try:
+            await db.connection()
+        except (exc.DBAPIError, OSError, asyncio.TimeoutError) as e:
+            await db.close()
+            replicas.replica_set.mark_failed(replica, e)
+        else:
+            async with db:
+                yield db
+            return
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
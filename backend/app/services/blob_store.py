@@ -0,0 +1,73 @@
+# File: backend/app/services/blob_store.py
+#
+# Local content-addressed file store.
+#
+# A blob lives at <RECEIPT_STORE_PATH>/<aa>/<bb>/<sha256>, where aa and bb
+# are the first two byte pairs of its SHA-256. Incoming data is written to
+# a temporary file in the same directory tree while it is hashed, then
+# renamed into place, so a blob is either complete or absent and identical
+# uploads end up as a single file.
+
+import hashlib
+import os
+import tempfile
+from typing import AsyncIterator, NamedTuple
+
+import anyio
+
+from app.core.config import RECEIPT_MAX_BYTES, RECEIPT_STORE_PATH
+
+
+class BlobTooLarge(ValueError):
+    pass
+
+
+class StoredBlob(NamedTuple):
+    sha256: str
+    size: int
+    path: str
+    created: bool  # False when an identical blob was already stored
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(RECEIPT_STORE_PATH, sha256[:2], sha256[2:4], sha256)
+
+
+def _move_into_place(tmp_path: str, sha256: str) -> bool:
+    path = blob_path(sha256)
+    if os.path.exists(path):
+        os.unlink(tmp_path)
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
+    return True
+
+
+async def save(chunks: AsyncIterator[bytes], max_bytes: int = RECEIPT_MAX_BYTES) -> StoredBlob:
+    """
+    Writes a stream of chunks to the store, hashing as it goes, and returns
+    the blob's digest and size. Only one chunk is held in memory at a time.
+    Raises BlobTooLarge (and keeps nothing) past max_bytes.
+    """
+    tmp_dir = os.path.join(RECEIPT_STORE_PATH, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with anyio.wrap_file(os.fdopen(fd, "wb")) as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise BlobTooLarge(f"File is larger than {max_bytes} bytes")
+                digest.update(chunk)
+                await f.write(chunk)
+            await f.flush()
+            await anyio.to_thread.run_sync(os.fsync, f.wrapped.fileno())
+        sha256 = digest.hexdigest()
+        created = await anyio.to_thread.run_sync(_move_into_place, tmp_path, sha256)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return StoredBlob(sha256=sha256, size=size, path=blob_path(sha256), created=created)
@@ -0,0 +1,103 @@
+# File: backend/app/services/collection_versions.py
+#
+# Versions of the expense lists, for conditional GETs.
+#
+# Every write that changes what a list shows bumps a version in the same
+# transaction (collection_versions table):
+#
+#   expenses   per employee: their own expenses changed (created, status,
+#              fields, receipts) -> GET /expenses/
+#   approvals  per approver: their inbox changed -> GET /manager/approvals
+#
+# The team list (GET /manager/team-expenses) has no row of its own: bumping
+# every ancestor on each write would make the top of the hierarchy a hot
+# row that serializes all writes in a company. Its version is derived from
+# the members' versions instead, (member count, highest member version),
+# read from the closure table. Moving a user bumps that user, so a team
+# that gains members always sees a higher maximum and one that only loses
+# members sees a lower count.
+#
+# Reading a version touches only these tables, so an unchanged list is
+# answered with 304 before any expense query runs.
+
+import hashlib
+import uuid
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+EXPENSES = "expenses"
+APPROVALS = "approvals"
+TEAM = "team"
+
+
+async def _bump(db: AsyncSession, column: str, source: str, params: dict):
+    await db.execute(
+        text(
+            f"INSERT INTO collection_versions (user_id, {column})"
+            f" SELECT user_id, nextval('collection_version_seq') FROM ({source}) AS s"
+            f" ON CONFLICT (user_id) DO UPDATE SET {column} = EXCLUDED.{column}"
+        ),
+        params,
+    )
+
+
+def _sorted_ids(user_ids: Iterable[uuid.UUID]):
+    # A stable lock order keeps concurrent bumps from deadlocking.
+    return sorted({uuid.UUID(str(user_id)) for user_id in user_ids})
+
+
+async def bump_expenses(db: AsyncSession, user_ids: Iterable[uuid.UUID]):
+    ids = _sorted_ids(user_ids)
+    if ids:
+        await _bump(db, EXPENSES, "SELECT unnest(CAST(:ids AS uuid[])) AS user_id ORDER BY 1", {"ids": ids})
+
+
+async def bump_expense_owners(db: AsyncSession, expense_ids: Iterable[uuid.UUID]):
+    """
+    bump_expenses for the employees who own the given expenses.
+    """
+    expense_ids = list(expense_ids)
+    if expense_ids:
+        await _bump(
+            db, EXPENSES,
+            "SELECT DISTINCT employee_id AS user_id FROM expenses WHERE id = ANY(CAST(:ids AS uuid[])) ORDER BY 1",
+            {"ids": expense_ids},
+        )
+
+
+async def bump_approvals(db: AsyncSession, user_ids: Iterable[uuid.UUID]):
+    ids = _sorted_ids(user_ids)
+    if ids:
+        await _bump(db, APPROVALS, "SELECT unnest(CAST(:ids AS uuid[])) AS user_id ORDER BY 1", {"ids": ids})
+
+
+async def get_version(db: AsyncSession, collection: str, user_id: uuid.UUID, max_depth: Optional[int] = None) -> str:
+    if collection == TEAM:
+        depth_filter = " AND h.depth <= :max_depth" if max_depth is not None else ""
+        members, highest = (await db.execute(
+            text(
+                "SELECT count(*), coalesce(max(v.expenses), 0)"
+                " FROM user_hierarchy h LEFT JOIN collection_versions v ON v.user_id = h.descendant_id"
+                f" WHERE h.ancestor_id = :user_id AND h.depth >= 1{depth_filter}"
+            ),
+            {"user_id": user_id, "max_depth": max_depth},
+        )).one()
+        return f"{members}.{highest}"
+    version = (await db.execute(
+        text(f"SELECT {collection} FROM collection_versions WHERE user_id = :user_id"),
+        {"user_id": user_id},
+    )).scalar()
+    return str(version or 0)
+
+
+async def etag(db: AsyncSession, collection: str, user_id: uuid.UUID, query: str, max_depth: Optional[int] = None) -> str:
+    """
+    Strong ETag for one page of a user's list: the collection version plus
+    a digest of the user and the query string (filters, cursor, limit,
+    expand), which select different bodies of the same version.
+    """
+    version = await get_version(db, collection, user_id, max_depth)
+    digest = hashlib.blake2b(f"{user_id}?{query}".encode(), digest_size=8).hexdigest()
+    return f'"{collection}-{version}-{digest}"'
@@ -0,0 +1,103 @@
+# File: backend/app/services/countries.py
+
+import asyncio
+import hashlib
+import json
+import os
+from typing import List, NamedTuple, Optional
+
+import httpx
+
+from app.core.config import COUNTRIES_API_URL, COUNTRY_CATALOGUE_PATH
+
+BUNDLED_CATALOGUE_PATH = os.path.join(os.path.dirname(__file__), "data", "countries.json")
+
+
+class Catalogue(NamedTuple):
+    body: bytes  # serialized JSON list, ready to send
+    etag: str
+
+
+_catalogue: Optional[Catalogue] = None
+
+
+def build_catalogue(countries: List[dict]) -> Catalogue:
+    """
+    Serializes a list of {"name", "currency_code"} dicts (sorted by name)
+    and derives its ETag from the content.
+    """
+    body = json.dumps(countries, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return Catalogue(body=body, etag=etag)
+
+
+def parse_restcountries(data: List[dict]) -> List[dict]:
+    """
+    Converts the restcountries payload into the sorted catalogue list,
+    keeping the first currency of every country that has one.
+    """
+    countries_info = []
+    for country in data:
+        if "currencies" in country and country["currencies"]:
+            currency_code = next(iter(country["currencies"]))
+            countries_info.append({
+                "name": country["name"]["common"],
+                "currency_code": currency_code
+            })
+    countries_info.sort(key=lambda x: x["name"])
+    return countries_info
+
+
+def _persist(countries: List[dict]):
+    directory = os.path.dirname(COUNTRY_CATALOGUE_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{COUNTRY_CATALOGUE_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(countries, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, COUNTRY_CATALOGUE_PATH)
+
+
+def _load() -> Catalogue:
+    """
+    Loads the local catalogue, seeding it from the bundled snapshot the
+    first time so the endpoint works without network access.
+    """
+    try:
+        with open(COUNTRY_CATALOGUE_PATH, encoding="utf-8") as f:
+            countries = json.load(f)
+    except (OSError, ValueError):
+        with open(BUNDLED_CATALOGUE_PATH, encoding="utf-8") as f:
+            countries = json.load(f)
+        try:
+            _persist(countries)
+        except OSError:
+            pass
+    return build_catalogue(countries)
+
+
+def get_catalogue() -> Catalogue:
+    global _catalogue
+    if _catalogue is None:
+        _catalogue = _load()
+    return _catalogue
+
+
+async def refresh_catalogue() -> Catalogue:
+    """
+    Rebuilds the catalogue from the RestCountries API, persists it and
+    swaps it in for subsequent requests.
+    """
+    global _catalogue
+    async with httpx.AsyncClient() as client:
+        response = await client.get(COUNTRIES_API_URL)
+        response.raise_for_status()
+    countries = parse_restcountries(response.json())
+    _persist(countries)
+    _catalogue = build_catalogue(countries)
+    return _catalogue
+
+
+if __name__ == "__main__":
+    catalogue = asyncio.run(refresh_catalogue())
+    print(f"Country catalogue refreshed ({len(catalogue.body)} bytes, ETag {catalogue.etag}).")
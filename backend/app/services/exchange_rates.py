@@ -0,0 +1,174 @@
+# File: backend/app/services/exchange_rates.py
+
+import asyncio
+import json
+import os
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Optional, Tuple
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import (
+    EXCHANGE_RATE_API_URL,
+    EXCHANGE_RATE_TTL_SECONDS,
+    EXCHANGE_RATE_TIMEOUT_SECONDS,
+    EXCHANGE_RATE_SNAPSHOT_PATH,
+)
+
+# One pooled client for the whole process, created lazily on first use.
+_client: Optional[httpx.AsyncClient] = None
+
+# base currency -> (fetched_at epoch seconds, {quote currency: rate})
+_rates: Dict[str, Tuple[float, Dict[str, float]]] = {}
+
+# One lock per base currency so concurrent misses share a single fetch.
+_locks: Dict[str, asyncio.Lock] = {}
+
+_snapshot_loaded = False
+# Snapshot writes run on the threadpool; one at a time
+_snapshot_lock = threading.Lock()
+
+CENT = Decimal("0.01")
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=EXCHANGE_RATE_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _read_snapshot() -> dict:
+    """
+    Reads the snapshot file; empty if it is missing or unreadable. Blocking
+    file I/O; load_snapshot runs it on the threadpool.
+    """
+    try:
+        with open(EXCHANGE_RATE_SNAPSHOT_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+async def load_snapshot():
+    """
+    Seeds the in-memory cache from the local snapshot file (once per process;
+    at startup for the API). Snapshot entries keep their original fetch time,
+    so stale ones are still refreshed on first use but remain available as a
+    fallback.
+    """
+    global _snapshot_loaded
+    if _snapshot_loaded:
+        return
+    _snapshot_loaded = True
+    data = await run_in_threadpool(_read_snapshot)
+    for base, entry in data.items():
+        _rates.setdefault(base, (entry["fetched_at"], entry["rates"]))
+
+
+def _snapshot_data() -> dict:
+    return {base: {"fetched_at": fetched_at, "rates": rates} for base, (fetched_at, rates) in _rates.items()}
+
+
+def _save_snapshot(data: dict):
+    """
+    Writes rate tables to the snapshot file atomically. Blocking file I/O;
+    get_rates runs it on the threadpool.
+    """
+    directory = os.path.dirname(EXCHANGE_RATE_SNAPSHOT_PATH)
+    try:
+        with _snapshot_lock:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{EXCHANGE_RATE_SNAPSHOT_PATH}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, EXCHANGE_RATE_SNAPSHOT_PATH)
+    except OSError:
+        # The snapshot is only a fallback; never fail a conversion because of it.
+        pass
+
+
+def _is_fresh(entry: Optional[Tuple[float, Dict[str, float]]]) -> bool:
+    return entry is not None and time.time() - entry[0] < EXCHANGE_RATE_TTL_SECONDS
+
+
+async def fetch_rates(base: str) -> Dict[str, float]:
+    response = await get_client().get(f"{EXCHANGE_RATE_API_URL}{base}")
+    response.raise_for_status()
+    return response.json().get("rates") or {}
+
+
+async def get_rates(base_currency: str) -> Dict[str, float]:
+    """
+    Returns the rate table for a base currency.
+
+    Fresh tables are served straight from memory. On a miss only one
+    coroutine per base currency goes upstream; the others wait for its
+    result. If the upstream fails, the last known table (from memory or the
+    snapshot file) is returned instead; the error is raised only when no
+    table has ever been fetched for this base.
+    """
+    base = base_currency.upper()
+    await load_snapshot()
+
+    entry = _rates.get(base)
+    if _is_fresh(entry):
+        return entry[1]
+
+    lock = _locks.setdefault(base, asyncio.Lock())
+    async with lock:
+        # Another coroutine may have refreshed the table while we waited.
+        entry = _rates.get(base)
+        if _is_fresh(entry):
+            return entry[1]
+        try:
+            rates = await fetch_rates(base)
+        except (httpx.HTTPStatusError, httpx.RequestError):
+            if entry is not None:
+                return entry[1]
+            raise
+        _rates[base] = (time.time(), rates)
+    # Written after releasing the lock, so waiters get the new table at once
+    await run_in_threadpool(_save_snapshot, _snapshot_data())
+    return rates
+
+
+async def get_rate(base_currency: str, target_currency: str) -> Optional[float]:
+    """
+    Returns the conversion rate from base to target, or None if the target
+    currency is unknown for this base.
+    """
+    rates = await get_rates(base_currency)
+    return rates.get(target_currency.upper())
+
+
+def to_base(amount: Decimal, currency: str, base_currency: str, rates: Dict[str, float]) -> Optional[Decimal]:
+    """
+    Converts an amount into the base currency using the rate table of that
+    base (1 base = rate units of currency). Returns None when the currency
+    has no rate.
+    """
+    currency = currency.upper()
+    if currency == base_currency.upper():
+        return amount
+    rate = rates.get(currency)
+    if not rate:
+        return None
+    try:
+        return (amount / Decimal(str(rate))).quantize(CENT)
+    except InvalidOperation:
+        return None
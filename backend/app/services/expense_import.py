@@ -0,0 +1,150 @@
+# File: backend/app/services/expense_import.py
+
+import csv
+import io
+import json
+import uuid
+from itertools import islice
+from typing import IO, Iterator, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.schemas import schemas
+from app.core.config import IMPORT_BATCH_SIZE, IMPORT_MAX_ERRORS
+from app.core.principal_cache import Principal
+from app.crud import crud_expense
+
+FORMATS = ("csv", "ndjson")
+
+# (row number, parsed record or None, parse error or None)
+Record = Tuple[int, Optional[dict], Optional[str]]
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or (content_type or "").startswith(("application/x-ndjson", "application/jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+def iter_records(fileobj: IO[bytes], fmt: str) -> Iterator[Record]:
+    """
+    Lazily parses an uploaded file, one record at a time, so memory does not
+    depend on the file size.
+    """
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            yield row_number, row, None
+        return
+    row_number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row_number, None, "Expected a JSON object"
+            continue
+        yield row_number, record, None
+
+
+def _next_batch(records: Iterator[Record], size: int) -> Tuple[List[Record], Optional[str]]:
+    """
+    Up to `size` records, plus an error if the file stopped being readable
+    (bad encoding or broken CSV quoting); the generator is finished then.
+    """
+    batch: List[Record] = []
+    try:
+        batch.extend(islice(records, size))
+    except (UnicodeDecodeError, csv.Error) as e:
+        return batch, str(e)
+    return batch, None
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+
+
+class _Report:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[schemas.ExpenseImportError] = []
+
+    def add_error(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append(schemas.ExpenseImportError(row=row, error=error))
+
+    def result(self) -> schemas.ExpenseImportReport:
+        return schemas.ExpenseImportReport(
+            imported=self.imported,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+        )
+
+
+async def import_expenses(
+    db: AsyncSession,
+    fileobj: IO[bytes],
+    fmt: str,
+    employee: Principal,
+    default_workflow_id: Optional[uuid.UUID] = None,
+) -> schemas.ExpenseImportReport:
+    """
+    Streams records from fileobj, validates them against ExpenseCreate and
+    inserts the valid ones in IMPORT_BATCH_SIZE chunks, one transaction per
+    chunk. Parsing runs on the threadpool since the upload is a (possibly
+    disk-backed) sync file. A file that cannot be read past some row ends
+    the import there with a row error; the chunks before it stay imported.
+    """
+    records = iter_records(fileobj, fmt)
+    report = _Report()
+    rows_read = 0
+    while True:
+        batch, read_error = await run_in_threadpool(_next_batch, records, IMPORT_BATCH_SIZE)
+        if not batch and not read_error:
+            break
+        rows_read = max([rows_read] + [row_number for row_number, _, _ in batch])
+
+        valid: List[Tuple[int, schemas.ExpenseCreate]] = []
+        for row_number, record, parse_error in batch:
+            if parse_error:
+                report.add_error(row_number, parse_error)
+                continue
+            data = {key: (value if value != "" else None) for key, value in record.items() if key}
+            if data.get("workflow_id") is None and default_workflow_id is not None:
+                data["workflow_id"] = default_workflow_id
+            try:
+                valid.append((row_number, schemas.ExpenseCreate.parse_obj(data)))
+            except ValidationError as e:
+                report.add_error(row_number, format_validation_error(e))
+
+        known_workflows = await crud_expense.get_existing_workflow_ids(
+            db, employee.company_id, {expense.workflow_id for _, expense in valid}
+        )
+        to_insert = []
+        for row_number, expense in valid:
+            if expense.workflow_id in known_workflows:
+                to_insert.append(expense)
+            else:
+                report.add_error(row_number, f"workflow_id: unknown workflow {expense.workflow_id}")
+
+        await crud_expense.create_expenses_bulk(db, to_insert, employee_id=employee.id, company_id=employee.company_id)
+        report.imported += len(to_insert)
+        if read_error:
+            report.add_error(
+                rows_read + 1,
+                f"Could not parse the {fmt.upper()} file: {read_error}. The import stopped here;"
+                f" {report.imported} rows before it were imported",
+            )
+            break
+    return report.result()
@@ -0,0 +1,190 @@
+# File: backend/app/services/export.py
+
+import csv
+import io
+import re
+import uuid
+import zipfile
+from decimal import Decimal
+from typing import AsyncIterator, Dict, Iterable, List
+from xml.sax.saxutils import escape
+
+from sqlalchemy import select
+
+from app.api.v1.schemas import schemas
+from app.core.config import EXPORT_BATCH_SIZE
+from app.crud import crud_expense
+from app.db import base as models
+from app.db.session import AsyncSessionLocal
+from app.services import exchange_rates
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+HEADER = [
+    "expense_id", "expense_date", "employee_email", "category", "description",
+    "status", "amount", "currency", "amount_base", "base_currency",
+]
+
+async def iter_rows(
+    company_id: uuid.UUID,
+    base_currency: str,
+    rates: Dict[str, float],
+    filters: schemas.ExpenseFilters,
+) -> AsyncIterator[List[list]]:
+    """
+    Yields the company's expenses in batches of EXPORT_BATCH_SIZE rows from
+    a server-side cursor. Only plain columns are selected, so nothing
+    accumulates in the session's identity map. Opens its own session
+    because it runs while the response is being streamed.
+    """
+    stmt = crud_expense.apply_filters(
+        select(
+            models.Expense.id,
+            models.Expense.expense_date,
+            models.User.email,
+            models.Expense.category,
+            models.Expense.description,
+            models.Expense.status,
+            models.Expense.amount,
+            models.Expense.currency,
+        )
+        .join(models.User, models.User.id == models.Expense.employee_id)
+        .where(models.Expense.company_id == company_id),
+        filters,
+    ).order_by(models.Expense.expense_date, models.Expense.id)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for partition in result.partitions():
+            yield [
+                [
+                    expense_id, expense_date, email, category or "", description,
+                    status.value, amount, currency,
+                    exchange_rates.to_base(amount, currency, base_currency, rates), base_currency,
+                ]
+                for expense_id, expense_date, email, category, description, status, amount, currency in partition
+            ]
+
+
+async def stream_csv(batches: AsyncIterator[List[list]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    async for rows in batches:
+        writer.writerows(["" if value is None else value for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+# --- Minimal streaming XLSX writer ---
+#
+# An .xlsx file is a zip of XML parts. zipfile can write entries to a
+# non-seekable stream (sizes go into data descriptors), so the worksheet is
+# generated row by row and the compressed bytes are drained after every
+# batch instead of building the workbook in memory.
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Expenses" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+# Characters that are not allowed in XML 1.0
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class _Sink(io.RawIOBase):
+    """
+    Write-only stream that collects bytes until they are drained.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _cell(value) -> str:
+    if value is None or value == "":
+        return "<c/>"
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_INVALID_XML.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _sheet_rows(rows: Iterable[list]) -> bytes:
+    return "".join("<row>" + "".join(_cell(value) for value in row) + "</row>" for row in rows).encode("utf-8")
+
+
+async def stream_xlsx(batches: AsyncIterator[List[list]]) -> AsyncIterator[bytes]:
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _WORKBOOK)
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(_SHEET_START.encode("utf-8"))
+            sheet.write(_sheet_rows([HEADER]))
+            async for rows in batches:
+                sheet.write(_sheet_rows(rows))
+                data = sink.drain()
+                if data:
+                    yield data
+            sheet.write(_SHEET_END.encode("utf-8"))
+    yield sink.drain()
+
+
+def stream_export(fmt: str, batches: AsyncIterator[List[list]]) -> AsyncIterator[bytes]:
+    return stream_xlsx(batches) if fmt == "xlsx" else stream_csv(batches)
@@ -0,0 +1,262 @@
+# File: backend/app/services/notifications.py
+#
+# Push notifications for open clients, so they stop polling the expense
+# lists (GET /api/v1/events, Server-Sent Events).
+#
+# Write paths call publish() inside their transaction with the users to
+# tell; nothing is delivered unless that transaction commits. Every worker
+# process has one Hub holding the open streams of its users. The broker
+# decides how committed events reach the hubs:
+#
+#   memory    one worker process: the committing session hands its events
+#             straight to the local hub.
+#   postgres  any number of workers: the transaction issues NOTIFY (Postgres
+#             delivers it on commit) and every worker keeps one LISTEN
+#             connection, outside the pool, that feeds its hub.
+#
+# Events are hints, not data: clients refetch what changed. A client that
+# falls behind, or misses events while the LISTEN connection is down, gets
+# a "resync" event and refetches everything it shows.
+
+import asyncio
+import json
+import logging
+import re
+import uuid
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import asyncpg
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    ASYNC_DATABASE_URL,
+    EVENT_STREAM_MAX_QUEUED,
+    NOTIFICATION_BROKER,
+    NOTIFICATION_CHANNEL,
+)
+from app.core.encoding import dumps
+
+logger = logging.getLogger(__name__)
+
+# (users to tell, event)
+Event = Tuple[Iterable[uuid.UUID], dict]
+
+_PENDING = "pending_notifications"
+LISTEN_RETRY_SECONDS = 5
+LISTEN_HEALTH_CHECK_SECONDS = 30
+# pg_notify rejects payloads of 8000 bytes or more
+NOTIFY_MAX_BYTES = 7999
+# A user id in a payload: the quoted UUID and a comma
+_USER_ID_BYTES = 39
+
+
+def queue_event(expense_id: uuid.UUID, action: str) -> dict:
+    """
+    An expense entered ("added") or left ("removed") the user's approval queue.
+    """
+    return {"type": "approval_queue", "action": action, "expense_id": str(expense_id)}
+
+
+def status_event(expense_id: uuid.UUID, status, step: Optional[int] = None) -> dict:
+    """
+    One of the user's own expenses changed status or approval step.
+    """
+    return {"type": "expense_status", "expense_id": str(expense_id), "status": getattr(status, "value", status), "step": step}
+
+
+RESYNC = {"type": "resync"}
+
+
+def frame(event: dict) -> bytes:
+    """
+    The event as an SSE message; the type doubles as the SSE event name.
+    """
+    return b"event: " + event["type"].encode() + b"\ndata: " + dumps(event) + b"\n\n"
+
+
+# --- Per-process fan-out ---
+
+class Subscription:
+    def __init__(self, user_id: uuid.UUID):
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(EVENT_STREAM_MAX_QUEUED)
+        self.overflowed = False
+
+    def put(self, message: bytes):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Drop the backlog; the stream sends a single resync instead.
+            self.overflowed = True
+
+
+class Hub:
+    """
+    Open streams by user. Only touched from the event loop thread, so it
+    needs no lock; publishing is a dict lookup and a put per connection.
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[uuid.UUID, Set[Subscription]] = {}
+        self.connections = 0
+
+    def subscribe(self, user_id: uuid.UUID) -> Subscription:
+        subscription = Subscription(user_id)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        self.connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions and subscription in subscriptions:
+            subscriptions.discard(subscription)
+            self.connections -= 1
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_ids: Iterable, event: dict):
+        message = None
+        for user_id in user_ids:
+            subscriptions = self._subscriptions.get(uuid.UUID(str(user_id)))
+            if not subscriptions:
+                continue
+            message = message or frame(event)
+            for subscription in subscriptions:
+                subscription.put(message)
+
+    def resync_all(self):
+        message = frame(RESYNC)
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.put(message)
+
+
+hub = Hub()
+
+
+# --- Brokers ---
+
+class MemoryBroker:
+    """
+    Single-process delivery: events wait on the session and go to the
+    local hub after commit (see the session listeners below).
+    """
+
+    async def publish(self, db: AsyncSession, events: List[Event]):
+        db.info.setdefault(_PENDING, []).extend(events)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+def notify_payloads(events: List[Event]) -> List[str]:
+    """
+    NOTIFY payloads for events, each under NOTIFY_MAX_BYTES so that a NOTIFY
+    can never fail (and abort) the write: an event whose recipients do not
+    fit in one payload is split across several, and one too large to send
+    at all becomes a resync for its recipients.
+    """
+    payloads = []
+    for user_ids, event in events:
+        users = [str(user_id) for user_id in user_ids]
+        empty = len(dumps({"users": [], "event": event}))
+        if empty + _USER_ID_BYTES > NOTIFY_MAX_BYTES:
+            event, empty = RESYNC, len(dumps({"users": [], "event": RESYNC}))
+        per_payload = (NOTIFY_MAX_BYTES - empty) // _USER_ID_BYTES
+        for start in range(0, len(users), per_payload):
+            payloads.append(dumps({"users": users[start:start + per_payload], "event": event}).decode())
+    return payloads
+
+
+class PostgresBroker:
+    """
+    Cross-process delivery through LISTEN/NOTIFY on NOTIFICATION_CHANNEL.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self, db: AsyncSession, events: List[Event]):
+        payloads = notify_payloads(events)
+        await db.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": NOTIFICATION_CHANNEL, "payloads": payloads},
+        )
+
+    @staticmethod
+    def _deliver(connection, pid, channel, payload: str):
+        try:
+            message = json.loads(payload)
+            hub.publish(message["users"], message["event"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed notification on %s: %r", channel, payload[:200])
+
+    async def _listen(self):
+        dsn = re.sub(r"^postgresql\+asyncpg://", "postgresql://", ASYNC_DATABASE_URL)
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(NOTIFICATION_CHANNEL, self._deliver)
+                # Whatever was sent while we were not listening is lost.
+                hub.resync_all()
+                while True:
+                    await asyncio.sleep(LISTEN_HEALTH_CHECK_SECONDS)
+                    await connection.fetchval("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Notification listener lost its connection; reconnecting in %ss", LISTEN_RETRY_SECONDS)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+BROKERS = {"memory": MemoryBroker, "postgres": PostgresBroker}
+
+if NOTIFICATION_BROKER not in BROKERS:
+    raise ValueError(f"NOTIFICATION_BROKER must be one of {', '.join(BROKERS)}")
+broker = BROKERS[NOTIFICATION_BROKER]()
+
+
+async def publish(db: AsyncSession, events: List[Event]):
+    """
+    Queues events for delivery when db's transaction commits. Does not
+    commit.
+    """
+    events = [(list(user_ids), event) for user_ids, event in events]
+    events = [(user_ids, event) for user_ids, event in events if user_ids]
+    if events:
+        await broker.publish(db, events)
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_pending(session: Session):
+    for user_ids, pending_event in session.info.pop(_PENDING, ()):
+        hub.publish(user_ids, pending_event)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction):
+    session.info.pop(_PENDING, None)
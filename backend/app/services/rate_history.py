@@ -0,0 +1,363 @@
+# File: backend/app/services/rate_history.py
+#
+# Historical exchange rates (exchange_rates table) and conversion at the
+# rate of a given date.
+#
+# services/exchange_rates.py serves today's rates from the upstream API;
+# reimbursements and reports need the rate of each expense's own date, and
+# convert many amounts at once. Rates are imported from files, either
+# dropped into EXCHANGE_RATE_HISTORY_DIR with the deployment or uploaded.
+# Sample weekly USD rates ship in services/data/exchange_rates so a fresh
+# database (seed.py) can convert; they are approximate, so production
+# deployments should import published rates over them.
+#
+#   CSV   header row with date, base, quote, rate (1 base = rate quote)
+#   JSON  {"base": "USD", "date": "2024-01-31", "rates": {"EUR": 0.92, ...}}
+#         or a list of such objects (the upstream API's own format, so
+#         saved responses can be imported as they are)
+#
+#   python -m app.services.rate_history import [FILE_OR_DIR ...]
+#   python -m app.services.rate_history latest USD EUR   # today's upstream rates
+#
+# convert_many() converts a whole list of (amount, currency, date) with one
+# query for all the rates it needs: for every distinct (currency, date) the
+# latest rate on or before that date, at most EXCHANGE_RATE_MAX_AGE_DAYS
+# old, stored in either direction or else crossed through one of the
+# EXCHANGE_RATE_CROSS_BASES tables of that date.
+
+import asyncio
+import csv
+import io
+import json
+import os
+import re
+import sys
+from datetime import date
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation, localcontext
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.schemas import schemas
+from app.core.config import (
+    EXCHANGE_RATE_CROSS_BASES,
+    EXCHANGE_RATE_HISTORY_DIR,
+    EXCHANGE_RATE_MAX_AGE_DAYS,
+    IMPORT_BATCH_SIZE,
+    IMPORT_MAX_ERRORS,
+)
+from app.db import base as models
+from app.services import exchange_rates
+
+FORMATS = ("csv", "json")
+
+BUNDLED_HISTORY_DIR = os.path.join(os.path.dirname(__file__), "data", "exchange_rates")
+
+# Rates are reported with the precision they are stored with
+# (exchange_rates.rate is Numeric(24, 12))
+RATE_PLACES = Decimal("1e-12")
+RATE_MAX = Decimal("1e12")
+
+_CURRENCY = re.compile(r"^[A-Z]{3}$")
+
+# (row number, {"base", "quote", "date", "rate"} or None, error or None)
+RateRecord = Tuple[int, Optional[dict], Optional[str]]
+
+
+class RateImportError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class Conversion(NamedTuple):
+    amount: Decimal
+    rate: Decimal  # 1 unit of the source currency = rate units of the target
+    rate_date: Optional[date]  # None when no conversion was needed
+
+
+# --- Parsing ---
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    name = (filename or "").lower()
+    if name.endswith(".json") or (content_type or "").startswith("application/json"):
+        return "json"
+    return "csv"
+
+
+def _rate_row(base, quote, day, rate) -> dict:
+    base, quote = str(base or "").strip().upper(), str(quote or "").strip().upper()
+    if not _CURRENCY.match(base) or not _CURRENCY.match(quote):
+        raise ValueError(f"currencies must be 3-letter codes, got {base!r} and {quote!r}")
+    if base == quote:
+        raise ValueError("base and quote are the same currency")
+    try:
+        day = date.fromisoformat(str(day).strip()[:10])
+    except ValueError:
+        raise ValueError(f"date: expected YYYY-MM-DD, got {day!r}")
+    try:
+        rate = Decimal(str(rate).strip())
+    except InvalidOperation:
+        raise ValueError(f"rate: not a number: {rate!r}")
+    if not rate.is_finite() or rate <= 0:
+        raise ValueError(f"rate: must be positive, got {rate}")
+    if rate >= RATE_MAX or rate.quantize(RATE_PLACES) == 0:
+        raise ValueError(f"rate: {rate} is outside the stored range ({RATE_PLACES} to {RATE_MAX})")
+    return {"base": base, "quote": quote, "date": day, "rate": rate}
+
+
+def iter_rates(fileobj: IO[bytes], fmt: str) -> Iterator[RateRecord]:
+    """
+    Parses a rate file into one record per (base, quote, date). CSV rows
+    are numbered like the other importers; in JSON the row is the index of
+    the rate table in the file.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline=""))
+        row_number = 0
+        try:
+            for row_number, row in enumerate(reader, start=1):
+                try:
+                    yield row_number, _rate_row(row.get("base"), row.get("quote"), row.get("date"), row.get("rate")), None
+                except ValueError as e:
+                    yield row_number, None, str(e)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise RateImportError(400, f"Could not parse the CSV file after row {row_number}: {e}")
+        return
+
+    try:
+        data = json.load(fileobj)
+    except ValueError as e:
+        yield 1, None, f"Invalid JSON: {e}"
+        return
+    tables = data if isinstance(data, list) else [data]
+    for row_number, table in enumerate(tables, start=1):
+        if not isinstance(table, dict) or not isinstance(table.get("rates"), dict):
+            yield row_number, None, "Expected an object with base, date and rates"
+            continue
+        for quote, rate in table["rates"].items():
+            if str(quote).upper() == str(table.get("base", "")).upper():
+                continue  # upstream tables list the base itself at 1
+            try:
+                yield row_number, _rate_row(table.get("base"), quote, table.get("date"), rate), None
+            except ValueError as e:
+                yield row_number, None, f"{quote}: {e}"
+
+
+class _Report:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[schemas.RateImportError] = []
+
+    def add_error(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append(schemas.RateImportError(row=row, error=error))
+
+    def result(self) -> schemas.RateImportReport:
+        return schemas.RateImportReport(
+            imported=self.imported,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+        )
+
+
+def _batches(records: Iterable[RateRecord], report: _Report) -> Iterator[List[dict]]:
+    """
+    Valid rows in upsert batches. A key repeated within a batch keeps its
+    last rate, since one INSERT cannot update the same row twice.
+    """
+    batch: Dict[Tuple[str, str, date], dict] = {}
+    for row_number, row, error in records:
+        if error:
+            report.add_error(row_number, error)
+            continue
+        batch[(row["base"], row["quote"], row["date"])] = row
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+def _upsert():
+    stmt = pg_insert(models.ExchangeRate)
+    return stmt.on_conflict_do_update(
+        index_elements=[models.ExchangeRate.base, models.ExchangeRate.quote, models.ExchangeRate.date],
+        set_={"rate": stmt.excluded.rate},
+    )
+
+
+async def import_rates(db: AsyncSession, fileobj: IO[bytes], fmt: str) -> schemas.RateImportReport:
+    """
+    Upserts the rates of an uploaded file in IMPORT_BATCH_SIZE chunks and
+    commits once; a re-imported date replaces the earlier rates. Parsing
+    runs on the threadpool since the upload is a sync file. Raises
+    RateImportError, with nothing imported, for a file that cannot be read.
+    """
+    report = _Report()
+    batches = _batches(iter_rates(fileobj, fmt), report)
+    try:
+        while True:
+            batch = await run_in_threadpool(next, batches, None)
+            if batch is None:
+                break
+            await db.execute(_upsert(), batch)
+            report.imported += len(batch)
+    except RateImportError:
+        await db.rollback()
+        raise
+    await db.commit()
+    return report.result()
+
+
+def import_rates_sync(conn, fileobj: IO[bytes], fmt: str) -> schemas.RateImportReport:
+    """
+    import_rates for scripts, on a connection of the sync engine.
+    """
+    report = _Report()
+    for batch in _batches(iter_rates(fileobj, fmt), report):
+        conn.execute(_upsert(), batch)
+        report.imported += len(batch)
+    return report.result()
+
+
+# --- Conversion ---
+
+# The cross rate currency -> target through base P is P->target / P->currency,
+# both from P's table of the same date; on equal dates a stored pair wins.
+_RATES_QUERY = text(
+    "SELECT k.currency, k.day, r.date, r.rate, r.inverse"
+    " FROM unnest(CAST(:currencies AS varchar[]), CAST(:days AS date[])) AS k (currency, day)"
+    " CROSS JOIN LATERAL ("
+    "   (SELECT date, rate, false AS inverse, 0 AS preference FROM exchange_rates"
+    "     WHERE base = :target AND quote = k.currency AND date <= k.day AND date >= k.day - CAST(:max_age AS integer)"
+    "     ORDER BY date DESC LIMIT 1)"
+    "   UNION ALL"
+    "   (SELECT date, rate, true AS inverse, 1 AS preference FROM exchange_rates"
+    "     WHERE base = k.currency AND quote = :target AND date <= k.day AND date >= k.day - CAST(:max_age AS integer)"
+    "     ORDER BY date DESC LIMIT 1)"
+    "   UNION ALL"
+    "   (SELECT c.date, round(t.rate / c.rate, 12), true AS inverse, 2 AS preference FROM exchange_rates c"
+    "     JOIN exchange_rates t ON t.base = c.base AND t.quote = :target AND t.date = c.date"
+    "     WHERE c.base = ANY(CAST(:cross_bases AS varchar[])) AND c.quote = k.currency"
+    "       AND c.date <= k.day AND c.date >= k.day - CAST(:max_age AS integer)"
+    "     ORDER BY c.date DESC LIMIT 1)"
+    "   ORDER BY date DESC, preference LIMIT 1"
+    " ) AS r"
+)
+
+
+async def get_rates_for(
+    db: AsyncSession, pairs: Iterable[Tuple[str, date]], target_currency: str
+) -> Dict[Tuple[str, date], Tuple[Decimal, bool, date]]:
+    """
+    {(currency, day): (rate, inverse, rate date)} for every pair that has a
+    rate, in one query. Each branch is an index range scan on the primary
+    key. `inverse` means the rate is currency -> target (stored that way or
+    crossed) rather than target -> currency.
+    """
+    pairs = sorted(set(pairs))
+    if not pairs:
+        return {}
+    result = await db.execute(_RATES_QUERY, {
+        "currencies": [currency for currency, _ in pairs],
+        "days": [day for _, day in pairs],
+        "target": target_currency,
+        "max_age": EXCHANGE_RATE_MAX_AGE_DAYS,
+        "cross_bases": [base for base in EXCHANGE_RATE_CROSS_BASES if base != target_currency],
+    })
+    return {(currency, day): (rate, inverse, rate_date) for currency, day, rate_date, rate, inverse in result}
+
+
+async def convert_many(
+    db: AsyncSession, items: Sequence[Tuple[Decimal, str, date]], target_currency: str
+) -> List[Optional[Conversion]]:
+    """
+    Converts (amount, currency, date) items into target_currency at the
+    rate of each item's date, in input order; None where no rate is known.
+
+    Amounts are multiplied or divided at full Decimal precision and rounded
+    once, half to even, to cents, like exchange_rates.to_base.
+    """
+    target = target_currency.upper()
+    keys = [(currency.upper(), day) for _, currency, day in items]
+    rates = await get_rates_for(db, (key for key in keys if key[0] != target), target)
+
+    one = Decimal(1)
+    converted: List[Optional[Conversion]] = []
+    with localcontext() as context:
+        context.prec = 34
+        for (amount, _, _), key in zip(items, keys):
+            if key[0] == target:
+                converted.append(Conversion(amount.quantize(exchange_rates.CENT, rounding=ROUND_HALF_EVEN), one, None))
+                continue
+            found = rates.get(key)
+            if found is None:
+                converted.append(None)
+                continue
+            rate, inverse, rate_date = found
+            effective = rate if inverse else (one / rate).quantize(RATE_PLACES)
+            value = amount * rate if inverse else amount / rate
+            converted.append(Conversion(value.quantize(exchange_rates.CENT, rounding=ROUND_HALF_EVEN), effective, rate_date))
+    return converted
+
+
+# --- Command line ---
+
+def _rate_files(paths: List[str]) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith((".csv", ".json"))
+            )
+        else:
+            files.append(path)
+    return files
+
+
+async def _latest_tables(bases: List[str]) -> List[dict]:
+    try:
+        return [
+            {"base": base.upper(), "date": date.today().isoformat(), "rates": await exchange_rates.fetch_rates(base.upper())}
+            for base in bases
+        ]
+    finally:
+        await exchange_rates.close_client()
+
+
+if __name__ == "__main__":
+    from app.db.session import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "import":
+        files = _rate_files(sys.argv[2:] or [BUNDLED_HISTORY_DIR] + [
+            path for path in [EXCHANGE_RATE_HISTORY_DIR] if os.path.isdir(path)
+        ])
+        if not files:
+            sys.exit("No rate files found")
+        for path in files:
+            try:
+                with open(path, "rb") as f, engine.begin() as conn:
+                    report = import_rates_sync(conn, f, detect_format(path, None))
+            except RateImportError as e:
+                print(f"{path}: not imported: {e.detail}")
+                continue
+            print(f"{path}: {report.imported} rate(s) imported, {report.failed} failed")
+            for error in report.errors[:10]:
+                print(f"  row {error.row}: {error.error}")
+    elif command == "latest" and len(sys.argv) > 2:
+        tables = asyncio.run(_latest_tables(sys.argv[2:]))
+        with engine.begin() as conn:
+            report = import_rates_sync(conn, io.BytesIO(json.dumps(tables).encode()), "json")
+        print(f"{report.imported} rate(s) recorded for {date.today()}, {report.failed} failed")
+    else:
+        sys.exit("usage: python -m app.services.rate_history import [FILE_OR_DIR ...] | latest BASE [BASE ...]")
@@ -0,0 +1,168 @@
+# File: backend/app/services/receipt_extraction.py
+#
+# CPU-bound part of receipt processing: get text out of a stored receipt
+# and pick out the total, the date and the merchant. Runs inside the
+# receipt job worker processes, never in the API.
+#
+# PDFs are read with a small built-in extractor (text-show operators of the
+# content streams), which covers the machine-generated receipts that make
+# up most uploads. Photos need OCR, which is used when pytesseract and
+# Pillow are installed; without them image receipts yield no fields.
+
+import re
+import zlib
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional
+
+from app.core.config import RECEIPT_PDF_MAX_STREAM_BYTES
+
+_STREAM = re.compile(rb"<<(.*?)>>\s*stream\r?\n(.*?)\r?\nendstream", re.S)
+_TEXT_OP = re.compile(rb"\((?:\\.|[^\\)])*\)\s*(?:Tj|'|\")|\[(?:\\.|[^\]])*\]\s*TJ|T\*|Td|TD|ET", re.S)
+_LITERAL = re.compile(rb"\(((?:\\.|[^\\)])*)\)", re.S)
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f", b"(": b"(", b")": b")", b"\\": b"\\"}
+
+
+def _unescape(literal: bytes) -> bytes:
+    def replace(match):
+        escaped = match.group(1)
+        if escaped[:1].isdigit():
+            return bytes([int(escaped, 8) & 0xFF])
+        return _ESCAPES.get(escaped, escaped)
+    return re.sub(rb"\\([0-7]{1,3}|.)", replace, literal, flags=re.S)
+
+
+def pdf_text(data: bytes) -> str:
+    lines: List[bytes] = []
+    current = b""
+    for dictionary, stream in _STREAM.findall(data):
+        if b"/FlateDecode" in dictionary:
+            inflater = zlib.decompressobj()
+            try:
+                stream = inflater.decompress(stream, RECEIPT_PDF_MAX_STREAM_BYTES)
+            except zlib.error:
+                continue
+            if inflater.unconsumed_tail:
+                continue  # inflates past the limit
+        elif b"/Filter" in dictionary:
+            continue  # images and other encodings carry no text we can read
+        for op in _TEXT_OP.finditer(stream):
+            token = op.group(0)
+            if token in (b"T*", b"Td", b"TD", b"ET"):
+                if current.strip():
+                    lines.append(current)
+                current = b""
+            else:
+                current += b"".join(_unescape(part) for part in _LITERAL.findall(token))
+    if current.strip():
+        lines.append(current)
+    return "\n".join(line.decode("latin-1").strip() for line in lines)
+
+
+def image_text(path: str) -> str:
+    try:
+        import pytesseract
+        from PIL import Image
+    except ImportError:
+        return ""
+    with Image.open(path) as image:
+        image.draft("L", (2000, 2000))  # decode JPEGs at reduced size when they are huge
+        return pytesseract.image_to_string(image.convert("L"))
+
+
+def extract_text(path: str, content_type: Optional[str]) -> str:
+    if content_type == "application/pdf":
+        with open(path, "rb") as f:
+            return pdf_text(f.read())
+    if (content_type or "").startswith("image/"):
+        return image_text(path)
+    return ""
+
+
+# --- Field parsing ---
+
+_MONEY = r"(\d{1,3}(?:[,\s]\d{3})*(?:[.,]\d{2})|\d+(?:[.,]\d{2}))"
+_TOTAL_LINE = re.compile(r"(?i)\b(grand\s+total|total\s+due|amount\s+due|balance\s+due|total)\b[^\d\n]*" + _MONEY)
+_ANY_MONEY = re.compile(_MONEY)
+_DATE_PATTERNS = [
+    (re.compile(r"\b(\d{4}-\d{2}-\d{2})\b"), ["%Y-%m-%d"]),
+    (re.compile(r"\b(\d{1,2}[/.]\d{1,2}[/.]\d{4})\b"), ["%d/%m/%Y", "%m/%d/%Y", "%d.%m.%Y"]),
+    (re.compile(r"\b(\d{1,2}[/.]\d{1,2}[/.]\d{2})\b"), ["%d/%m/%y", "%m/%d/%y", "%d.%m.%y"]),
+    (re.compile(r"\b(\d{1,2} [A-Za-z]{3,9},? \d{4})\b"), ["%d %b %Y", "%d %B %Y", "%d %b, %Y", "%d %B, %Y"]),
+    (re.compile(r"\b([A-Za-z]{3,9} \d{1,2},? \d{4})\b"), ["%b %d, %Y", "%B %d, %Y", "%b %d %Y", "%B %d %Y"]),
+]
+
+
+def _to_decimal(text: str) -> Optional[Decimal]:
+    text = text.replace(" ", "")
+    # "1.234,56" / "1,234.56": the last separator is the decimal one.
+    if "," in text and (text.rfind(",") > text.rfind(".")):
+        text = text.replace(".", "").replace(",", ".")
+    else:
+        text = text.replace(",", "")
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        return None
+
+
+def parse_amount(text: str) -> Optional[Decimal]:
+    """
+    The last "total"-like line wins; otherwise the largest amount on the
+    receipt.
+    """
+    totals = [_to_decimal(match.group(2)) for match in _TOTAL_LINE.finditer(text)]
+    totals = [amount for amount in totals if amount is not None]
+    if totals:
+        return totals[-1]
+    amounts = [_to_decimal(match) for match in _ANY_MONEY.findall(text)]
+    amounts = [amount for amount in amounts if amount is not None]
+    return max(amounts) if amounts else None
+
+
+def parse_date(text: str, today: Optional[date] = None) -> Optional[date]:
+    today = today or date.today()
+    for pattern, formats in _DATE_PATTERNS:
+        for match in pattern.findall(text):
+            for fmt in formats:
+                try:
+                    found = datetime.strptime(match, fmt).date()
+                except ValueError:
+                    continue
+                if found <= today:
+                    return found
+    return None
+
+
+def parse_merchant(text: str) -> Optional[str]:
+    """
+    Receipts print the merchant at the top: the first line that has
+    letters and is not a date or an amount.
+    """
+    for line in text.splitlines():
+        line = line.strip()
+        if len(line) < 3 or not re.search(r"[A-Za-z]{2}", line):
+            continue
+        if parse_date(line) or _TOTAL_LINE.search(line):
+            continue
+        return line[:255]
+    return None
+
+
+def extract_fields(path: str, content_type: Optional[str]) -> Dict[str, str]:
+    """
+    Returns the fields found on the receipt as JSON-ready strings; missing
+    fields are left out.
+    """
+    text = extract_text(path, content_type)
+    fields = {}
+    amount = parse_amount(text)
+    if amount is not None:
+        fields["amount"] = str(amount)
+    expense_date = parse_date(text)
+    if expense_date is not None:
+        fields["expense_date"] = expense_date.isoformat()
+    merchant = parse_merchant(text)
+    if merchant:
+        fields["merchant"] = merchant
+    return fields
@@ -0,0 +1,226 @@
+# File: backend/app/services/receipt_jobs.py
+#
+# Receipt processing queue.
+#
+# Jobs live in the receipt_jobs table. Uploading a receipt enqueues a job in
+# the same transaction; worker processes claim runnable jobs one at a time
+# with SELECT ... FOR UPDATE SKIP LOCKED, so any number of processes (on
+# any number of hosts) can share the queue without handing out a job
+# twice. The CPU-heavy work (services/receipt_extraction.py) runs in the
+# worker process, never in the API.
+#
+# A failed attempt is retried with exponential backoff until max_attempts;
+# a job left "running" by a worker that died is claimed again once its lock
+# is older than RECEIPT_JOB_LOCK_TIMEOUT_SECONDS, or marked failed if it has
+# no attempts left.
+#
+#   python -m app.services.receipt_jobs --processes 4
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import traceback
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Optional
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import (
+    RECEIPT_JOB_BACKOFF_MAX_SECONDS,
+    RECEIPT_JOB_BACKOFF_SECONDS,
+    RECEIPT_JOB_LOCK_TIMEOUT_SECONDS,
+    RECEIPT_JOB_MAX_ATTEMPTS,
+    RECEIPT_JOB_POLL_SECONDS,
+    RECEIPT_JOB_WORKERS,
+)
+from app.db import base as models
+from app.db.session import AsyncSessionLocal, async_engine
+from app.services import blob_store, collection_versions, receipt_extraction, rollups
+
+
+def enqueue(db: AsyncSession, receipt_id: uuid.UUID, expense_id: uuid.UUID) -> models.ReceiptJob:
+    """
+    Adds a job for a receipt to the session; it is queued when the caller
+    commits.
+    """
+    job = models.ReceiptJob(
+        id=uuid.uuid4(),
+        receipt_id=receipt_id,
+        expense_id=expense_id,
+        status=models.JobStatus.queued,
+        attempts=0,
+        max_attempts=RECEIPT_JOB_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    return job
+
+
+async def get_latest_job(db: AsyncSession, receipt_id: uuid.UUID) -> Optional[models.ReceiptJob]:
+    result = await db.execute(
+        select(models.ReceiptJob)
+        .where(models.ReceiptJob.receipt_id == receipt_id)
+        .order_by(models.ReceiptJob.created_at.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+def backoff_seconds(attempts: int) -> float:
+    delay = min(RECEIPT_JOB_BACKOFF_SECONDS * 2 ** (attempts - 1), RECEIPT_JOB_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+# --- Worker side ---
+
+_CLAIM = text(
+    "UPDATE receipt_jobs SET status = 'running', attempts = attempts + 1,"
+    " locked_by = :worker, locked_at = now()"
+    " WHERE id = ("
+    "  SELECT id FROM receipt_jobs"
+    "  WHERE (status = 'queued' AND run_after <= now())"
+    "     OR (status = 'running' AND locked_at < now() - make_interval(secs => :lock_timeout)"
+    "         AND attempts < max_attempts)"
+    "  ORDER BY run_after"
+    "  LIMIT 1"
+    "  FOR UPDATE SKIP LOCKED)"
+    " RETURNING id, receipt_id, expense_id, attempts, max_attempts"
+)
+
+# Jobs whose worker died on their last attempt
+_FAIL_ABANDONED = text(
+    "UPDATE receipt_jobs SET status = 'failed', finished_at = now(), locked_by = NULL, locked_at = NULL,"
+    " last_error = 'Worker stopped responding on the last attempt'"
+    " WHERE status = 'running' AND attempts >= max_attempts"
+    " AND locked_at < now() - make_interval(secs => :lock_timeout)"
+)
+
+
+async def claim(db: AsyncSession, worker: str):
+    """
+    Takes the oldest runnable job, or returns None when the queue is empty.
+    Abandoned jobs with no attempts left are failed on the way.
+    """
+    params = {"worker": worker, "lock_timeout": RECEIPT_JOB_LOCK_TIMEOUT_SECONDS}
+    await db.execute(_FAIL_ABANDONED, params)
+    row = (await db.execute(_CLAIM, params)).first()
+    await db.commit()
+    return row
+
+
+async def _apply_fields(db: AsyncSession, expense_id: uuid.UUID, fields: Dict[str, str]):
+    """
+    Copies the extracted fields onto the expense if it is still a draft,
+    keeping the rollups in step (amount and date are part of their key).
+    """
+    expense = await db.get(models.Expense, expense_id, with_for_update=True)
+    if not expense or expense.status != models.ExpenseStatus.draft or not fields:
+        return
+    await rollups.remove_expenses(db, [expense_id])
+    if "amount" in fields:
+        expense.amount = Decimal(fields["amount"])
+    if "expense_date" in fields:
+        expense.expense_date = date.fromisoformat(fields["expense_date"])
+    if "merchant" in fields:
+        expense.merchant = fields["merchant"]
+    await db.flush()
+    await rollups.add_expenses(db, [expense_id])
+    await collection_versions.bump_expenses(db, [expense.employee_id])
+
+
+async def _succeed(db: AsyncSession, job, fields: Dict[str, str]):
+    await _apply_fields(db, job.expense_id, fields)
+    await db.execute(
+        update(models.ReceiptJob)
+        .where(models.ReceiptJob.id == job.id)
+        .values(status=models.JobStatus.succeeded, result=fields, last_error=None,
+                locked_by=None, locked_at=None, finished_at=func.now())
+    )
+    await db.commit()
+
+
+async def _fail(db: AsyncSession, job, error: str):
+    await db.rollback()
+    values = {"last_error": error[-4000:], "locked_by": None, "locked_at": None}
+    if job.attempts >= job.max_attempts:
+        values.update(status=models.JobStatus.failed, finished_at=func.now())
+    else:
+        values.update(
+            status=models.JobStatus.queued,
+            run_after=func.now() + timedelta(seconds=backoff_seconds(job.attempts)),
+        )
+    await db.execute(update(models.ReceiptJob).where(models.ReceiptJob.id == job.id).values(**values))
+    await db.commit()
+
+
+async def process(db: AsyncSession, job):
+    receipt = await db.get(models.Receipt, job.receipt_id)
+    if receipt is None or not receipt.sha256:
+        raise ValueError("Receipt has no stored file")
+    path, content_type = blob_store.blob_path(receipt.sha256), receipt.content_type
+    # Do not keep a transaction open during the CPU-bound part.
+    await db.rollback()
+    return receipt_extraction.extract_fields(path, content_type)
+
+
+async def work(worker: str, stop) -> int:
+    """
+    Claims and runs jobs until `stop` is set; returns the number of jobs
+    handled. Each worker process runs one of these.
+    """
+    handled = 0
+    try:
+        while not stop.is_set():
+            async with AsyncSessionLocal() as db:
+                job = await claim(db, worker)
+                if job is None:
+                    await asyncio.sleep(RECEIPT_JOB_POLL_SECONDS)
+                    continue
+                try:
+                    fields = await process(db, job)
+                    await _succeed(db, job, fields)
+                except Exception:
+                    await _fail(db, job, traceback.format_exc())
+                handled += 1
+    finally:
+        await async_engine.dispose()
+    return handled
+
+
+def _run_worker(index: int, stop):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent decides when to stop
+    worker = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    handled = asyncio.run(work(worker, stop))
+    print(f"-> Worker {worker} stopped after {handled} job(s).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run receipt processing workers")
+    parser.add_argument("--processes", type=int, default=RECEIPT_JOB_WORKERS)
+    args = parser.parse_args()
+
+    # spawn: each worker builds its own engine and connection pool
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    workers = [context.Process(target=_run_worker, args=(index, stop), daemon=True) for index in range(args.processes)]
+    for proc in workers:
+        proc.start()
+    print(f"-> Started {len(workers)} receipt worker process(es).")
+
+    def request_stop(signum, frame):
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    for proc in workers:
+        proc.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# File: backend/app/services/receipts.py
+#
+# Receipt uploads and access checks.
+#
+# Uploads bypass Starlette's form parsing (which spools every file to a
+# temporary file first): the multipart body is parsed as it arrives and the
+# bytes of the file field go straight into the blob store, one network
+# chunk at a time.
+
+import uuid
+from typing import AsyncIterator, Dict, List, Optional
+
+import python_multipart
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import parse_options_header
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from app.core.config import RECEIPT_CONTENT_TYPES, RECEIPT_MAX_BYTES
+from app.core.principal_cache import Principal
+from app.crud import crud_user
+from app.db import base as models
+from app.services import blob_store, collection_versions, receipt_jobs
+
+# Room for the multipart boundaries and part headers around the file itself.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class MultipartFile:
+    """
+    Reads one file field out of a multipart/form-data request body as the
+    body arrives. Call open() to read up to the field's headers, then
+    iterate chunks() for its content. Other fields are skipped.
+    """
+
+    def __init__(self, request: Request, field_name: str):
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+            raise UploadError(400, "Expected a multipart/form-data body")
+        self.field_name = field_name.encode()
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+
+        self._body = request.stream()
+        self._pending: List[bytes] = []
+        self._found = False
+        self._done = False
+        self._in_field = False
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._parser = python_multipart.MultipartParser(params[b"boundary"], callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    # Parser callbacks (called synchronously from parser.write)
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if self._found or options.get(b"name") != self.field_name:
+            return
+        self._found = self._in_field = True
+        self.filename = options.get(b"filename", b"").decode("utf-8", "replace") or None
+        content_type, _ = parse_options_header(self._headers.get(b"content-type", b"application/octet-stream"))
+        self.content_type = content_type.decode("latin-1").lower()
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_field:
+            self._pending.append(bytes(data[start:end]))
+
+    def _on_part_end(self):
+        if self._in_field:
+            self._in_field = False
+            self._done = True
+
+    async def _feed(self) -> bool:
+        try:
+            chunk = await self._body.__anext__()
+        except StopAsyncIteration:
+            self._parser.finalize()
+            return False
+        try:
+            self._parser.write(chunk)
+        except MultipartParseError as e:
+            raise UploadError(400, f"Malformed multipart body: {e}")
+        return True
+
+    async def open(self):
+        while not self._found:
+            if not await self._feed():
+                raise UploadError(400, f"Missing file field '{self.field_name.decode()}'")
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        while True:
+            if self._pending:
+                data = b"".join(self._pending)
+                self._pending.clear()
+                yield data
+            if self._done:
+                return
+            if not await self._feed():
+                raise UploadError(400, "Upload ended before the file was complete")
+
+
+def download_url(expense_id: uuid.UUID, receipt_id: uuid.UUID) -> str:
+    return f"/api/v1/expenses/{expense_id}/receipts/{receipt_id}"
+
+
+async def store_receipt(db: AsyncSession, expense_id: uuid.UUID, request: Request, field_name: str = "file") -> models.Receipt:
+    """
+    Streams the uploaded file into the blob store, records a Receipt for
+    the expense and queues its processing job. Identical files share one
+    blob. The session's transaction
+    is ended first so no pooled connection is held while the body arrives.
+    """
+    await db.rollback()
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > RECEIPT_MAX_BYTES + MULTIPART_OVERHEAD_BYTES:
+        raise UploadError(413, f"Receipts are limited to {RECEIPT_MAX_BYTES} bytes")
+
+    upload = MultipartFile(request, field_name)
+    await upload.open()
+    if upload.content_type not in RECEIPT_CONTENT_TYPES:
+        raise UploadError(415, f"Unsupported receipt type '{upload.content_type}'")
+    try:
+        blob = await blob_store.save(upload.chunks())
+    except blob_store.BlobTooLarge:
+        raise UploadError(413, f"Receipts are limited to {RECEIPT_MAX_BYTES} bytes")
+    if blob.size == 0:
+        raise UploadError(400, "The uploaded file is empty")
+
+    receipt_id = uuid.uuid4()
+    receipt = models.Receipt(
+        id=receipt_id,
+        expense_id=expense_id,
+        file_url=download_url(expense_id, receipt_id),
+        sha256=blob.sha256,
+        size_bytes=blob.size,
+        content_type=upload.content_type,
+        filename=upload.filename,
+    )
+    db.add(receipt)
+    # Text extraction runs in the receipt workers, not in this request.
+    receipt_jobs.enqueue(db, receipt_id, expense_id)
+    # Expanded list pages show receipts
+    await collection_versions.bump_expense_owners(db, [expense_id])
+    await db.commit()
+    await db.refresh(receipt)
+    return receipt
+
+
+async def can_view(db: AsyncSession, principal: Principal, expense: models.Expense) -> bool:
+    """
+    The submitter, admins of the company, managers above the submitter and
+    anyone the expense is waiting on may see its receipts.
+    """
+    if expense.employee_id == principal.id:
+        return True
+    if expense.company_id != principal.company_id:
+        return False
+    if principal.role == models.UserRole.admin:
+        return True
+    if await crud_user.is_in_subtree(db, principal.id, expense.employee_id):
+        return True
+    queued = await db.execute(
+        select(models.ApprovalInbox.expense_id).where(
+            models.ApprovalInbox.approver_id == principal.id,
+            models.ApprovalInbox.expense_id == expense.id,
+        )
+    )
+    return queued.first() is not None
+
+
+async def get_receipt(db: AsyncSession, expense_id: uuid.UUID, receipt_id: uuid.UUID) -> Optional[models.Receipt]:
+    receipt = await db.get(models.Receipt, receipt_id)
+    if receipt is None or receipt.expense_id != expense_id:
+        return None
+    return receipt
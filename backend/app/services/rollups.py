@@ -0,0 +1,200 @@
+# File: backend/app/services/rollups.py
+#
+# Spending rollups.
+#
+# expense_rollups holds amount and count per (company, employee, category,
+# month, status, currency). Every write path that inserts an expense or
+# changes its status or key fields calls add_expenses / change_status /
+# remove_expenses in the same transaction, before committing, so the
+# rollups move together with the expenses. Each call is one
+# INSERT ... SELECT ... ON CONFLICT DO UPDATE that adds signed deltas,
+# whatever the number of expenses.
+#
+# Groups whose expenses all moved to another status stay behind with a zero
+# count; readers ignore them. `python -m app.services.rollups check`
+# compares the table against a full recomputation and `rebuild` recomputes
+# it after bulk loads that bypass crud_expense.
+
+import sys
+import uuid
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, cast, func, literal, select, text, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import base as models, migrations
+from app.services import exchange_rates
+
+KEY = ("company_id", "employee_id", "category", "month", "status", "currency")
+GROUP_BY = ("employee", "category", "month")
+
+
+def _deltas(status, sign: int):
+    expense = models.Expense
+    return select(
+        expense.company_id,
+        expense.employee_id,
+        func.coalesce(expense.category, "").label("category"),
+        cast(func.date_trunc("month", expense.expense_date), Date).label("month"),
+        status.label("status"),
+        expense.currency,
+        (expense.amount * sign).label("total_amount"),
+        literal(sign).label("expense_count"),
+    )
+
+
+async def _apply(db: AsyncSession, deltas):
+    rows = deltas.subquery()
+    key = [rows.c[name] for name in KEY]
+    stmt = pg_insert(models.ExpenseRollup).from_select(
+        [*KEY, "total_amount", "expense_count"],
+        select(*key, func.sum(rows.c.total_amount), func.sum(rows.c.expense_count)).group_by(*key),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(KEY),
+        set_={
+            "total_amount": models.ExpenseRollup.total_amount + stmt.excluded.total_amount,
+            "expense_count": models.ExpenseRollup.expense_count + stmt.excluded.expense_count,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def add_expenses(db: AsyncSession, expense_ids: List[uuid.UUID]):
+    """
+    Counts newly inserted expenses under their current status. Call after
+    the INSERT has been flushed.
+    """
+    if not expense_ids:
+        return
+    await _apply(db, _deltas(models.Expense.status, 1).where(models.Expense.id.in_(expense_ids)))
+
+
+async def remove_expenses(db: AsyncSession, expense_ids: List[uuid.UUID]):
+    """
+    Takes expenses out of the rollups, e.g. before changing the amount,
+    date or category of a draft; call add_expenses again after the UPDATE.
+    """
+    if not expense_ids:
+        return
+    await _apply(db, _deltas(models.Expense.status, -1).where(models.Expense.id.in_(expense_ids)))
+
+
+async def change_status(db: AsyncSession, expense_ids: List[uuid.UUID], status: models.ExpenseStatus):
+    """
+    Moves expenses from their current status to `status` in the rollups.
+    Call before the UPDATE, with the expense rows locked (or not yet
+    committed), since the old status is read from the table.
+    """
+    if not expense_ids:
+        return
+    new_status = cast(literal(status.value), models.Expense.status.type)
+    changed = (models.Expense.id.in_(expense_ids), models.Expense.status != status)
+    await _apply(db, union_all(
+        _deltas(models.Expense.status, -1).where(*changed),
+        _deltas(new_status, 1).where(*changed),
+    ))
+
+
+async def get_analytics(
+    db: AsyncSession,
+    company_id: uuid.UUID,
+    group_by: Iterable[str],
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> List[Tuple[dict, models.ExpenseStatus, str, Decimal, int]]:
+    """
+    Reads totals from the rollups only, grouped by the requested dimensions
+    plus status and currency. Returns (group, status, currency, total,
+    count) tuples; date_from/date_to select whole months.
+    """
+    rollup = models.ExpenseRollup
+    columns = {"employee": rollup.employee_id, "category": rollup.category, "month": rollup.month}
+    dimensions = [name for name in GROUP_BY if name in set(group_by)]
+    keys = [columns[name] for name in dimensions] + [rollup.status, rollup.currency]
+
+    stmt = (
+        select(*keys, func.sum(rollup.total_amount), func.sum(rollup.expense_count))
+        .where(rollup.company_id == company_id, rollup.expense_count != 0)
+        .group_by(*keys)
+    )
+    if date_from is not None:
+        stmt = stmt.where(rollup.month >= date_from.replace(day=1))
+    if date_to is not None:
+        stmt = stmt.where(rollup.month <= date_to.replace(day=1))
+
+    results = []
+    for row in await db.execute(stmt):
+        group = dict(zip(dimensions, row[:len(dimensions)]))
+        status, currency, total, count = row[len(dimensions):]
+        results.append((group, status, currency, total, int(count)))
+    return results
+
+
+def merge_in_base(rows, base_currency: str, rates: Dict[str, float]):
+    """
+    Converts get_analytics rows to the base currency and merges the
+    currencies of each (group, status). Returns the merged rows and the
+    currencies that had no rate (left out of the totals, but counted).
+    """
+    merged: Dict[tuple, list] = defaultdict(lambda: [Decimal("0"), 0])
+    missing = set()
+    for group, status, currency, total, count in rows:
+        entry = merged[(tuple(sorted(group.items())), status)]
+        converted = exchange_rates.to_base(total, currency, base_currency, rates)
+        if converted is None:
+            missing.add(currency)
+        else:
+            entry[0] += converted
+        entry[1] += count
+    ordered = sorted(merged.items(), key=lambda item: (str(item[0][0]), item[0][1].value))
+    return (
+        [(dict(group), status, total, count) for (group, status), (total, count) in ordered],
+        sorted(missing),
+    )
+
+
+def find_mismatches(conn: Connection, company_id: Optional[uuid.UUID] = None, limit: int = 20) -> List[tuple]:
+    """
+    Returns rollup keys whose stored totals differ from a full
+    recomputation over expenses (empty when they agree), optionally for
+    one company only.
+    """
+    key = ", ".join(KEY)
+    params = {"limit": limit}
+    scope = ""
+    if company_id is not None:
+        params["company_id"] = company_id
+        scope = " AND company_id = :company_id"
+    return conn.execute(text(
+        f"SELECT {key}, s.total_amount, s.expense_count, f.total_amount, f.expense_count"
+        f" FROM (SELECT * FROM expense_rollups WHERE expense_count <> 0) s"
+        f" FULL JOIN ({migrations.EXPENSE_ROLLUPS_SELECT}) f USING ({key})"
+        " WHERE (s.total_amount IS DISTINCT FROM f.total_amount"
+        " OR s.expense_count IS DISTINCT FROM f.expense_count)"
+        f"{scope} LIMIT :limit"
+    ), params).all()
+
+
+if __name__ == "__main__":
+    from app.db.session import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if command == "rebuild":
+        with engine.begin() as conn:
+            migrations.rebuild_expense_rollups(conn)
+        print("Expense rollups rebuilt.")
+    elif command == "check":
+        with engine.connect() as conn:
+            mismatches = find_mismatches(conn)
+        for row in mismatches:
+            print("mismatch:", row)
+        print("Expense rollups match a full recomputation." if not mismatches else "Expense rollups are out of date.")
+        sys.exit(1 if mismatches else 0)
+    else:
+        sys.exit("usage: python -m app.services.rollups [check|rebuild]")
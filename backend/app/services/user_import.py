@@ -0,0 +1,287 @@
+# File: backend/app/services/user_import.py
+#
+# Bulk user provisioning (POST /admin/users/bulk).
+#
+# Rows are validated and resolved up front: duplicate or existing emails,
+# unknown managers and manager cycles are reported per row, and a row
+# whose manager row failed fails with it. Managers may be existing users
+# of the company or other rows of the import (by email); rows are ordered
+# so every manager comes before its reports. Passwords of the remaining
+# rows are hashed in parallel on the bulk hashing process pool, then all
+# users and their hierarchy closure rows go in with one bulk INSERT each,
+# in a single transaction.
+
+import csv
+import io
+import json
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.schemas import schemas
+from app.core.config import IMPORT_MAX_ERRORS, USER_IMPORT_MAX_ROWS
+from app.core.security import get_password_hashes_async
+from app.db import base as models
+from app.services.expense_import import Record, format_validation_error, iter_records
+
+FORMATS = ("json", "csv", "ndjson")
+
+
+class UserImportError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def detect_format(content_type: Optional[str]) -> Optional[str]:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type == "application/json":
+        return "json"
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def _iter_json(body: bytes) -> Iterator[Record]:
+    try:
+        records = json.loads(body)
+    except ValueError as e:
+        raise UserImportError(400, f"Invalid JSON: {e}")
+    if not isinstance(records, list):
+        raise UserImportError(400, "Expected a JSON array of user objects")
+    for row_number, record in enumerate(records, start=1):
+        if isinstance(record, dict):
+            yield row_number, record, None
+        else:
+            yield row_number, None, "Expected a JSON object"
+
+
+class _Row:
+    def __init__(self, number: int, data: schemas.UserImportRow):
+        self.number = number
+        self.data = data
+        self.id = uuid.uuid4()
+        # Exactly one of these is set for users with a manager
+        self.manager_id: Optional[uuid.UUID] = None
+        self.manager_row: Optional["_Row"] = None
+
+
+class _Report:
+    def __init__(self):
+        self.users: List[schemas.UserImportResult] = []
+        self.failed = 0
+        self.errors: List[schemas.UserImportError] = []
+
+    def add_error(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append(schemas.UserImportError(row=row, error=error))
+
+    def result(self) -> schemas.UserImportReport:
+        self.errors.sort(key=lambda error: error.row)
+        return schemas.UserImportReport(
+            created=len(self.users),
+            failed=self.failed,
+            users=self.users,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+        )
+
+
+def _validate(records: Iterator[Record], report: _Report) -> Tuple[List[_Row], Dict[str, int]]:
+    """
+    Parses the rows. Returns the valid ones and {email: row number} of the
+    rows that failed, so rows managed by them can say why they fail too.
+    """
+    rows: List[_Row] = []
+    failed_emails: Dict[str, int] = {}
+    seen: Dict[str, int] = {}
+    for row_number, record, parse_error in records:
+        if row_number > USER_IMPORT_MAX_ROWS:
+            raise UserImportError(413, f"At most {USER_IMPORT_MAX_ROWS} users per import")
+        if parse_error:
+            report.add_error(row_number, parse_error)
+            continue
+        data = {key: (value if value != "" else None) for key, value in record.items() if key}
+        try:
+            row = _Row(row_number, schemas.UserImportRow.parse_obj(data))
+        except ValidationError as e:
+            report.add_error(row_number, format_validation_error(e))
+            if isinstance(data.get("email"), str):
+                failed_emails.setdefault(data["email"], row_number)
+            continue
+        if row.data.email in seen:
+            report.add_error(row_number, f"email: duplicate of row {seen[row.data.email]}")
+            continue
+        seen[row.data.email] = row_number
+        if row.data.manager_id is not None and row.data.manager_email is not None:
+            report.add_error(row_number, "Give manager_id or manager_email, not both")
+            failed_emails[row.data.email] = row_number
+            continue
+        rows.append(row)
+    return rows, failed_emails
+
+
+async def _resolve_managers(db: AsyncSession, rows: List[_Row], failed_emails: Dict[str, int], company_id, report: _Report) -> List[_Row]:
+    """
+    Drops rows whose email is taken and links the rest to their managers,
+    looking up existing users with one query.
+    """
+    emails = {row.data.email for row in rows} | {row.data.manager_email for row in rows if row.data.manager_email}
+    manager_ids = {row.data.manager_id for row in rows if row.data.manager_id}
+    existing = (await db.execute(
+        select(models.User.id, models.User.email, models.User.company_id).where(
+            models.User.email.in_(emails) | models.User.id.in_(manager_ids)
+        )
+    )).all()
+    by_email = {email: (user_id, user_company) for user_id, email, user_company in existing}
+    company_user_ids = {user_id for user_id, _, user_company in existing if user_company == company_id}
+
+    available: Dict[str, _Row] = {}
+    for row in rows:
+        if row.data.email in by_email:
+            report.add_error(row.number, "email: a user with this email already exists")
+            failed_emails[row.data.email] = row.number
+        else:
+            available[row.data.email] = row
+
+    resolved = []
+    for row in available.values():
+        manager_email = row.data.manager_email
+        if row.data.manager_id is not None:
+            if row.data.manager_id not in company_user_ids:
+                report.add_error(row.number, f"manager_id: unknown user {row.data.manager_id}")
+                continue
+            row.manager_id = row.data.manager_id
+        elif manager_email is not None:
+            if manager_email in available:
+                row.manager_row = available[manager_email]
+            elif manager_email in failed_emails:
+                report.add_error(row.number, f"manager_email: manager row {failed_emails[manager_email]} failed")
+                continue
+            elif manager_email in by_email and by_email[manager_email][0] in company_user_ids:
+                row.manager_id = by_email[manager_email][0]
+            else:
+                report.add_error(row.number, f"manager_email: unknown user {manager_email}")
+                continue
+        resolved.append(row)
+    return resolved
+
+
+def _order(rows: List[_Row], report: _Report) -> List[_Row]:
+    """
+    Managers before their reports (iterative, management chains can be
+    deep). Rows in a management cycle fail, and so does everyone below a
+    failed row.
+    """
+    included = {row.number for row in rows}
+    ok: Dict[int, bool] = {}
+    ordered: List[_Row] = []
+    for start in rows:
+        path: List[_Row] = []
+        on_path = set()
+        row = start
+        upstream_ok = True
+        while row is not None and row.number not in ok:
+            if row.number not in included:
+                # Manager row was dropped while resolving
+                upstream_ok = False
+                break
+            if row.number in on_path:
+                cycle = path[path.index(row):]
+                for member in cycle:
+                    ok[member.number] = False
+                    report.add_error(member.number, "manager_email: management cycle")
+                path = path[:path.index(row)]
+                upstream_ok = False
+                break
+            on_path.add(row.number)
+            path.append(row)
+            row = row.manager_row
+        else:
+            upstream_ok = row is None or ok[row.number]
+        for member in reversed(path):
+            if upstream_ok:
+                ok[member.number] = True
+                ordered.append(member)
+            else:
+                ok[member.number] = False
+                report.add_error(member.number, f"manager_email: manager row {member.manager_row.number} failed")
+    return ordered
+
+
+async def _closure_rows(db: AsyncSession, rows: List[_Row]) -> List[dict]:
+    """
+    user_hierarchy rows for the new users: each links to itself and to
+    every ancestor of its manager. Ancestors of existing managers come
+    from one query; rows are in manager-first order.
+    """
+    existing_managers = {row.manager_id for row in rows if row.manager_id is not None}
+    ancestors: Dict[uuid.UUID, List[Tuple[uuid.UUID, int]]] = {}
+    if existing_managers:
+        result = await db.execute(
+            select(models.UserHierarchy.descendant_id, models.UserHierarchy.ancestor_id, models.UserHierarchy.depth)
+            .where(models.UserHierarchy.descendant_id.in_(existing_managers))
+        )
+        for descendant_id, ancestor_id, depth in result:
+            ancestors.setdefault(descendant_id, []).append((ancestor_id, depth))
+
+    closure_rows = []
+    for row in rows:
+        manager = row.manager_row.id if row.manager_row is not None else row.manager_id
+        chain = [(row.id, 0)] + [(ancestor_id, depth + 1) for ancestor_id, depth in ancestors.get(manager, [])]
+        ancestors[row.id] = chain
+        closure_rows += [{"ancestor_id": ancestor_id, "descendant_id": row.id, "depth": depth} for ancestor_id, depth in chain]
+    return closure_rows
+
+
+async def import_users(db: AsyncSession, body: bytes, fmt: str, company_id: uuid.UUID) -> schemas.UserImportReport:
+    """
+    Creates the valid users of an import in the given company, all in one
+    transaction, and reports the others per row.
+    """
+    records = _iter_json(body) if fmt == "json" else iter_records(io.BytesIO(body), fmt)
+    report = _Report()
+    try:
+        rows, failed_emails = _validate(records, report)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise UserImportError(400, f"Could not parse the {fmt.upper()} body: {e}")
+    rows = await _resolve_managers(db, rows, failed_emails, company_id, report)
+    rows = _order(rows, report)
+    if not rows:
+        return report.result()
+
+    # Do not hold a connection while the process pool hashes.
+    await db.rollback()
+    hashes = await get_password_hashes_async([row.data.password for row in rows])
+
+    closure_rows = await _closure_rows(db, rows)
+    try:
+        await db.execute(insert(models.User), [
+            {
+                "id": row.id,
+                "company_id": company_id,
+                "manager_id": row.manager_row.id if row.manager_row is not None else row.manager_id,
+                "email": row.data.email,
+                "password_hash": password_hash,
+                "role": models.UserRole.employee,
+            }
+            for row, password_hash in zip(rows, hashes)
+        ])
+        await db.execute(insert(models.UserHierarchy), closure_rows)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise UserImportError(409, "Users or managers changed during the import; nothing was created, please retry")
+    report.users = [
+        schemas.UserImportResult(row=row.number, id=row.id, email=row.data.email)
+        for row in sorted(rows, key=lambda row: row.number)
+    ]
+    return report.result()
@@ -0,0 +1,500 @@
+# File: backend/app/services/workflow.py
+#
+# Approval workflow engine.
+#
+# A workflow compiles into a StepPlan: an ordered list of stages, each a set
+# of approvers. Stage 0 is the employee's manager when
+# is_manager_first_approver is set; the remaining stages are the workflow
+# steps grouped by step_number. An expense waits in exactly one stage at a
+# time (expenses.approval_step) and every approver who can act on it right
+# now has a row in approval_inbox, so "what is waiting for me" is a single
+# indexed lookup.
+#
+# Rules applied on every decision:
+# - the special approver sits in the inbox from submission and decides alone;
+# - a rejection by the manager or an is_required approver rejects the
+#   expense, as does any rejection when there is no percentage rule;
+# - with min_approval_percentage, the expense is approved as soon as that
+#   share of all approvers has approved, and rejected if the last stage
+#   finishes below it;
+# - otherwise a stage advances once all its approvers have approved, and the
+#   expense is approved after the last stage.
+
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.schemas import schemas
+from app.core.config import WORKFLOW_PLAN_CACHE_SIZE, WORKFLOW_PLAN_CACHE_TTL_SECONDS
+from app.core.principal_cache import ExpiringLRUCache
+from app.db import base as models
+from app.services import collection_versions, notifications, rollups
+
+# Placeholder approver in a plan, resolved to the employee's manager per expense.
+MANAGER = None
+
+
+class Stage(NamedTuple):
+    approvers: Tuple[Optional[uuid.UUID], ...]
+    required: frozenset
+
+
+class StepPlan(NamedTuple):
+    workflow_id: uuid.UUID
+    stages: Tuple[Stage, ...]
+    min_approval_percentage: Optional[int]
+    special_approver_id: Optional[uuid.UUID]
+    company_id: Optional[uuid.UUID] = None
+
+
+# workflow id -> compiled plan, re-read after WORKFLOW_PLAN_CACHE_TTL_SECONDS
+# so edits made directly in the database are picked up
+_plans = ExpiringLRUCache(WORKFLOW_PLAN_CACHE_SIZE)
+
+
+def _direct_manager_plan(workflow_id: uuid.UUID) -> StepPlan:
+    """
+    Plan used when a workflow row is missing: the direct manager approves
+    alone, which is how expenses were handled before workflows existed.
+    """
+    return StepPlan(workflow_id, (Stage((MANAGER,), frozenset([MANAGER])),), None, None)
+
+
+def invalidate_plan(workflow_id: uuid.UUID):
+    """
+    Drops a cached plan; call after a workflow or its steps change.
+    """
+    _plans.pop(workflow_id)
+
+
+def compile_plan(workflow: models.ApprovalWorkflow, steps: Iterable[models.WorkflowStep]) -> StepPlan:
+    stages = []
+    if workflow.is_manager_first_approver:
+        stages.append(Stage(approvers=(MANAGER,), required=frozenset([MANAGER])))
+    by_number: Dict[int, List[models.WorkflowStep]] = {}
+    for step in steps:
+        by_number.setdefault(step.step_number, []).append(step)
+    for number in sorted(by_number):
+        group = by_number[number]
+        stages.append(Stage(
+            approvers=tuple(step.approver_id for step in group),
+            required=frozenset(step.approver_id for step in group if step.is_required),
+        ))
+    return StepPlan(
+        workflow_id=workflow.id,
+        stages=tuple(stages),
+        min_approval_percentage=workflow.min_approval_percentage,
+        special_approver_id=workflow.special_approver_id,
+        company_id=workflow.company_id,
+    )
+
+
+async def get_plans(
+    db: AsyncSession, workflows: Iterable[Tuple[uuid.UUID, uuid.UUID]]
+) -> Dict[uuid.UUID, StepPlan]:
+    """
+    Returns plans for the given (company_id, workflow_id) pairs, compiling
+    any that are not cached with one query for the workflows and one for
+    their steps. A workflow of another company is left out, so its
+    approvers never see the expense; callers fall back to the direct
+    manager as for a missing workflow.
+    """
+    plans = {}
+    missing = []
+    wanted = set(workflows)
+    for _, workflow_id in wanted:
+        plan = _plans.get(workflow_id)
+        if plan is None:
+            missing.append(workflow_id)
+        else:
+            plans[workflow_id] = plan
+    if missing:
+        workflows = (await db.execute(
+            select(models.ApprovalWorkflow).where(models.ApprovalWorkflow.id.in_(missing))
+        )).scalars().all()
+        steps = (await db.execute(
+            select(models.WorkflowStep).where(models.WorkflowStep.workflow_id.in_(missing))
+        )).scalars().all()
+        steps_by_workflow: Dict[uuid.UUID, List[models.WorkflowStep]] = {}
+        for step in steps:
+            steps_by_workflow.setdefault(step.workflow_id, []).append(step)
+        expires_at = time.time() + WORKFLOW_PLAN_CACHE_TTL_SECONDS
+        for workflow in workflows:
+            plans[workflow.id] = compile_plan(workflow, steps_by_workflow.get(workflow.id, []))
+            _plans.put(workflow.id, plans[workflow.id], expires_at)
+    return {
+        workflow_id: plans[workflow_id]
+        for company_id, workflow_id in wanted
+        if workflow_id in plans and plans[workflow_id].company_id == company_id
+    }
+
+
+# --- Per-expense evaluation ---
+
+class SubmittedExpense(NamedTuple):
+    id: uuid.UUID
+    employee_id: uuid.UUID
+    workflow_id: uuid.UUID
+    created_at: datetime
+    company_id: uuid.UUID
+
+
+def _stage_approvers(plan: StepPlan, index: int, employee_id: uuid.UUID, manager_id: Optional[uuid.UUID]) -> List[uuid.UUID]:
+    approvers = []
+    for approver in plan.stages[index].approvers:
+        approver = manager_id if approver is MANAGER else approver
+        if approver is not None and approver != employee_id and approver not in approvers:
+            approvers.append(approver)
+    return approvers
+
+
+def _is_required(plan: StepPlan, index: int, approver_id: uuid.UUID, manager_id: Optional[uuid.UUID]) -> bool:
+    required = plan.stages[index].required
+    return approver_id in required or (MANAGER in required and approver_id == manager_id)
+
+
+def _all_approvers(plan: StepPlan, employee_id: uuid.UUID, manager_id: Optional[uuid.UUID]) -> Set[uuid.UUID]:
+    approvers = set()
+    for index in range(len(plan.stages)):
+        approvers.update(_stage_approvers(plan, index, employee_id, manager_id))
+    return approvers
+
+
+def _next_stage(plan: StepPlan, start: int, employee_id: uuid.UUID, manager_id: Optional[uuid.UUID]) -> Optional[int]:
+    """
+    First stage at or after start that has at least one approver.
+    """
+    for index in range(start, len(plan.stages)):
+        if _stage_approvers(plan, index, employee_id, manager_id):
+            return index
+    return None
+
+
+@dataclass
+class Transition:
+    expense_id: uuid.UUID
+    status: models.ExpenseStatus
+    step: Optional[int]
+    # (approver_id, step) rows to add to the inbox
+    inbox_add: List[Tuple[uuid.UUID, int]] = field(default_factory=list)
+    created_at: Optional[datetime] = None
+
+    @property
+    def is_final(self) -> bool:
+        return self.status != models.ExpenseStatus.pending_approval
+
+
+def _first_transition(plan: Optional[StepPlan], expense: SubmittedExpense, manager_id: Optional[uuid.UUID]) -> Transition:
+    plan = plan or _direct_manager_plan(expense.workflow_id)
+    index = _next_stage(plan, 0, expense.employee_id, manager_id)
+    special = plan.special_approver_id if plan.special_approver_id != expense.employee_id else None
+    if index is None and special is None:
+        # Nobody has to approve this expense.
+        return Transition(expense.id, models.ExpenseStatus.approved, None, created_at=expense.created_at)
+    step = index if index is not None else 0
+    inbox = [(approver, step) for approver in _stage_approvers(plan, index, expense.employee_id, manager_id)] if index is not None else []
+    if special is not None and all(approver != special for approver, _ in inbox):
+        inbox.append((special, step))
+    return Transition(expense.id, models.ExpenseStatus.pending_approval, step, inbox, expense.created_at)
+
+
+def _decide(
+    plan: StepPlan,
+    expense: models.Expense,
+    manager_id: Optional[uuid.UUID],
+    approvals: List[Tuple[uuid.UUID, bool, Optional[int]]],
+    approver_id: uuid.UUID,
+    approved: bool,
+) -> Transition:
+    """
+    Applies one decision to an expense. approvals holds the earlier
+    decisions as (approver_id, approved, step) and already includes this one.
+    """
+    index = expense.approval_step or 0
+    pending = models.ExpenseStatus.pending_approval
+
+    def final(status):
+        return Transition(expense.id, status, None)
+
+    if plan.special_approver_id is not None and approver_id == plan.special_approver_id:
+        return final(models.ExpenseStatus.approved if approved else models.ExpenseStatus.rejected)
+
+    in_stage = index < len(plan.stages)
+    if not approved:
+        if plan.min_approval_percentage is None or (in_stage and _is_required(plan, index, approver_id, manager_id)):
+            return final(models.ExpenseStatus.rejected)
+
+    everyone = _all_approvers(plan, expense.employee_id, manager_id)
+    approved_by = {a for a, ok, _ in approvals if ok and a in everyone}
+    if plan.min_approval_percentage is not None and everyone:
+        if len(approved_by) * 100 >= plan.min_approval_percentage * len(everyone):
+            return final(models.ExpenseStatus.approved)
+
+    if in_stage:
+        stage_approvers = _stage_approvers(plan, index, expense.employee_id, manager_id)
+        decided = {a for a, _, step in approvals if step == index}
+        if not set(stage_approvers) <= decided:
+            return Transition(expense.id, pending, index)
+
+    next_index = _next_stage(plan, index + 1, expense.employee_id, manager_id)
+    if next_index is None:
+        if plan.min_approval_percentage is not None:
+            # The percentage was checked above and not reached.
+            return final(models.ExpenseStatus.rejected)
+        return final(models.ExpenseStatus.approved)
+    inbox = [(approver, next_index) for approver in _stage_approvers(plan, next_index, expense.employee_id, manager_id)]
+    return Transition(expense.id, pending, next_index, inbox, expense.created_at)
+
+
+# --- Persistence ---
+
+async def _write_transitions(db: AsyncSession, transitions: List[Transition]):
+    """
+    Writes status/step changes grouped into set-based UPDATEs, keeping the
+    spending rollups in step, and maintains the inbox: finished expenses
+    leave it entirely, advancing ones gain the next stage's approvers. The
+    lists of the employees and approvers affected get a new version and are
+    notified once the caller commits.
+    """
+    employees: Set[uuid.UUID] = set()
+    approvers: Set[uuid.UUID] = set()
+    events: List[notifications.Event] = []
+    groups: Dict[Tuple[models.ExpenseStatus, Optional[int]], List[uuid.UUID]] = {}
+    for transition in transitions:
+        groups.setdefault((transition.status, transition.step), []).append(transition.expense_id)
+    for (status, step), ids in groups.items():
+        # Expenses only reach here while pending, so only a final status moves them in the rollups.
+        if status != models.ExpenseStatus.pending_approval:
+            await rollups.change_status(db, ids, status)
+        updated = await db.execute(
+            update(models.Expense)
+            .where(models.Expense.id.in_(ids))
+            .values(status=status, approval_step=step)
+            .returning(models.Expense.id, models.Expense.employee_id)
+            .execution_options(synchronize_session=False)
+        )
+        for expense_id, employee_id in updated:
+            employees.add(employee_id)
+            events.append(([employee_id], notifications.status_event(expense_id, status, step)))
+
+    finished = [t.expense_id for t in transitions if t.is_final]
+    if finished:
+        removed = await db.execute(
+            delete(models.ApprovalInbox)
+            .where(models.ApprovalInbox.expense_id.in_(finished))
+            .returning(models.ApprovalInbox.approver_id, models.ApprovalInbox.expense_id)
+        )
+        for approver_id, expense_id in removed:
+            approvers.add(approver_id)
+            events.append(([approver_id], notifications.queue_event(expense_id, "removed")))
+
+    inbox_rows = [
+        {"approver_id": approver, "expense_id": t.expense_id, "step": step, "expense_created_at": t.created_at}
+        for t in transitions if not t.is_final
+        for approver, step in t.inbox_add
+    ]
+    if inbox_rows:
+        await db.execute(pg_insert(models.ApprovalInbox).on_conflict_do_nothing(), inbox_rows)
+        for row in inbox_rows:
+            approvers.add(row["approver_id"])
+            events.append(([row["approver_id"]], notifications.queue_event(row["expense_id"], "added")))
+    await collection_versions.bump_expenses(db, employees)
+    await collection_versions.bump_approvals(db, approvers)
+    await notifications.publish(db, events)
+
+
+async def _managers_of(db: AsyncSession, employee_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, Optional[uuid.UUID]]:
+    result = await db.execute(
+        select(models.User.id, models.User.manager_id).where(models.User.id.in_(set(employee_ids)))
+    )
+    return dict(result.all())
+
+
+async def submit(db: AsyncSession, expenses: List[SubmittedExpense]) -> List[Transition]:
+    """
+    Puts newly created expenses into their first stage. Does not commit;
+    the caller commits together with the INSERT of the expenses.
+    """
+    if not expenses:
+        return []
+    plans = await get_plans(db, {(e.company_id, e.workflow_id) for e in expenses})
+    managers = await _managers_of(db, {e.employee_id for e in expenses})
+    transitions = [_first_transition(plans.get(e.workflow_id), e, managers.get(e.employee_id)) for e in expenses]
+    await _write_transitions(db, transitions)
+    return transitions
+
+
+async def apply_decisions(
+    db: AsyncSession,
+    approver_id: uuid.UUID,
+    decisions: List[schemas.ApprovalDecision],
+) -> List[schemas.BulkApprovalResult]:
+    """
+    Applies a batch of decisions by one approver in one transaction and
+    returns a result per decision, in input order.
+
+    Only expenses in the approver's inbox are accepted; they are loaded and
+    locked with one query. Earlier approvals come from one more query, the
+    new ExpenseApproval rows go in with one bulk INSERT, and the status and
+    inbox changes are written set-based by _write_transitions.
+    """
+    first_seen: Dict[uuid.UUID, int] = {}
+    for index, decision in enumerate(decisions):
+        first_seen.setdefault(decision.expense_id, index)
+
+    rows = (await db.execute(
+        select(models.Expense, models.User.manager_id)
+        .join(models.ApprovalInbox, models.ApprovalInbox.expense_id == models.Expense.id)
+        .join(models.User, models.User.id == models.Expense.employee_id)
+        .where(
+            models.ApprovalInbox.approver_id == approver_id,
+            models.Expense.id.in_(list(first_seen)),
+            models.Expense.status == models.ExpenseStatus.pending_approval,
+        )
+        .with_for_update(of=models.Expense)
+    )).all()
+    queued = {expense.id: (expense, manager_id) for expense, manager_id in rows}
+
+    plans = await get_plans(db, {(expense.company_id, expense.workflow_id) for expense, _ in queued.values()})
+    history: Dict[uuid.UUID, List[Tuple[uuid.UUID, bool, Optional[int]]]] = {expense_id: [] for expense_id in queued}
+    if queued:
+        earlier = await db.execute(
+            select(
+                models.ExpenseApproval.expense_id,
+                models.ExpenseApproval.approver_id,
+                models.ExpenseApproval.status,
+                models.ExpenseApproval.step,
+            ).where(models.ExpenseApproval.expense_id.in_(list(queued)))
+        )
+        for expense_id, approver, status, step in earlier:
+            history[expense_id].append((approver, status == models.ApprovalStatus.approved, step))
+
+    transitions: List[Transition] = []
+    approval_rows = []
+    for index, decision in enumerate(decisions):
+        if first_seen[decision.expense_id] != index or decision.expense_id not in queued:
+            continue
+        expense, manager_id = queued[decision.expense_id]
+        step = expense.approval_step
+        history[expense.id].append((approver_id, decision.approved, step))
+        plan = plans.get(expense.workflow_id) or _direct_manager_plan(expense.workflow_id)
+        transitions.append(_decide(plan, expense, manager_id, history[expense.id], approver_id, decision.approved))
+        approval_rows.append({
+            "expense_id": expense.id,
+            "approver_id": approver_id,
+            "status": models.ApprovalStatus.approved if decision.approved else models.ApprovalStatus.rejected,
+            "comments": decision.comments,
+            "step": step,
+        })
+
+    if approval_rows:
+        await db.execute(insert(models.ExpenseApproval), approval_rows)
+        await db.execute(
+            delete(models.ApprovalInbox).where(
+                models.ApprovalInbox.approver_id == approver_id,
+                models.ApprovalInbox.expense_id.in_([row["expense_id"] for row in approval_rows]),
+            )
+        )
+        # The approver's other open tabs
+        await collection_versions.bump_approvals(db, [approver_id])
+        await notifications.publish(db, [
+            ([approver_id], notifications.queue_event(row["expense_id"], "removed")) for row in approval_rows
+        ])
+        await _write_transitions(db, transitions)
+    await db.commit()
+
+    outcome = {t.expense_id: t for t in transitions}
+    results = []
+    for index, decision in enumerate(decisions):
+        if first_seen[decision.expense_id] != index:
+            results.append(schemas.BulkApprovalResult(expense_id=decision.expense_id, status="skipped", detail="Duplicate expense id in request"))
+        elif decision.expense_id in outcome:
+            results.append(schemas.BulkApprovalResult(expense_id=decision.expense_id, status=outcome[decision.expense_id].status.value))
+        else:
+            results.append(schemas.BulkApprovalResult(expense_id=decision.expense_id, status="skipped", detail="Expense is not in your approval queue"))
+    return results
+
+
+async def reassign_manager(
+    db: AsyncSession,
+    employee_id: uuid.UUID,
+    old_manager_id: Optional[uuid.UUID],
+    new_manager_id: Optional[uuid.UUID],
+):
+    """
+    Re-targets the employee's pending expenses whose current stage is the
+    manager's: the old manager leaves those inboxes and the new one joins
+    unless they already decided at that stage. A stage left with nobody to
+    approve advances to the next one with approvers; without one the
+    expense keeps waiting on the special approver or an admin. Does not
+    commit; call in the transaction that changes manager_id.
+    """
+    expenses = (await db.execute(
+        select(models.Expense)
+        .where(
+            models.Expense.employee_id == employee_id,
+            models.Expense.status == models.ExpenseStatus.pending_approval,
+        )
+        .with_for_update()
+    )).scalars().all()
+    plans = await get_plans(db, {(expense.company_id, expense.workflow_id) for expense in expenses})
+    waiting = []
+    for expense in expenses:
+        plan = plans.get(expense.workflow_id) or _direct_manager_plan(expense.workflow_id)
+        index = expense.approval_step or 0
+        if index < len(plan.stages) and MANAGER in plan.stages[index].approvers:
+            waiting.append((expense, plan, index))
+    if not waiting:
+        return
+
+    decided = set((await db.execute(
+        select(models.ExpenseApproval.expense_id, models.ExpenseApproval.approver_id, models.ExpenseApproval.step)
+        .where(models.ExpenseApproval.expense_id.in_([expense.id for expense, _, _ in waiting]))
+    )).all())
+
+    leaving: List[uuid.UUID] = []
+    inbox_rows = []
+    transitions: List[Transition] = []
+    for expense, plan, index in waiting:
+        before = _stage_approvers(plan, index, employee_id, old_manager_id)
+        after = _stage_approvers(plan, index, employee_id, new_manager_id)
+        if old_manager_id in before and old_manager_id not in after and old_manager_id != plan.special_approver_id:
+            leaving.append(expense.id)
+        if not after:
+            next_index = _next_stage(plan, index + 1, employee_id, new_manager_id)
+            if next_index is not None:
+                inbox = [(approver, next_index) for approver in _stage_approvers(plan, next_index, employee_id, new_manager_id)]
+                transitions.append(Transition(
+                    expense.id, models.ExpenseStatus.pending_approval, next_index, inbox, expense.created_at
+                ))
+        elif new_manager_id in after and new_manager_id not in before and (expense.id, new_manager_id, index) not in decided:
+            inbox_rows.append({
+                "approver_id": new_manager_id,
+                "expense_id": expense.id,
+                "step": index,
+                "expense_created_at": expense.created_at,
+            })
+
+    events: List[notifications.Event] = []
+    if leaving:
+        await db.execute(
+            delete(models.ApprovalInbox).where(
+                models.ApprovalInbox.approver_id == old_manager_id,
+                models.ApprovalInbox.expense_id.in_(leaving),
+            )
+        )
+        await collection_versions.bump_approvals(db, [old_manager_id])
+        events += [([old_manager_id], notifications.queue_event(expense_id, "removed")) for expense_id in leaving]
+    if inbox_rows:
+        await db.execute(pg_insert(models.ApprovalInbox).on_conflict_do_nothing(), inbox_rows)
+        await collection_versions.bump_approvals(db, [new_manager_id])
+        events += [([new_manager_id], notifications.queue_event(row["expense_id"], "added")) for row in inbox_rows]
+    await notifications.publish(db, events)
+    if transitions:
+        await _write_transitions(db, transitions)
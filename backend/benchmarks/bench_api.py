@@ -0,0 +1,157 @@
+# File: backend/benchmarks/bench_api.py
+#
+# Drives the real endpoints of a running server at a fixed concurrency and
+# reports throughput and p50/p95/p99 latency per scenario. Logins come from
+# the manifest written by benchmarks/generate_data.py; requests rotate over
+# its sample users so caches see more than one principal.
+#
+#   python -m benchmarks.bench_api --concurrency 100 --duration 30 --save-baseline data/baseline.json
+#   python -m benchmarks.bench_api --concurrency 100 --duration 30 --baseline data/baseline.json
+#
+# With --baseline, a scenario whose throughput drops, or whose p95 grows, by
+# more than --tolerance percent is reported as a regression and the exit
+# status is non-zero.
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+
+import httpx
+
+from benchmarks.bench_login import percentile
+
+# scenario -> (role in the manifest, method, path)
+SCENARIOS = {
+    "login": ("employees", "POST", "/api/v1/login/token"),
+    "list": ("employees", "GET", "/api/v1/expenses/?limit=50"),
+    "approvals": ("managers", "GET", "/api/v1/manager/approvals?limit=50"),
+    "team-expenses": ("managers", "GET", "/api/v1/manager/team-expenses?limit=50"),
+    "convert-currency": ("employees", "GET", "/api/v1/utils/convert-currency?amount=125.50&base_currency=USD&target_currency=EUR"),
+}
+
+
+def load_users(manifest: dict, role: str, limit: int):
+    users = [email for company in manifest["companies"] for email in company[role]]
+    return users[:limit]
+
+
+async def login(client, email: str, password: str) -> str:
+    response = await client.post("/api/v1/login/token", json={"username": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def client_loop(client, scenario, requests, deadline, latencies, errors):
+    method, path = SCENARIOS[scenario][1:]
+    while time.perf_counter() < deadline:
+        kwargs = next(requests)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - started)
+
+
+async def run_scenario(client, scenario, users, password, args) -> dict:
+    if scenario == "login":
+        requests = itertools.cycle([{"json": {"username": email, "password": password}} for email in users])
+    else:
+        tokens = [await login(client, email, password) for email in users]
+        requests = itertools.cycle([{"headers": {"Authorization": f"Bearer {token}"}} for token in tokens])
+
+    # Warm-up so pools and caches are filled before measuring
+    warmup_deadline = time.perf_counter() + args.warmup
+    await asyncio.gather(*[client_loop(client, scenario, requests, warmup_deadline, [], []) for _ in range(args.concurrency)])
+
+    latencies, errors = [], []
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*[
+        client_loop(client, scenario, requests, deadline, latencies, errors) for _ in range(args.concurrency)
+    ])
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "errors": len(errors),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> int:
+    regressions = 0
+    print(f"\n{'scenario':18} {'rps':>18} {'p95 ms':>20}")
+    for scenario, result in results.items():
+        base = baseline.get("results", {}).get(scenario)
+        if not base:
+            continue
+        rps_change = (result["rps"] - base["rps"]) / base["rps"] * 100 if base["rps"] else 0.0
+        p95_change = (result["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100 if base["p95_ms"] else 0.0
+        regressed = rps_change < -tolerance or p95_change > tolerance
+        regressions += regressed
+        print(f"{scenario:18} {base['rps']:8.1f} -> {result['rps']:8.1f} ({rps_change:+.0f}%)"
+              f" {base['p95_ms']:7.1f} -> {result['p95_ms']:7.1f} ({p95_change:+.0f}%)"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+async def run(args) -> int:
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    password = manifest["password"]
+    scenarios = args.scenarios or list(SCENARIOS)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        for scenario in scenarios:
+            users = load_users(manifest, SCENARIOS[scenario][0], args.users)
+            result = await run_scenario(client, scenario, users, password, args)
+            results[scenario] = result
+            print(f"{scenario:18} {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.1f}ms  "
+                  f"p95 {result['p95_ms']:7.1f}ms  p99 {result['p99_ms']:7.1f}ms  errors {result['errors']}")
+
+    run_info = {
+        "base_url": args.base_url,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "results": results,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(run_info, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("concurrency") != args.concurrency:
+            print(f"Note: baseline was recorded at concurrency {baseline.get('concurrency')}")
+        return 1 if compare(results, baseline, args.tolerance) else 0
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and latency of the main API endpoints")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--manifest", default="data/bench_manifest.json")
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=int, default=20, help="seconds per scenario")
+    parser.add_argument("--warmup", type=int, default=3, help="seconds per scenario before measuring")
+    parser.add_argument("--users", type=int, default=20, help="sample users per scenario")
+    parser.add_argument("--save-baseline")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="allowed change in percent")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
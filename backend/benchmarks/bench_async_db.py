@@ -0,0 +1,72 @@
+# File: backend/benchmarks/bench_async_db.py
+#
+# Side-by-side requests/sec of the async API and the old sync path.
+# Start both servers against the same seeded database, then run:
+#
+#   uvicorn main:app --port 8000
+#   uvicorn benchmarks.sync_app:app --port 8001
+#   python -m benchmarks.bench_async_db --concurrency 500 --duration 30
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.bench_login import percentile
+
+
+async def get_token(client, args):
+    response = await client.post("/api/v1/login/token", json={"username": args.email, "password": args.password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def client_loop(client, path, headers, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - started)
+
+
+async def measure(label, base_url, token, args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        latencies, errors = [], []
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*[
+            client_loop(client, args.path, headers, deadline, latencies, errors)
+            for _ in range(args.concurrency)
+        ])
+    print(f"{label:6} {base_url}: {len(latencies) / args.duration:8.1f} req/s, "
+          f"p50 {percentile(latencies, 50) * 1000:.1f}ms, p99 {percentile(latencies, 99) * 1000:.1f}ms, "
+          f"errors {len(errors)}")
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.async_url, timeout=60) as client:
+        token = await get_token(client, args)
+    await measure("async", args.async_url, token, args)
+    await measure("sync", args.sync_url, token, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the async and sync request paths")
+    parser.add_argument("--async-url", default="http://localhost:8000")
+    parser.add_argument("--sync-url", default="http://localhost:8001")
+    parser.add_argument("--path", default="/api/v1/expenses/")
+    parser.add_argument("--email", default="alice.employee@innovate.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=int, default=30)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# File: backend/benchmarks/bench_conversion.py
+#
+# Historical conversion of N (amount, currency, date) items: one rate
+# lookup per item against rate_history.convert_many (one query for all).
+# Runs in-process against DATABASE_URL with migrations applied. Rates are
+# generated under the ISO test currency XTS and removed afterwards:
+#
+#   python -m benchmarks.bench_conversion --items 10000
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from app.db.session import AsyncSessionLocal
+from app.services import rate_history
+
+BASE = "XTS"
+QUOTES = ["EUR", "GBP", "JPY", "INR", "CHF", "CAD", "AUD", "SEK"]
+
+
+async def seed_rates(db, days: int):
+    start = date.today() - timedelta(days=days)
+    rows = [
+        {"base": BASE, "quote": quote, "date": start + timedelta(days=offset),
+         "rate": Decimal(random.uniform(0.5, 150)).quantize(Decimal("1e-6"))}
+        for quote in QUOTES for offset in range(days) if (start + timedelta(days=offset)).weekday() < 5
+    ]
+    await db.execute(rate_history._upsert(), rows)
+    await db.commit()
+    return start
+
+
+async def run(args):
+    random.seed(args.seed)
+    async with AsyncSessionLocal() as db:
+        start = await seed_rates(db, args.days)
+        try:
+            items = [
+                (Decimal(random.randint(100, 100000)) / 100, random.choice(QUOTES), start + timedelta(days=random.randrange(args.days)))
+                for _ in range(args.items)
+            ]
+
+            started = time.perf_counter()
+            one_by_one = [(await rate_history.convert_many(db, [item], BASE))[0] for item in items]
+            single = time.perf_counter() - started
+
+            started = time.perf_counter()
+            batched = await rate_history.convert_many(db, items, BASE)
+            batch = time.perf_counter() - started
+
+            assert one_by_one == batched, "batch conversion differs from per-item conversion"
+            missing = sum(1 for conversion in batched if conversion is None)
+            print(f"per item: {args.items} items in {single * 1000:.0f}ms ({args.items} queries)")
+            print(f"batch:    {args.items} items in {batch * 1000:.0f}ms (1 query), {missing} without a rate")
+        finally:
+            await db.execute(text("DELETE FROM exchange_rates WHERE base = :base"), {"base": BASE})
+            await db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-item vs batch historical currency conversion")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=365, help="Days of generated rate history")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# File: backend/benchmarks/bench_login.py
+#
+# Measures login throughput and the latency of an unrelated endpoint while
+# logins are in flight. Run against a live server (e.g. `uvicorn main:app`)
+# seeded with seed.py:
+#
+#   python -m benchmarks.bench_login --concurrency 50 --duration 20
+#
+# Compare PASSWORD_HASH_EXECUTOR=thread/process and PASSWORD_HASH_WORKERS
+# settings by restarting the server between runs.
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def login_worker(client, args, deadline, latencies, failures):
+    payload = {"username": args.email, "password": args.password}
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.post("/api/v1/login/token", json=payload)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            failures.append(response.status_code)
+
+
+async def probe_worker(client, args, deadline, latencies):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await client.get(args.probe_path)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(args.probe_interval)
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + args.duration
+        login_latencies, probe_latencies, failures = [], [], []
+        tasks = [login_worker(client, args, deadline, login_latencies, failures) for _ in range(args.concurrency)]
+        tasks.append(probe_worker(client, args, deadline, probe_latencies))
+        await asyncio.gather(*tasks)
+
+    print(f"logins:        {len(login_latencies)} in {args.duration}s "
+          f"({len(login_latencies) / args.duration:.1f}/s), failures: {len(failures)}")
+    print(f"login latency: p50 {percentile(login_latencies, 50) * 1000:.1f}ms, "
+          f"p99 {percentile(login_latencies, 99) * 1000:.1f}ms")
+    print(f"probe {args.probe_path}: n={len(probe_latencies)}, "
+          f"mean {statistics.mean(probe_latencies or [0]) * 1000:.1f}ms, "
+          f"p99 {percentile(probe_latencies, 99) * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput under concurrency")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="alice.employee@innovate.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=int, default=20)
+    parser.add_argument("--probe-path", default="/api/v1/utils/countries")
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
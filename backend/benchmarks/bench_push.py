@@ -0,0 +1,152 @@
+# File: backend/benchmarks/bench_push.py
+#
+# Database load of keeping open tabs up to date: polling versus the
+# /api/v1/events push channel. Runs the same population of simulated tabs
+# twice against a running server while a writer keeps submitting expenses:
+#
+#   polling  every tab refetches its list (/manager/approvals for managers,
+#            /expenses/ for employees) every --poll-interval seconds;
+#   push     every tab loads its list once, keeps an event stream open and
+#            refetches only when an event arrives.
+#
+# SQL statements are read from the server's /metrics (per-route statement
+# histograms), so run the server as a single worker process, or with the
+# memory broker, for the numbers to cover every request. Users come from
+# the manifest written by benchmarks/generate_data.py.
+#
+#   python -m benchmarks.bench_push --tabs 1000 --duration 60 --poll-interval 5 --writes-per-second 5
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from datetime import date
+
+import httpx
+
+from benchmarks.bench_api import login
+
+METRIC = re.compile(r'^(http_request_db_statements_sum|http_requests_total)\{method="(\w+)",route="([^"]*)"[^}]*\} (\S+)$')
+
+
+async def read_totals(client) -> dict:
+    """
+    (GET requests, SQL statements run by GET requests) so far, from /metrics.
+    """
+    response = await client.get("/metrics")
+    response.raise_for_status()
+    totals = {"requests": 0.0, "statements": 0.0}
+    for line in response.text.splitlines():
+        match = METRIC.match(line)
+        if not match or match.group(2) != "GET" or match.group(3) in ("/metrics", "/api/v1/events"):
+            continue
+        key = "statements" if match.group(1) == "http_request_db_statements_sum" else "requests"
+        totals[key] += float(match.group(4))
+    return totals
+
+
+async def polling_tab(client, headers, path, interval, deadline):
+    await asyncio.sleep(random.uniform(0, interval))
+    while time.perf_counter() < deadline:
+        await client.get(path, headers=headers)
+        await asyncio.sleep(interval)
+
+
+async def push_tab(client, token, headers, path, deadline, counters):
+    await client.get(path, headers=headers)
+
+    async def consume():
+        async with client.stream("GET", "/api/v1/events", params={"access_token": token}) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    counters["events"] += 1
+                    await client.get(path, headers=headers)
+
+    try:
+        await asyncio.wait_for(consume(), max(0.0, deadline - time.perf_counter()))
+    except asyncio.TimeoutError:
+        pass
+
+
+async def writer(client, submitters, rate, deadline, counters):
+    while time.perf_counter() < deadline:
+        headers, workflow_id = random.choice(submitters)
+        response = await client.post("/api/v1/expenses/", headers=headers, json={
+            "description": "Push benchmark", "amount": "12.50", "currency": "USD",
+            "expense_date": date.today().isoformat(), "workflow_id": workflow_id,
+        })
+        counters["writes"] += response.status_code == 201
+        await asyncio.sleep(1 / rate)
+
+
+async def run_phase(mode, client, tabs, submitters, args) -> dict:
+    counters = {"events": 0, "writes": 0}
+    before = await read_totals(client)
+    started = time.perf_counter()
+    deadline = started + args.duration
+    if mode == "polling":
+        clients = [polling_tab(client, headers, path, args.poll_interval, deadline) for _, headers, path in tabs]
+    else:
+        clients = [push_tab(client, token, headers, path, deadline, counters) for token, headers, path in tabs]
+    await asyncio.gather(writer(client, submitters, args.writes_per_second, deadline, counters), *clients)
+    elapsed = time.perf_counter() - started
+    after = await read_totals(client)
+    return {
+        "reads_per_s": (after["requests"] - before["requests"]) / elapsed,
+        "statements_per_s": (after["statements"] - before["statements"]) / elapsed,
+        "events": counters["events"],
+        "writes": counters["writes"],
+    }
+
+
+async def run(args) -> int:
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    password = manifest["password"]
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        users = []
+        for company in manifest["companies"]:
+            users += [(email, "/api/v1/manager/approvals?limit=50") for email in company["managers"]]
+            users += [(email, "/api/v1/expenses/?limit=50") for email in company["employees"]]
+        tokens = {email: await login(client, email, password) for email, _ in users}
+        # Several tabs per user when --tabs exceeds the sample users
+        tabs = [
+            (tokens[email], {"Authorization": f"Bearer {tokens[email]}"}, path)
+            for email, path in (users[n % len(users)] for n in range(args.tabs))
+        ]
+        submitters = [
+            ({"Authorization": f"Bearer {tokens[email]}"}, company["workflow_id"])
+            for company in manifest["companies"] for email in company["employees"]
+        ]
+
+        results = {}
+        for mode in ("polling", "push"):
+            results[mode] = result = await run_phase(mode, client, tabs, submitters, args)
+            print(f"{mode:8} {result['reads_per_s']:8.1f} list reads/s  {result['statements_per_s']:9.1f} SQL statements/s"
+                  f"  ({result['writes']} writes, {result['events']} events)")
+
+    if results["push"]["statements_per_s"]:
+        print(f"push runs x{results['polling']['statements_per_s'] / results['push']['statements_per_s']:.1f} "
+              f"fewer read statements per second")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DB load of polling versus the push channel")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--manifest", default="data/bench_manifest.json")
+    parser.add_argument("--tabs", type=int, default=500, help="simulated open tabs")
+    parser.add_argument("--duration", type=int, default=60, help="seconds per mode")
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    parser.add_argument("--writes-per-second", type=float, default=5.0)
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
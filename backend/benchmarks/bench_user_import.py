@@ -0,0 +1,113 @@
+# File: backend/benchmarks/bench_user_import.py
+#
+# Onboarding time for N users: one POST /admin/users per user against a
+# single POST /admin/users/bulk. Every generated user reports to a manager
+# created by the same batch (found by email), so the bulk run also covers
+# in-batch manager resolution. Run against a live server seeded with
+# seed.py:
+#
+#   python -m benchmarks.bench_user_import --users 2000
+#
+# Compare BULK_HASH_WORKERS settings by restarting the server between runs.
+
+import argparse
+import asyncio
+import csv
+import io
+import time
+import uuid
+
+import httpx
+
+
+def make_rows(count: int, prefix: str):
+    """
+    Ten managers per hundred users; everyone else reports to one of them.
+    """
+    managers = max(1, count // 10)
+    rows = []
+    for index in range(count):
+        row = {"email": f"{prefix}.{index}@bench.example.com", "password": "password123", "manager_email": ""}
+        if index >= managers:
+            row["manager_email"] = f"{prefix}.{index % managers}@bench.example.com"
+        rows.append(row)
+    return rows
+
+
+def as_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=["email", "password", "manager_email"])
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def login(client, args) -> dict:
+    response = await client.post("/api/v1/login/token", json={"username": args.email, "password": args.password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def one_by_one(client, headers, rows, concurrency: int) -> float:
+    """
+    POST /admin/users per row (managers first, then their reports, since
+    the single-user endpoint can only reference existing managers by id).
+    """
+    ids = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create(row):
+        # company_id is required by the schema but replaced with the admin's
+        payload = {"email": row["email"], "password": row["password"], "company_id": str(uuid.uuid4())}
+        if row["manager_email"]:
+            payload["manager_id"] = ids[row["manager_email"]]
+        async with semaphore:
+            response = await client.post("/api/v1/admin/users", json=payload, headers=headers)
+        response.raise_for_status()
+        ids[row["email"]] = response.json()["id"]
+
+    started = time.perf_counter()
+    await asyncio.gather(*[create(row) for row in rows if not row["manager_email"]])
+    await asyncio.gather(*[create(row) for row in rows if row["manager_email"]])
+    return time.perf_counter() - started
+
+
+async def bulk(client, headers, rows) -> float:
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/v1/admin/users/bulk",
+        content=as_csv(rows),
+        headers={**headers, "Content-Type": "text/csv"},
+    )
+    elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    report = response.json()
+    if report["failed"]:
+        print(f"  bulk import reported {report['failed']} failed row(s), first: {report['errors'][:3]}")
+    return elapsed
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=3600) as client:
+        headers = await login(client, args)
+        run_id = uuid.uuid4().hex[:8]
+        if not args.skip_single:
+            seconds = await one_by_one(client, headers, make_rows(args.users, f"single-{run_id}"), args.concurrency)
+            print(f"one by one: {args.users} users in {seconds:.1f}s ({args.users / seconds:.1f} users/s)")
+        seconds = await bulk(client, headers, make_rows(args.users, f"bulk-{run_id}"))
+        print(f"bulk:       {args.users} users in {seconds:.1f}s ({args.users / seconds:.1f} users/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-user vs bulk user provisioning")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="ada.admin@innovate.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--skip-single", action="store_true", help="Only time the bulk endpoint")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# File: backend/benchmarks/check_replicas.py
+#
+# Checks read routing against real servers: DATABASE_URL as the primary and
+# DATABASE_REPLICA_URLS as replicas (two local Postgres instances will do;
+# a server that is not in recovery counts as a replica with no lag).
+#
+#   DATABASE_REPLICA_URLS=postgresql://.../expenses python -m benchmarks.check_replicas
+#
+# Prints the probe results, how reads are spread, that a commit pins the
+# user's reads to the primary for READ_YOUR_WRITES_SECONDS, and that a
+# replica failing at checkout falls back to the primary.
+
+import asyncio
+import collections
+import uuid
+
+from sqlalchemy import text
+
+from app.core.config import READ_YOUR_WRITES_SECONDS
+from app.db import replicas, session
+
+
+async def spread(reads: int, use_primary: bool = False) -> collections.Counter:
+    used = collections.Counter()
+    for _ in range(reads):
+        async with session.read_session(use_primary=use_primary) as db:
+            await db.execute(text("SELECT 1"))
+            used["primary" if db.bind is session.async_engine else db.bind.pool.stats.name] += 1
+    return used
+
+
+async def run():
+    replica_set = replicas.replica_set
+    if not replica_set.replicas:
+        raise SystemExit("Set DATABASE_REPLICA_URLS to at least one server")
+    await replica_set.start()
+    try:
+        for status in replica_set.status():
+            print(f"{status['name']}: healthy={status['healthy']} lag={status['lag_seconds']} error={status['error']}")
+        print("reads:", dict(await spread(20)))
+
+        # A commit made on behalf of a user inside a request pins their reads.
+        user_id = uuid.uuid4()
+        token = replicas._request.set(replicas._RequestWrites())
+        try:
+            replicas.note_user(user_id)
+            async with session.AsyncSessionLocal() as db:
+                await db.execute(text("SELECT 1"))
+                await db.commit()
+        finally:
+            replicas._request.reset(token)
+        pinned = replicas.needs_primary(user_id, {})
+        print(f"after a commit: reads on primary={pinned}")
+        assert pinned, "a commit should pin the user's reads to the primary"
+        print("pinned reads:", dict(await spread(5, use_primary=pinned)))
+        await asyncio.sleep(READ_YOUR_WRITES_SECONDS + 0.1)
+        assert not replicas.needs_primary(user_id, {}), "the read-your-writes window should expire"
+        print(f"after {READ_YOUR_WRITES_SECONDS}s: reads on primary=False")
+
+        # A replica whose connections fail is taken out and reads fall back.
+        broken = replica_set.replicas[0]
+        original = broken.engine
+        broken.engine = replicas.create_async_db_engine(
+            "postgresql+asyncpg://nobody@127.0.0.1:1/none", name=f"{broken.name}-broken"
+        )
+        try:
+            for replica in replica_set.replicas[1:]:
+                replica.healthy = False
+            print("reads with a dead replica:", dict(await spread(3)))
+            print(f"{broken.name}: healthy={broken.healthy} error={broken.error}")
+            assert not broken.healthy
+        finally:
+            await broken.engine.dispose()
+            broken.engine = original
+        await replica_set.check_all()
+        print("after re-probing:", [(status["name"], status["healthy"]) for status in replica_set.status()])
+    finally:
+        await replica_set.stop()
+        await session.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,189 @@
+# File: backend/benchmarks/generate_data.py
+#
+# Bulk-loads synthetic companies for load testing: a deep manager
+# hierarchy per company, a manager-first workflow and any number of
+# expenses spread over the past year. Users and expenses are streamed into
+# Postgres with COPY, generated on the fly so memory stays flat; the
+# password is hashed once and shared by every user. Derived tables (manager
+# hierarchy, approval inbox, spending rollups) are rebuilt once at the end.
+#
+# Writes a manifest of sample logins (admins, managers with large teams,
+# employees) that benchmarks/bench_api.py uses.
+#
+#   python -m benchmarks.generate_data --companies 10 --employees 20000 --expenses 20000000
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import islice
+
+from sqlalchemy import text
+
+from app.core.security import get_password_hash
+from app.db import migrations
+from app.db.session import engine
+
+CATEGORIES = ["Travel", "Meals", "Lodging", "Software", "Office Supplies", "Training", "Client Entertainment", None]
+CURRENCIES = ["USD"] * 7 + ["EUR", "GBP", "INR"]
+MERCHANTS = ["ACME Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", None]
+
+USER_COLUMNS = ("id", "company_id", "manager_id", "email", "password_hash", "role", "created_at")
+EXPENSE_COLUMNS = (
+    "id", "employee_id", "company_id", "workflow_id", "description", "amount", "currency",
+    "category", "merchant", "expense_date", "status", "created_at",
+)
+
+
+class CsvStream:
+    """
+    Read-only file object that renders rows as CSV on demand, for
+    COPY ... FROM STDIN.
+    """
+
+    def __init__(self, rows, rows_per_chunk: int = 10_000):
+        self._rows = iter(rows)
+        self._rows_per_chunk = rows_per_chunk
+        self._buffer = b""
+        self._offset = 0
+
+    def _fill(self) -> bool:
+        chunk = list(islice(self._rows, self._rows_per_chunk))
+        if not chunk:
+            return False
+        out = io.StringIO()
+        csv.writer(out).writerows(chunk)
+        self._buffer = self._buffer[self._offset:] + out.getvalue().encode("utf-8")
+        self._offset = 0
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while (size < 0 or len(self._buffer) - self._offset < size) and self._fill():
+            pass
+        end = len(self._buffer) if size < 0 else self._offset + size
+        data = self._buffer[self._offset:end]
+        self._offset += len(data)
+        return data
+
+
+def copy_rows(cursor, table: str, columns, rows):
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        CsvStream(rows),
+        size=1 << 20,
+    )
+
+
+def user_rows(company_id, user_ids, fanout, password_hash, prefix):
+    """
+    User 0 is the company admin and the root of the tree; every other user
+    i reports to (i - 1) // fanout, giving a hierarchy about
+    log_fanout(employees) levels deep.
+    """
+    now = datetime.now(timezone.utc)
+    for index, user_id in enumerate(user_ids):
+        manager_id = user_ids[(index - 1) // fanout] if index else None
+        role = "admin" if index == 0 else "employee"
+        yield (user_id, company_id, manager_id, f"{prefix}-u{index}@bench.example.com", password_hash, role, now)
+
+
+def expense_rows(rng, company_id, workflow_id, user_ids, count, days):
+    now = datetime.now(timezone.utc)
+    span = days * 86400
+    for n in range(count):
+        created_at = now - timedelta(seconds=rng.randrange(span))
+        roll = rng.random()
+        status = "pending_approval" if roll < 0.05 else "rejected" if roll < 0.15 else "approved"
+        yield (
+            uuid.uuid4(), user_ids[rng.randrange(len(user_ids))], company_id, workflow_id,
+            f"Synthetic expense {n}", Decimal(rng.randrange(100, 250_000)) / 100,
+            rng.choice(CURRENCIES), rng.choice(CATEGORIES), rng.choice(MERCHANTS),
+            created_at.date(), status, created_at,
+        )
+
+
+def sample_emails(prefix, indexes):
+    return [f"{prefix}-u{index}@bench.example.com" for index in indexes]
+
+
+def load_company(conn, rng, number, args, password_hash):
+    cursor = conn.cursor()
+    company_id, workflow_id = uuid.uuid4(), uuid.uuid4()
+    prefix = f"bench{args.run}-c{number}"
+    cursor.execute(
+        "INSERT INTO companies (id, name, base_currency) VALUES (%s, %s, 'USD')",
+        (str(company_id), f"Bench Corp {args.run}-{number}"),
+    )
+    cursor.execute(
+        "INSERT INTO approval_workflows (id, company_id, name, is_manager_first_approver) VALUES (%s, %s, 'Manager approval', true)",
+        (str(workflow_id), str(company_id)),
+    )
+    user_ids = [uuid.uuid4() for _ in range(args.employees)]
+    copy_rows(cursor, "users", USER_COLUMNS, user_rows(company_id, user_ids, args.fanout, password_hash, prefix))
+    copy_rows(cursor, "expenses", EXPENSE_COLUMNS, expense_rows(
+        rng, company_id, workflow_id, user_ids, args.expenses // args.companies, args.days
+    ))
+    conn.commit()
+
+    # Managers of the biggest subtrees, then leaves (plain employees).
+    managers = range(1, min(args.employees, args.fanout + 1))
+    employees = range(max(1, args.employees - 20), args.employees)
+    return {
+        "id": str(company_id),
+        "workflow_id": str(workflow_id),
+        "admin": sample_emails(prefix, [0])[0],
+        "managers": sample_emails(prefix, managers),
+        "employees": sample_emails(prefix, employees),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic data for benchmarks")
+    parser.add_argument("--companies", type=int, default=2)
+    parser.add_argument("--employees", type=int, default=5_000, help="users per company")
+    parser.add_argument("--fanout", type=int, default=6, help="direct reports per manager")
+    parser.add_argument("--expenses", type=int, default=1_000_000, help="total, split across companies")
+    parser.add_argument("--days", type=int, default=365, help="spread created_at over this many days")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--manifest", default="data/bench_manifest.json")
+    args = parser.parse_args()
+    args.run = uuid.uuid4().hex[:6]
+
+    migrations.upgrade(engine)
+    rng = random.Random(args.seed)
+    password_hash = get_password_hash(args.password)
+
+    started = time.perf_counter()
+    companies = []
+    conn = engine.raw_connection()
+    try:
+        for number in range(args.companies):
+            companies.append(load_company(conn, rng, number, args, password_hash))
+            print(f"-> Company {number + 1}/{args.companies} loaded ({time.perf_counter() - started:.0f}s)")
+    finally:
+        conn.close()
+
+    print("-> Rebuilding manager hierarchy, approval inbox and rollups...")
+    with engine.begin() as conn:
+        migrations.rebuild_user_hierarchy(conn)
+        migrations.backfill_direct_manager_inbox(conn)
+        migrations.rebuild_expense_rollups(conn)
+        conn.execute(text("ANALYZE"))
+
+    os.makedirs(os.path.dirname(args.manifest) or ".", exist_ok=True)
+    with open(args.manifest, "w") as f:
+        json.dump({"password": args.password, "companies": companies}, f, indent=2)
+    print(f"-> Loaded {args.companies * args.employees} users and "
+          f"{args.companies * (args.expenses // args.companies)} expenses "
+          f"in {time.perf_counter() - started:.0f}s. Manifest: {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# File: backend/benchmarks/sync_app.py
+#
+# The pre-async request path, kept only as a benchmark baseline: a sync
+# endpoint on FastAPI's threadpool using the sync SessionLocal, equivalent
+# to GET /api/v1/expenses/ in main.py.
+#
+#   uvicorn benchmarks.sync_app:app --port 8001
+
+from typing import List
+
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+from sqlalchemy.orm import Session
+
+from app.api.v1.schemas import schemas
+from app.core.config import ALGORITHM, SECRET_KEY
+from app.db import base as models
+from app.db.session import SessionLocal
+
+app = FastAPI(title="Sync baseline")
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login/token")
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    try:
+        email = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        raise HTTPException(status_code=401)
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if user is None:
+        raise HTTPException(status_code=401)
+    return user
+
+
+@app.get("/api/v1/expenses/", response_model=List[schemas.Expense])
+def read_employee_expenses(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    return (
+        db.query(models.Expense)
+        .filter(models.Expense.employee_id == current_user.id)
+        .order_by(models.Expense.created_at.desc(), models.Expense.id.desc())
+        .limit(50)
+        .all()
+    )
@@ -0,0 +1,139 @@
+# File: backend/benchmarks/verify_rollups.py
+#
+# Checks that the incrementally maintained expense rollups always equal a
+# full recomputation. Creates a throwaway company on the configured
+# DATABASE_URL, drives random single and bulk submissions, approvals,
+# rejections and admin status overrides through crud_expense and the
+# workflow engine, compares the company's rollups with a GROUP BY over its
+# expenses after every round and deletes everything it created.
+#
+#   python -m benchmarks.verify_rollups --rounds 50 --seed 1
+
+import argparse
+import asyncio
+import random
+import sys
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import delete, select
+
+from app.api.v1.schemas import schemas
+from app.crud import crud_expense, crud_user
+from app.db import base as models
+from app.db.session import AsyncSessionLocal, async_engine
+from app.services import rollups, workflow
+
+CATEGORIES = ["Travel", "Meals", "Software", None]
+CURRENCIES = ["USD", "EUR", "INR"]
+
+
+def random_expense(rng: random.Random, workflow_id: uuid.UUID) -> schemas.ExpenseCreate:
+    return schemas.ExpenseCreate(
+        description="Rollup check",
+        amount=Decimal(rng.randint(100, 500_000)) / 100,
+        currency=rng.choice(CURRENCIES),
+        category=rng.choice(CATEGORIES),
+        expense_date=date.today() - timedelta(days=rng.randint(0, 120)),
+        workflow_id=workflow_id,
+    )
+
+
+async def setup(db, employees: int):
+    company = models.Company(name=f"Rollup Check {uuid.uuid4().hex[:8]}", base_currency="USD")
+    db.add(company)
+    await db.flush()
+    flow = models.ApprovalWorkflow(company_id=company.id, name="Manager", is_manager_first_approver=True)
+    db.add(flow)
+    await db.commit()
+
+    suffix = company.id.hex[:8]
+    manager = await crud_user.create_user(db, schemas.UserCreate(
+        email=f"rollup-manager-{suffix}@example.com", password="x", company_id=company.id,
+    ), password_hash="x")
+    staff = [
+        await crud_user.create_user(db, schemas.UserCreate(
+            email=f"rollup-{n}-{suffix}@example.com", password="x", company_id=company.id, manager_id=manager.id,
+        ), password_hash="x")
+        for n in range(employees)
+    ]
+    return company.id, flow.id, manager.id, [user.id for user in staff]
+
+
+async def teardown(company_id: uuid.UUID):
+    async with AsyncSessionLocal() as db:
+        expense_ids = select(models.Expense.id).where(models.Expense.company_id == company_id)
+        user_ids = select(models.User.id).where(models.User.company_id == company_id)
+        await db.execute(delete(models.ApprovalInbox).where(models.ApprovalInbox.expense_id.in_(expense_ids)))
+        await db.execute(delete(models.ExpenseApproval).where(models.ExpenseApproval.expense_id.in_(expense_ids)))
+        await db.execute(delete(models.ExpenseRollup).where(models.ExpenseRollup.company_id == company_id))
+        await db.execute(delete(models.Expense).where(models.Expense.company_id == company_id))
+        await db.execute(delete(models.ApprovalWorkflow).where(models.ApprovalWorkflow.company_id == company_id))
+        await db.execute(delete(models.CollectionVersion).where(models.CollectionVersion.user_id.in_(user_ids)))
+        await db.execute(delete(models.UserHierarchy).where(models.UserHierarchy.descendant_id.in_(user_ids)))
+        await db.execute(delete(models.User).where(models.User.company_id == company_id))
+        await db.execute(delete(models.Company).where(models.Company.id == company_id))
+        await db.commit()
+
+
+async def mismatches(db, company_id: uuid.UUID):
+    return await db.run_sync(lambda session: rollups.find_mismatches(session.connection(), company_id=company_id))
+
+
+async def run(args) -> int:
+    rng = random.Random(args.seed)
+    async with AsyncSessionLocal() as db:
+        company_id, workflow_id, manager_id, employee_ids = await setup(db, args.employees)
+    try:
+        for round_number in range(1, args.rounds + 1):
+            async with AsyncSessionLocal() as db:
+                employee_id = rng.choice(employee_ids)
+                await crud_expense.create_expense(db, random_expense(rng, workflow_id), employee_id)
+                await crud_expense.create_expenses_bulk(
+                    db,
+                    [random_expense(rng, workflow_id) for _ in range(rng.randint(1, args.batch))],
+                    employee_id=employee_id,
+                    company_id=company_id,
+                )
+
+                queued = (await db.execute(
+                    select(models.ApprovalInbox.expense_id).where(models.ApprovalInbox.approver_id == manager_id)
+                )).scalars().all()
+                decisions = [
+                    schemas.ApprovalDecision(expense_id=expense_id, approved=rng.random() < 0.7)
+                    for expense_id in rng.sample(queued, k=min(len(queued), rng.randint(0, args.batch)))
+                ]
+                await workflow.apply_decisions(db, manager_id, decisions)
+
+                expense_ids = (await db.execute(
+                    select(models.Expense.id).where(models.Expense.company_id == company_id)
+                )).scalars().all()
+                for expense_id in rng.sample(expense_ids, k=min(len(expense_ids), 2)):
+                    await crud_expense.update_expense_status(db, expense_id, rng.choice(list(models.ExpenseStatus)))
+
+                found = await mismatches(db, company_id)
+            if found:
+                print(f"round {round_number}: rollups differ from a full recomputation")
+                for row in found:
+                    print("  ", row)
+                return 1
+        print(f"{args.rounds} rounds ok: rollups match a full recomputation.")
+        return 0
+    finally:
+        await teardown(company_id)
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check expense rollups against a full recomputation")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--employees", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,11 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1.endpoints import auth, expenses, manager, admin, utils
+from fastapi.responses import PlainTextResponse
+from app.api.v1.endpoints import auth, expenses, manager, admin, events, utils
+from app.core import metrics, security
+from app.db import engine as db_engine, replicas, session
+from app.services import exchange_rates, countries, notifications
 
 
 app = FastAPI(title="Expense Management API")
@@ -15,15 +19,44 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+# Per-route latency, SQL statement counts and DB time, exposed on /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+# Keeps a user's reads on the primary for a moment after they write (no-op without replicas)
+app.add_middleware(replicas.ReadYourWritesMiddleware)
 
 # Include routers with prefixes and tags
 app.include_router(auth.router, prefix="/api/v1", tags=["Authentication"])
 app.include_router(expenses.router, prefix="/api/v1/expenses", tags=["Expenses (Employee)"])
 app.include_router(manager.router, prefix="/api/v1/manager", tags=["Manager"])
 app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
+app.include_router(events.router, prefix="/api/v1/events", tags=["Events"])
 app.include_router(utils.router)
 
+@app.on_event("startup")
+async def startup():
+    # Build the country catalogue up front so the first signup page is not slow
+    countries.get_catalogue()
+    # Read the exchange rate snapshot off the event loop before the first conversion
+    await exchange_rates.load_snapshot()
+    # Start listening for other workers' notifications (postgres broker)
+    await notifications.broker.start()
+    # Probe the read replicas before taking traffic, then keep probing
+    await replicas.replica_set.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await notifications.broker.stop()
+    await replicas.replica_set.stop()
+    await exchange_rates.close_client()
+    security.shutdown_hash_executor()
+    await session.async_engine.dispose()
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(metrics.render(pools=db_engine.pool_status()), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Expense Management API"}
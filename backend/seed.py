@@ -2,8 +2,9 @@
 
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
-from app.db import base as models
+from app.db import base as models, migrations
 from app.core.security import get_password_hash
+from app.services import rate_history
 from datetime import date
 
 def seed_db():
@@ -56,6 +57,10 @@ def seed_db():
                 print(f"-> Created User: {email}")
             created_users[email] = user
         
+        # Index the manager hierarchy for team views
+        migrations.rebuild_user_hierarchy(db.connection())
+        db.commit()
+
         # 3. Create a default Approval Workflow
         workflow = db.query(models.ApprovalWorkflow).filter(models.ApprovalWorkflow.name == "Standard Expenses").first()
         if not workflow:
@@ -83,6 +88,11 @@ def seed_db():
         ]
 
         # Clear existing expenses to avoid duplicates on re-seeding
+        db.query(models.ApprovalInbox).delete()
+        db.query(models.ReceiptJob).delete()
+        db.query(models.Receipt).delete()
+        db.query(models.ExpenseRollup).delete()
+        db.query(models.ExpenseApproval).delete()
         db.query(models.Expense).delete()
         db.commit()
 
@@ -101,9 +111,22 @@ def seed_db():
                     status=exp_data["status"]
                 )
                 db.add(expense)
-        
+        db.flush()
+
+        # Queue the pending expenses for their managers' approval
+        migrations.backfill_direct_manager_inbox(db.connection())
+        migrations.rebuild_expense_rollups(db.connection())
+        # Clients must not keep lists cached from before the re-seed
+        migrations.bump_all_collection_versions(db.connection())
         db.commit()
         print(f"-> Created {len(expenses_to_create)} new expense records.")
+
+        # 5. Sample exchange rate history for conversions at the expense date
+        for path in rate_history._rate_files([rate_history.BUNDLED_HISTORY_DIR]):
+            with open(path, "rb") as f:
+                report = rate_history.import_rates_sync(db.connection(), f, rate_history.detect_format(path, None))
+            db.commit()
+            print(f"-> Imported {report.imported} exchange rates from {path}")
         
         print("\n--- ✅ Seeding Complete! ---")
         print("\n--- Test Credentials ---")
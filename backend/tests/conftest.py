@@ -0,0 +1,129 @@
+# File: backend/tests/conftest.py
+#
+# The tests run against a real Postgres: TEST_DATABASE_URL if set, else the
+# app's DATABASE_URL (environment or .env). Migrations are applied on first
+# use and every test cleans up what it creates. Without a reachable
+# database the tests are skipped.
+#
+#   TEST_DATABASE_URL=postgresql://postgres@localhost/expenses_test python -m pytest -q
+
+import asyncio
+import os
+import uuid
+from typing import List, NamedTuple
+
+import pytest
+
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    pass
+else:
+    load_dotenv()
+
+if os.getenv("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+# Lets the app's config import without one; the database fixture then skips.
+os.environ.setdefault("DATABASE_URL", "postgresql://postgres@localhost/expenses_test")
+
+
+@pytest.fixture(scope="session")
+def database():
+    """
+    The sync engine of a migrated database, or a skip.
+    """
+    from app.db import migrations
+    from app.db.session import engine
+
+    try:
+        with engine.connect():
+            pass
+    except Exception as e:
+        pytest.skip(f"No Postgres at DATABASE_URL: {type(e).__name__}: {e}")
+    migrations.upgrade(engine)
+    return engine
+
+
+@pytest.fixture
+def run(database):
+    """
+    Runs a coroutine on a fresh event loop. The async pool is disposed
+    afterwards, since its connections belong to that loop.
+    """
+    from app.db.session import async_engine
+
+    def run(coro):
+        async def main():
+            try:
+                return await coro
+            finally:
+                await async_engine.dispose()
+        return asyncio.run(main())
+    return run
+
+
+class Company(NamedTuple):
+    id: uuid.UUID
+    workflow_id: uuid.UUID
+    manager_id: uuid.UUID
+    employee_ids: List[uuid.UUID]
+
+
+async def _create_company(employees: int) -> Company:
+    from app.api.v1.schemas import schemas
+    from app.crud import crud_user
+    from app.db import base as models
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        company = models.Company(name=f"Test {uuid.uuid4().hex[:8]}", base_currency="USD")
+        db.add(company)
+        await db.flush()
+        flow = models.ApprovalWorkflow(company_id=company.id, name="Manager", is_manager_first_approver=True)
+        db.add(flow)
+        await db.commit()
+
+        suffix = company.id.hex[:8]
+        manager = await crud_user.create_user(db, schemas.UserCreate(
+            email=f"manager-{suffix}@example.com", password="x", company_id=company.id,
+        ), password_hash="x")
+        staff = [
+            await crud_user.create_user(db, schemas.UserCreate(
+                email=f"employee-{n}-{suffix}@example.com", password="x", company_id=company.id, manager_id=manager.id,
+            ), password_hash="x")
+            for n in range(employees)
+        ]
+        return Company(company.id, flow.id, manager.id, [user.id for user in staff])
+
+
+async def _delete_company(company_id: uuid.UUID):
+    from sqlalchemy import delete, select
+
+    from app.db import base as models
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        expense_ids = select(models.Expense.id).where(models.Expense.company_id == company_id)
+        user_ids = select(models.User.id).where(models.User.company_id == company_id)
+        await db.execute(delete(models.Receipt).where(models.Receipt.expense_id.in_(expense_ids)))
+        await db.execute(delete(models.ApprovalInbox).where(models.ApprovalInbox.expense_id.in_(expense_ids)))
+        await db.execute(delete(models.ExpenseApproval).where(models.ExpenseApproval.expense_id.in_(expense_ids)))
+        await db.execute(delete(models.ExpenseRollup).where(models.ExpenseRollup.company_id == company_id))
+        await db.execute(delete(models.Expense).where(models.Expense.company_id == company_id))
+        await db.execute(delete(models.ApprovalWorkflow).where(models.ApprovalWorkflow.company_id == company_id))
+        await db.execute(delete(models.CollectionVersion).where(models.CollectionVersion.user_id.in_(user_ids)))
+        await db.execute(delete(models.UserHierarchy).where(models.UserHierarchy.descendant_id.in_(user_ids)))
+        await db.execute(delete(models.User).where(models.User.company_id == company_id))
+        await db.execute(delete(models.Company).where(models.Company.id == company_id))
+        await db.commit()
+
+
+@pytest.fixture
+def company(run):
+    """
+    A throwaway company with one workflow (manager approves), a manager and
+    three employees reporting to them.
+    """
+    created = run(_create_company(3))
+    yield created
+    run(_delete_company(created.id))
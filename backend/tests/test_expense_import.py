@@ -0,0 +1,32 @@
+# File: backend/tests/test_expense_import.py
+
+import io
+import uuid
+
+import pytest
+from pydantic import ValidationError
+
+from app.api.v1.schemas import schemas
+from app.services import expense_import
+
+
+def test_unreadable_file_ends_the_batch_with_an_error():
+    records = expense_import.iter_records(io.BytesIO(b"description,amount\nTaxi,\xff\xfe\n"), "csv")
+    batch, error = expense_import._next_batch(records, 10)
+    assert batch == []
+    assert "utf-8" in error
+    assert expense_import._next_batch(records, 10) == ([], None)
+
+
+@pytest.mark.parametrize("field, value", [
+    ("currency", "USDX"),
+    ("category", "x" * 101),
+    ("merchant", "x" * 256),
+    ("amount", "123456789.00"),
+])
+def test_values_that_do_not_fit_the_columns_fail_validation(field, value):
+    row = {"description": "Taxi", "amount": "12.50", "currency": "USD", "expense_date": "2025-06-13",
+           "workflow_id": str(uuid.uuid4()), field: value}
+    with pytest.raises(ValidationError) as raised:
+        schemas.ExpenseCreate.parse_obj(row)
+    assert field in expense_import.format_validation_error(raised.value)
@@ -0,0 +1,160 @@
+# File: backend/tests/test_indexes.py
+#
+# The hot expense list queries must be served by indexes at scale. Loads
+# synthetic data (expenses, the manager hierarchy and the approval inbox)
+# inside a transaction, EXPLAINs the statements crud_expense actually runs
+# for each list, compiled with literal binds, and rolls everything back.
+# TEST_EXPLAIN_EXPENSES sets the size (default 1M; the plans only change
+# shape at volume, so smaller runs prove less).
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.schemas import schemas
+from app.crud import crud_expense
+from app.db import base as models
+
+EXPENSES = int(os.getenv("TEST_EXPLAIN_EXPENSES", "1000000"))
+EMPLOYEES = 5_000
+TEAM_SIZE = 8
+
+PAGE = schemas.PageParams(limit=50)
+ANY = schemas.ExpenseFilters()
+
+# name -> (statement for the loaded ids, index the plan must use or None)
+HOT_QUERIES = {
+    "employee expenses": (
+        lambda ids: crud_expense._page_select(crud_expense._employee_select(ids["employee_id"], ANY), PAGE),
+        "ix_expenses_employee_created",
+    ),
+    "employee expenses by status": (
+        lambda ids: crud_expense._page_select(crud_expense._employee_select(
+            ids["employee_id"], schemas.ExpenseFilters(status=models.ExpenseStatus.approved)), PAGE),
+        "ix_expenses_employee_status_created",
+    ),
+    "manager approval queue": (
+        lambda ids: crud_expense._page_select(
+            crud_expense._approval_select(ids["manager_id"], ANY), PAGE, crud_expense.APPROVAL_QUEUE_KEY),
+        "ix_approval_inbox_approver_created",
+    ),
+    "team expenses": (
+        lambda ids: crud_expense._page_select(crud_expense._subordinate_select(ids["manager_id"], ANY), PAGE),
+        None,
+    ),
+    "direct reports' expenses": (
+        lambda ids: crud_expense._page_select(crud_expense._subordinate_select(ids["manager_id"], ANY, max_depth=1), PAGE),
+        None,
+    ),
+    "team expenses, expanded": (
+        lambda ids: crud_expense._page_select(crud_expense._subordinate_select(ids["manager_id"], ANY, expand=True), PAGE),
+        None,
+    ),
+}
+
+SCANNED_TABLES = ("expenses", "users", "approval_inbox", "user_hierarchy")
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def _seq_scans(plan: dict) -> list:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in SCANNED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+def _indexes(plan: dict) -> set:
+    found = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        found |= _indexes(child)
+    return found
+
+
+@pytest.fixture(scope="module")
+def loaded(database):
+    """
+    A connection inside a transaction holding the synthetic data, and the
+    query parameters; rolled back afterwards.
+    """
+    with database.connect() as conn:
+        trans = conn.begin()
+        try:
+            company_id = conn.execute(text(
+                "INSERT INTO companies (id, name, base_currency) "
+                "VALUES (gen_random_uuid(), 'Explain Corp', 'USD') RETURNING id"
+            )).scalar_one()
+            workflow_id = conn.execute(text(
+                "INSERT INTO approval_workflows (id, company_id, name, is_manager_first_approver) "
+                "VALUES (gen_random_uuid(), :company_id, 'Explain', true) RETURNING id"
+            ), {"company_id": company_id}).scalar_one()
+            # Managers first (every TEAM_SIZE-th employee), then their reports.
+            conn.execute(text(
+                "INSERT INTO users (id, company_id, email, password_hash, role) "
+                "SELECT gen_random_uuid(), :company_id, 'explain-' || g || '@example.com', 'x', 'employee' "
+                "FROM generate_series(1, :n) g"
+            ), {"company_id": company_id, "n": EMPLOYEES})
+            conn.execute(text(
+                "WITH numbered AS ("
+                " SELECT id, row_number() OVER (ORDER BY email) AS rn FROM users WHERE company_id = :company_id),"
+                " managers AS (SELECT id, rn FROM numbered WHERE rn % :team = 1)"
+                " UPDATE users u SET manager_id = m.id FROM numbered n JOIN managers m"
+                " ON m.rn = n.rn - ((n.rn - 1) % :team)"
+                " WHERE u.id = n.id AND n.id <> m.id"
+            ), {"company_id": company_id, "team": TEAM_SIZE})
+            conn.execute(text(
+                "INSERT INTO expenses (id, employee_id, company_id, workflow_id, description, amount, currency,"
+                " category, expense_date, status, created_at)"
+                " SELECT gen_random_uuid(), u.ids[1 + (g % array_length(u.ids, 1))], :company_id, :workflow_id,"
+                " 'Synthetic', (g % 1000) + 0.99, 'USD', 'General', current_date - (g % 365),"
+                " (CASE WHEN g % 20 = 0 THEN 'pending_approval' WHEN g % 7 = 0 THEN 'rejected' ELSE 'approved' END)::expensestatus,"
+                " now() - (g || ' seconds')::interval"
+                " FROM generate_series(1, :n) g,"
+                " (SELECT array_agg(id) AS ids FROM users WHERE company_id = :company_id) u"
+            ), {"company_id": company_id, "workflow_id": workflow_id, "n": EXPENSES})
+            conn.execute(text(
+                "INSERT INTO user_hierarchy (ancestor_id, descendant_id, depth)"
+                " SELECT id, id, 0 FROM users WHERE company_id = :company_id"
+                " UNION ALL"
+                " SELECT manager_id, id, 1 FROM users WHERE company_id = :company_id AND manager_id IS NOT NULL"
+            ), {"company_id": company_id})
+            conn.execute(text(
+                "INSERT INTO approval_inbox (approver_id, expense_id, step, expense_created_at)"
+                " SELECT u.manager_id, e.id, 0, e.created_at FROM expenses e JOIN users u ON u.id = e.employee_id"
+                " WHERE e.company_id = :company_id AND e.status = 'pending_approval' AND u.manager_id IS NOT NULL"
+            ), {"company_id": company_id})
+            for table in SCANNED_TABLES:
+                conn.execute(text(f"ANALYZE {table}"))
+
+            manager_id = conn.execute(text(
+                "SELECT manager_id FROM users WHERE company_id = :company_id AND manager_id IS NOT NULL LIMIT 1"
+            ), {"company_id": company_id}).scalar_one()
+            employee_id = conn.execute(text(
+                "SELECT id FROM users WHERE manager_id = :manager_id LIMIT 1"
+            ), {"manager_id": manager_id}).scalar_one()
+            yield conn, {"employee_id": employee_id, "manager_id": manager_id}
+        finally:
+            trans.rollback()
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_uses_an_index(loaded, name):
+    conn, ids = loaded
+    build, index = HOT_QUERIES[name]
+    plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + _sql(build(ids)))).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    plan = plan[0]["Plan"]
+    assert _seq_scans(plan) == [], f"{name} falls back to a sequential scan"
+    if index is not None:
+        assert index in _indexes(plan), f"{name} does not use {index}"
@@ -0,0 +1,23 @@
+# File: backend/tests/test_notifications.py
+
+import json
+import uuid
+
+from app.services import notifications
+
+
+def test_notify_payloads_split_recipients_under_the_limit():
+    users = [uuid.uuid4() for _ in range(1000)]
+    event = notifications.queue_event(uuid.uuid4(), "added")
+    payloads = notifications.notify_payloads([(users, event)])
+    assert len(payloads) > 1
+    assert all(len(payload.encode()) <= notifications.NOTIFY_MAX_BYTES for payload in payloads)
+    messages = [json.loads(payload) for payload in payloads]
+    assert [user for message in messages for user in message["users"]] == [str(user) for user in users]
+    assert all(message["event"] == event for message in messages)
+
+
+def test_oversized_event_becomes_a_resync():
+    users = [uuid.uuid4()]
+    payloads = notifications.notify_payloads([(users, {"type": "note", "text": "x" * 10_000})])
+    assert [json.loads(payload) for payload in payloads] == [{"users": [str(users[0])], "event": notifications.RESYNC}]
@@ -0,0 +1,99 @@
+# File: backend/tests/test_query_counts.py
+#
+# Expanded expense pages (employee, workflow, receipts and approval
+# history; crud_expense.EXPENSE_DETAIL_OPTIONS) must cost a fixed number of
+# SQL statements whatever the page size, i.e. nothing may fall back to lazy
+# loading per row. Statements are counted with the engine hooks that feed
+# /metrics, around the same list function and rendering each endpoint uses.
+
+import random
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import select
+
+from app.api.v1 import responses
+from app.api.v1.schemas import schemas
+from app.core import metrics
+from app.crud import crud_expense
+from app.db import base as models
+from app.db.session import AsyncSessionLocal
+from app.services import workflow
+
+EXPENSES = 200
+PAGE_SIZES = (1, 10, 50, 200)
+
+LISTS = {
+    "employee": lambda db, company, page: crud_expense.get_expenses_by_employee(
+        db, company.employee_ids[0], schemas.ExpenseFilters(), page, expand=True),
+    "approvals": lambda db, company, page: crud_expense.get_expenses_for_manager_approval(
+        db, company.manager_id, schemas.ExpenseFilters(), page, expand=True),
+    "team": lambda db, company, page: crud_expense.get_expenses_by_subordinates(
+        db, company.manager_id, schemas.ExpenseFilters(), page, expand=True),
+}
+
+
+@contextmanager
+def counting():
+    stats = metrics.RequestStats()
+    token = metrics._current.set(stats)
+    try:
+        yield stats
+    finally:
+        metrics._current.reset(token)
+
+
+async def _populate(db, company, rng: random.Random):
+    """
+    EXPENSES pending expenses with 0-2 receipts each, half of them decided
+    by the manager, so every relationship on the page has rows to load.
+    """
+    await crud_expense.create_expenses_bulk(
+        db,
+        [
+            schemas.ExpenseCreate(
+                description=f"Query count {n}", amount=Decimal(rng.randint(100, 50_000)) / 100,
+                currency="USD", expense_date=date.today(), workflow_id=company.workflow_id,
+            )
+            for n in range(EXPENSES)
+        ],
+        employee_id=company.employee_ids[0],
+        company_id=company.id,
+    )
+    expense_ids = (await db.execute(
+        select(models.Expense.id).where(models.Expense.company_id == company.id)
+    )).scalars().all()
+    for expense_id in expense_ids:
+        for n in range(rng.randint(0, 2)):
+            db.add(models.Receipt(expense_id=expense_id, file_url=f"https://receipts.example.com/{expense_id}/{n}"))
+    await db.commit()
+    await workflow.apply_decisions(db, company.manager_id, [
+        schemas.ApprovalDecision(expense_id=expense_id, approved=rng.random() < 0.7)
+        for expense_id in rng.sample(expense_ids, k=len(expense_ids) // 2)
+    ])
+
+
+@pytest.mark.parametrize("name", list(LISTS))
+def test_expanded_page_costs_constant_statements(run, company, name):
+    list_page = LISTS[name]
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await _populate(db, company, random.Random(1))
+        counts = {}
+        for limit in PAGE_SIZES:
+            async with AsyncSessionLocal() as db:
+                with counting() as stats:
+                    expenses, next_cursor = await list_page(db, company, schemas.PageParams(limit=limit))
+                    responses.expense_detail_page(expenses, next_cursor)
+            counts[len(expenses)] = stats.statements
+        return counts
+
+    counts = run(scenario())
+    assert len(counts) > 1, f"{name}: too few expenses to compare page sizes"
+    assert len(set(counts.values())) == 1, f"{name}: statements by page size {counts}"
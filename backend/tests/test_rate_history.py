@@ -0,0 +1,78 @@
+# File: backend/tests/test_rate_history.py
+#
+# Rate file parsing, and historical conversion through
+# rate_history.convert_many. Rates are written
+# under ISO codes reserved for testing and bond units (XTS, XBA, XBB), so
+# they cannot collide with real ones, and removed afterwards.
+
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import text
+
+from app.db.session import AsyncSessionLocal
+from app.services import rate_history
+
+DAY = date(2025, 6, 13)
+
+
+async def _with_rates(rows, work):
+    async with AsyncSessionLocal() as db:
+        await db.execute(rate_history._upsert(), rows)
+        await db.commit()
+        try:
+            return await work(db)
+        finally:
+            await db.execute(text("DELETE FROM exchange_rates WHERE base IN ('XTS', 'XBA', 'XBB')"))
+            await db.commit()
+
+
+def test_direct_and_inverse_rates(run):
+    rows = [{"base": "XBA", "quote": "XBB", "date": DAY, "rate": Decimal("4")}]
+
+    async def work(db):
+        return await rate_history.convert_many(db, [
+            (Decimal("10"), "XBA", DAY),  # stored as XBA -> XBB
+            (Decimal("10"), "XBA", date(2025, 6, 16)),  # a weekend later, still within the max age
+            (Decimal("10"), "XBB", DAY),
+        ], "XBB"), await rate_history.convert_many(db, [(Decimal("10"), "XBB", DAY)], "XBA")
+
+    to_xbb, to_xba = run(_with_rates(rows, work))
+    assert to_xbb[0] == rate_history.Conversion(Decimal("40.00"), Decimal("4"), DAY)
+    assert to_xbb[1] == rate_history.Conversion(Decimal("40.00"), Decimal("4"), DAY)
+    assert to_xbb[2] == rate_history.Conversion(Decimal("10.00"), Decimal("1"), None)
+    assert to_xba[0].amount == Decimal("2.50")
+
+
+def test_cross_rate_through_a_common_base(run, monkeypatch):
+    monkeypatch.setattr(rate_history, "EXCHANGE_RATE_CROSS_BASES", ["XTS"])
+    rows = [
+        {"base": "XTS", "quote": "XBA", "date": DAY, "rate": Decimal("2")},
+        {"base": "XTS", "quote": "XBB", "date": DAY, "rate": Decimal("5")},
+    ]
+
+    async def work(db):
+        return await rate_history.convert_many(db, [(Decimal("10"), "XBA", DAY), (Decimal("10"), "XBA", date(2025, 1, 1))], "XBB")
+
+    converted, too_old = run(_with_rates(rows, work))
+    # 1 XBA = 0.5 XTS = 2.5 XBB
+    assert converted == rate_history.Conversion(Decimal("25.00"), Decimal("2.5"), DAY)
+    assert too_old is None
+
+
+def test_unreadable_csv_is_a_400():
+    records = rate_history.iter_rates(io.BytesIO(b"date,base,quote,rate\n2025-06-13,USD,EUR,0.9\n2025-06-13,USD,\xff,1\n"), "csv")
+    with pytest.raises(rate_history.RateImportError) as raised:
+        list(records)
+    assert raised.value.status_code == 400
+
+
+def test_rates_outside_the_column_are_row_errors():
+    csv_file = b"date,base,quote,rate\n2025-06-13,USD,XBA,1000000000000\n2025-06-13,USD,XBB,0.0000000000001\n"
+    errors = [error for _, _, error in rate_history.iter_rates(io.BytesIO(csv_file), "csv")]
+    assert all(error and "outside the stored range" in error for error in errors)
@@ -0,0 +1,18 @@
+# File: backend/tests/test_receipt_extraction.py
+
+import zlib
+
+from app.services import receipt_extraction
+
+
+def _pdf(content: bytes) -> bytes:
+    return b"<< /Length 0 /Filter /FlateDecode >>\nstream\n" + zlib.compress(content) + b"\nendstream"
+
+
+def test_pdf_text_reads_compressed_streams():
+    assert receipt_extraction.pdf_text(_pdf(b"BT (Grand Total 42.50) Tj ET")) == "Grand Total 42.50"
+
+
+def test_pdf_text_skips_streams_that_inflate_past_the_limit(monkeypatch):
+    monkeypatch.setattr(receipt_extraction, "RECEIPT_PDF_MAX_STREAM_BYTES", 1024)
+    assert receipt_extraction.pdf_text(_pdf(b"BT (x) Tj " * 10_000)) == ""
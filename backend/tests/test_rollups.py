@@ -0,0 +1,135 @@
+# File: backend/tests/test_rollups.py
+#
+# The incrementally maintained expense rollups must always equal a full
+# recomputation over expenses (rollups.find_mismatches) after each kind of
+# delta: expenses added, removed and re-added, and moved between statuses
+# by the workflow and by admin overrides.
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import delete, select, update
+
+from app.api.v1.schemas import schemas
+from app.crud import crud_expense
+from app.db import base as models
+from app.db.session import AsyncSessionLocal
+from app.services import rollups, workflow
+
+
+def _expense(workflow_id, amount: str, category="Travel", currency="USD", day=date(2025, 3, 14)) -> schemas.ExpenseCreate:
+    return schemas.ExpenseCreate(
+        description="Rollup test",
+        amount=Decimal(amount),
+        currency=currency,
+        category=category,
+        expense_date=day,
+        workflow_id=workflow_id,
+    )
+
+
+async def _mismatches(db, company_id):
+    return await db.run_sync(lambda session: rollups.find_mismatches(session.connection(), company_id=company_id))
+
+
+async def _company_expense_ids(db, company_id):
+    return (await db.execute(
+        select(models.Expense.id).where(models.Expense.company_id == company_id).order_by(models.Expense.created_at)
+    )).scalars().all()
+
+
+def test_adding_expenses_keeps_rollups_exact(run, company):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await crud_expense.create_expense(db, _expense(company.workflow_id, "12.50"), company.employee_ids[0])
+            await crud_expense.create_expense(
+                db, _expense(company.workflow_id, "3.10", category=None), company.employee_ids[0], draft=True
+            )
+            await crud_expense.create_expenses_bulk(
+                db,
+                [
+                    _expense(company.workflow_id, "40.00", currency="EUR"),
+                    _expense(company.workflow_id, "7.25", day=date(2025, 4, 1)),
+                    _expense(company.workflow_id, "7.25", day=date(2025, 4, 1)),
+                ],
+                employee_id=company.employee_ids[1],
+                company_id=company.id,
+            )
+            return await _mismatches(db, company.id)
+
+    assert run(scenario()) == []
+
+
+def test_removing_and_re_adding_expenses_keeps_rollups_exact(run, company):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            draft = await crud_expense.create_expense(
+                db, _expense(company.workflow_id, "19.99"), company.employee_ids[0], draft=True
+            )
+            gone = await crud_expense.create_expense(
+                db, _expense(company.workflow_id, "5.00", category="Meals"), company.employee_ids[0], draft=True
+            )
+
+            # Editing a draft's key fields: out of the rollups, UPDATE, back in.
+            await rollups.remove_expenses(db, [draft.id])
+            await db.execute(
+                update(models.Expense)
+                .where(models.Expense.id == draft.id)
+                .values(amount=Decimal("24.99"), category="Software", expense_date=date(2025, 5, 2))
+            )
+            await rollups.add_expenses(db, [draft.id])
+
+            # Deleting one outright.
+            await rollups.remove_expenses(db, [gone.id])
+            await db.execute(delete(models.Expense).where(models.Expense.id == gone.id))
+            await db.commit()
+            return await _mismatches(db, company.id)
+
+    assert run(scenario()) == []
+
+
+def test_status_changes_keep_rollups_exact(run, company):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await crud_expense.create_expenses_bulk(
+                db,
+                [_expense(company.workflow_id, f"{n}.00", category=["Travel", "Meals"][n % 2]) for n in range(1, 7)],
+                employee_id=company.employee_ids[0],
+                company_id=company.id,
+            )
+            draft = await crud_expense.create_expense(
+                db, _expense(company.workflow_id, "8.00"), company.employee_ids[1], draft=True
+            )
+            await crud_expense.submit_draft(db, draft.id, company.employee_ids[1])
+
+            # The manager approves some and rejects one through the workflow.
+            queued = (await db.execute(
+                select(models.ApprovalInbox.expense_id).where(models.ApprovalInbox.approver_id == company.manager_id)
+            )).scalars().all()
+            await workflow.apply_decisions(db, company.manager_id, [
+                schemas.ApprovalDecision(expense_id=expense_id, approved=index != 0)
+                for index, expense_id in enumerate(queued[:4])
+            ])
+
+            # Admin overrides, including one that is already in that status.
+            expense_ids = await _company_expense_ids(db, company.id)
+            await crud_expense.update_expense_status(db, expense_ids[0], models.ExpenseStatus.approved)
+            await crud_expense.update_expense_status(db, expense_ids[1], models.ExpenseStatus.rejected)
+            await crud_expense.update_expense_status(db, expense_ids[1], models.ExpenseStatus.rejected)
+            await crud_expense.update_expense_status(db, expense_ids[2], models.ExpenseStatus.pending_approval)
+
+            # change_status directly on a batch, as the workflow does.
+            await rollups.change_status(db, expense_ids[3:], models.ExpenseStatus.rejected)
+            await db.execute(
+                update(models.Expense)
+                .where(models.Expense.id.in_(expense_ids[3:]))
+                .values(status=models.ExpenseStatus.rejected)
+            )
+            await db.commit()
+            return await _mismatches(db, company.id)
+
+    assert run(scenario()) == []
@@ -0,0 +1,74 @@
+# File: backend/tests/test_users.py
+
+import uuid
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from app.api.v1.schemas import schemas
+from app.crud import crud_user
+from app.db import base as models
+from app.db.session import AsyncSessionLocal
+from tests.conftest import _create_company, _delete_company
+
+
+def test_manager_must_belong_to_the_same_company(run, company):
+    async def scenario():
+        other = await _create_company(0)
+        try:
+            async with AsyncSessionLocal() as db:
+                employee = await db.get(models.User, company.employee_ids[0])
+                errors = []
+                for manager_id in (other.manager_id, uuid.uuid4()):
+                    try:
+                        await crud_user.update_user(db, employee, schemas.UserUpdate(manager_id=manager_id))
+                    except ValueError as e:
+                        errors.append(str(e))
+                await db.refresh(employee)
+                return errors, employee.manager_id
+        finally:
+            await _delete_company(other.id)
+
+    errors, manager_id = run(scenario())
+    assert errors == ["The manager must be a user of the same company"] * 2
+    assert manager_id == company.manager_id
+
+
+def test_new_user_cannot_report_to_another_company(run, company):
+    async def scenario():
+        other = await _create_company(0)
+        try:
+            async with AsyncSessionLocal() as db:
+                try:
+                    await crud_user.create_user(db, schemas.UserCreate(
+                        email=f"outsider-{uuid.uuid4().hex[:8]}@example.com", password="x",
+                        company_id=company.id, manager_id=other.manager_id,
+                    ), password_hash="x")
+                except ValueError as e:
+                    return str(e)
+        finally:
+            await _delete_company(other.id)
+
+    assert run(scenario()) == "The manager must be a user of the same company"
+
+
+def test_email_cannot_be_cleared():
+    with pytest.raises(ValueError):
+        schemas.UserUpdate.parse_obj({"email": None})
+
+
+def test_taken_email_is_rejected_and_user_unchanged(run, company):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            employee = await db.get(models.User, company.employee_ids[0])
+            email = employee.email
+            taken = (await db.get(models.User, company.employee_ids[1])).email
+            try:
+                await crud_user.update_user(db, employee, schemas.UserUpdate(email=taken))
+            except ValueError as e:
+                error = str(e)
+            await db.refresh(employee)
+            return error, employee.email == email
+
+    assert run(scenario()) == ("A user with this email already exists", True)
@@ -0,0 +1,57 @@
+# File: backend/tests/test_workflow.py
+#
+# Approval workflow engine: company scoping of workflows and inbox
+# maintenance when an employee's manager changes.
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import select
+
+from app.api.v1.schemas import schemas
+from app.crud import crud_expense, crud_user
+from app.db import base as models
+from app.db.session import AsyncSessionLocal
+from app.services import workflow
+from tests.conftest import _create_company, _delete_company
+
+
+def test_manager_change_moves_pending_expenses_to_new_manager(run, company):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            expense = await crud_expense.create_expense(db, schemas.ExpenseCreate(
+                description="Taxi", amount=Decimal("21.00"), currency="USD",
+                expense_date=date.today(), workflow_id=company.workflow_id,
+            ), company.employee_ids[0])
+            new_manager = company.employee_ids[1]
+            employee = await db.get(models.User, company.employee_ids[0])
+            await crud_user.update_user(db, employee, schemas.UserUpdate(manager_id=new_manager))
+            approvers = (await db.execute(
+                select(models.ApprovalInbox.approver_id).where(models.ApprovalInbox.expense_id == expense.id)
+            )).scalars().all()
+            return approvers, new_manager
+
+    approvers, new_manager = run(scenario())
+    assert approvers == [new_manager]
+
+
+def test_workflows_of_another_company_are_not_used(run, company):
+    async def scenario():
+        other = await _create_company(0)
+        try:
+            async with AsyncSessionLocal() as db:
+                with pytest.raises(ValueError):
+                    await crud_expense.create_expense(db, schemas.ExpenseCreate(
+                        description="Taxi", amount=Decimal("21.00"), currency="USD",
+                        expense_date=date.today(), workflow_id=other.workflow_id,
+                    ), company.employee_ids[0])
+                return await workflow.get_plans(db, {(company.id, other.workflow_id), (company.id, company.workflow_id)})
+        finally:
+            await _delete_company(other.id)
+
+    plans = run(scenario())
+    assert list(plans) == [company.workflow_id]